@@ -1,249 +1,465 @@
-from flask import Flask, render_template, request, jsonify, session
+from flask import Flask, render_template, request, jsonify, session, Response, stream_with_context, g
+from flask.sessions import SecureCookieSessionInterface
+import codecs
+import hashlib
 import json
-import re
+import os
+import signal
 from datetime import datetime
-from eligibility_checker import EligibilityChecker
+from bot_core import AdmissionsBot
+from dialogue import DialogueState
+from metrics import Counter, MetricsRegistry, stage
+from rate_limit import AdmissionController, parse_limits
+from session_store import create_conversation_store
+from batch_screening import iter_rows, screen_rows, to_ndjson
+from eligibility_engine import LEVEL_ALIASES
+from tenants import TenantRegistry, UnknownTenant, tenant_from_request
+from compression import COMPRESSIBLE_TYPES, MIN_SIZE, choose_encoding, compress
+from faq import FAQ_INTENTS, compiled_bundle
 import secrets
 
 app = Flask(__name__)
-app.secret_key = secrets.token_hex(16)  # For session management
-
-class UniversityAdmissionsBot:
-    def __init__(self, knowledge_base_file='admissions_data.json'):
-        self.load_knowledge_base(knowledge_base_file)
-        self.eligibility_checker = EligibilityChecker()
-    
-    def load_knowledge_base(self, filename):
-        try:
-            with open(filename, 'r') as file:
-                self.data = json.load(file)
-        except FileNotFoundError:
-            self.data = self.get_default_data()
-    
-    def get_default_data(self):
-        return {
-            "admissions": {
-                "general": {
-                    "apply": "You can apply through our online portal. Complete the application form, upload documents, and pay the application fee.",
-                    "deadlines": "Fall 2024: Early Decision - Nov 1, 2023, Regular Decision - Jan 15, 2024. Spring 2024: Nov 15, 2023."
-                },
-                "documents": {
-                    "required": "Required documents: Application form, Official transcripts, Test scores (SAT/ACT), English proficiency scores, 2-3 letters of recommendation, Personal statement, Resume, Passport copy (international)."
-                },
-                "eligibility": {
-                    "undergraduate": "Undergraduate: High school graduate, 2.5+ GPA, SAT 1000+ or ACT 20+, TOEFL 80+ or IELTS 6.5+."
-                },
-                "courses": {
-                    "undergraduate": "Undergraduate programs: Computer Science, Business, Psychology, Biology, Engineering, English, Economics."
-                }
-            },
-            "keywords": {
-                "apply": ["apply", "application", "admission", "how to"],
-                "documents": ["document", "transcript", "letter", "certificate"],
-                "deadline": ["deadline", "date", "last date", "when"],
-                "eligibility": ["eligible", "eligibility", "qualify", "requirements"],
-                "courses": ["course", "program", "major", "degree"],
-                "greetings": ["hello", "hi", "hey"],
-                "thanks": ["thank", "thanks"],
-                "exit": ["bye", "goodbye"]
-            }
-        }
-    
-    def preprocess_input(self, user_input):
-        user_input = user_input.lower().strip()
-        user_input = re.sub(r'[^\w\s]', '', user_input)
-        return user_input
-    
-    def find_intent(self, user_input):
-        processed_input = self.preprocess_input(user_input)
-        words = processed_input.split()
-        
-        for intent, keywords in self.data['keywords'].items():
-            for keyword in keywords:
-                if keyword in processed_input or keyword in words:
-                    return intent
-        return 'unknown'
-    
-    def generate_response(self, intent, user_input):
-        if intent == 'greetings':
-            return "Hello! I'm the University Admissions Bot. How can I help you with your admission questions today?"
-        
-        elif intent == 'apply':
-            return self.data['admissions']['general']['apply']
-        
-        elif intent == 'documents':
-            return self.data['admissions']['documents']['required']
-        
-        elif intent == 'deadline':
-            return self.data['admissions']['general']['deadlines']
-        
-        elif intent == 'eligibility':
-            return self.data['admissions']['eligibility']['undergraduate']
-        
-        elif intent == 'courses':
-            return self.data['admissions']['courses']['undergraduate']
-        
-        elif intent == 'thanks':
-            return "You're welcome! Is there anything else I can help you with?"
-        
-        elif intent == 'exit':
-            return "Thank you for using the University Admissions Bot. Good luck with your application! 🎓"
-        
-        else:
-            return "I'm not sure I understand. You can ask me about admissions, documents, deadlines, eligibility, courses, or try our eligibility checker!"
-    
-    def check_eligibility_api(self, data):
-        """API endpoint for eligibility checking"""
-        try:
-            education_level = data.get('level', '').lower()
-            
-            if education_level in ['ug', 'undergraduate']:
-                return self.check_undergraduate_eligibility_api(data)
-            elif education_level in ['g', 'graduate']:
-                return self.check_graduate_eligibility_api(data)
-            else:
-                return {"status": "error", "message": "Please specify undergraduate or graduate."}
-        except Exception as e:
-            return {"status": "error", "message": str(e)}
-    
-    def check_undergraduate_eligibility_api(self, data):
-        try:
-            gpa = float(data.get('gpa', 0))
-            test_type = data.get('test_type', '').lower()
-            test_score = int(data.get('test_score', 0))
-            
-            if gpa > 4.0 or gpa < 0:
-                return {"status": "error", "message": "Invalid GPA. Please enter a value between 0.0 and 4.0."}
-            
-            eligible_programs = []
-            programs = {
-                'Computer Science': {'gpa': 3.0, 'sat': 1200, 'act': 25},
-                'Business Administration': {'gpa': 2.8, 'sat': 1100, 'act': 23},
-                'Engineering': {'gpa': 3.2, 'sat': 1250, 'act': 26},
-                'Psychology': {'gpa': 2.7, 'sat': 1050, 'act': 22}
-            }
-            
-            for prog_name, requirements in programs.items():
-                if gpa >= requirements['gpa']:
-                    if test_type == 'sat' and test_score >= requirements['sat']:
-                        eligible_programs.append(prog_name)
-                    elif test_type == 'act' and test_score >= requirements['act']:
-                        eligible_programs.append(prog_name)
-            
-            if eligible_programs:
-                return {
-                    "status": "success", 
-                    "eligible": True,
-                    "programs": eligible_programs,
-                    "message": f"✅ You are eligible for: {', '.join(eligible_programs)}"
-                }
-            else:
-                return {
-                    "status": "success",
-                    "eligible": False,
-                    "message": "📝 Based on your current scores, you may need to improve your GPA or test scores."
-                }
-                
-        except ValueError:
-            return {"status": "error", "message": "Please enter valid numerical values."}
-    
-    def check_graduate_eligibility_api(self, data):
-        try:
-            gpa = float(data.get('gpa', 0))
-            test_type = data.get('test_type', '').lower()
-            test_score = int(data.get('test_score', 0))
-            
-            if gpa > 4.0 or gpa < 0:
-                return {"status": "error", "message": "Invalid GPA. Please enter a value between 0.0 and 4.0."}
-            
-            eligible_programs = []
-            programs = {
-                'MBA': {'gpa': 3.0, 'gmat': 600, 'gre': 310},
-                'MS in Computer Science': {'gpa': 3.2, 'gre': 315},
-                'MS in Engineering': {'gpa': 3.1, 'gre': 310}
-            }
-            
-            for prog_name, requirements in programs.items():
-                if gpa >= requirements['gpa']:
-                    if test_type == 'gre' and test_score >= requirements.get('gre', 0):
-                        eligible_programs.append(prog_name)
-                    elif test_type == 'gmat' and test_score >= requirements.get('gmat', 0):
-                        eligible_programs.append(prog_name)
-            
-            if eligible_programs:
-                return {
-                    "status": "success",
-                    "eligible": True,
-                    "programs": eligible_programs,
-                    "message": f"✅ You are eligible for: {', '.join(eligible_programs)}"
-                }
-            else:
-                return {
-                    "status": "success",
-                    "eligible": False,
-                    "message": "📝 Your scores don't meet the minimum requirements for our graduate programs."
-                }
-                
-        except ValueError:
-            return {"status": "error", "message": "Please enter valid numerical values."}
-
-# Initialize the bot
-bot = UniversityAdmissionsBot()
+# For session management; set SECRET_KEY so every worker accepts the same cookie
+app.secret_key = os.environ.get('SECRET_KEY') or secrets.token_hex(16)
+
+# Initialize the bot (set ADMISSIONS_RETRIEVAL=1 to rank answers with BM25,
+# ADMISSIONS_KB=admissions.kbimg to start from a prebuilt knowledge base).
+# Strict: a missing or invalid knowledge base stops the worker from starting.
+bot = AdmissionsBot(os.environ.get('ADMISSIONS_KB', 'admissions_data.json'),
+                    retrieval=os.environ.get('ADMISSIONS_RETRIEVAL') == '1', strict=True)
+
+# Pick up edits to admissions_data.json without restarting the worker
+bot.knowledge.poll_interval = float(os.environ.get('KB_POLL_INTERVAL', '2'))
+if bot.knowledge.poll_interval > 0:
+    bot.knowledge.start_watching()
+try:
+    signal.signal(signal.SIGHUP, lambda signum, frame: bot.knowledge.request_reload())
+except (AttributeError, ValueError):
+    # No SIGHUP on Windows, and handlers can only be set from the main thread
+    pass
+
+# Multi-tenant mode: TENANTS_DIR holds one knowledge base per campus
+# (e.g. mit.kbimg), picked per request by TENANT_MODE: 'header' (X-Tenant),
+# 'host' (mit.admissions.example.com under TENANT_BASE_HOST
+# admissions.example.com) or 'path' (/mit/chat). Requests without a tenant
+# use the default bot above.
+TENANTS_DIR = os.environ.get('TENANTS_DIR')
+TENANT_MODE = os.environ.get('TENANT_MODE', 'header')
+TENANT_HEADER = os.environ.get('TENANT_HEADER', 'X-Tenant')
+TENANT_BASE_HOST = os.environ.get('TENANT_BASE_HOST', '')
+tenants = None
+if TENANTS_DIR:
+    tenants = TenantRegistry(
+        TENANTS_DIR,
+        lambda path: AdmissionsBot(path, retrieval=bot.retrieval, strict=True),
+        memory_budget=int(os.environ.get('TENANT_MEMORY_BUDGET_MB', '512')) * 1024 * 1024,
+        max_tenants=int(os.environ.get('TENANT_MAX', '0')) or None
+    )
+    if TENANT_MODE == 'host' and not TENANT_BASE_HOST:
+        raise ValueError("TENANT_MODE=host needs TENANT_BASE_HOST, the domain tenant hosts are below")
+
+def bot_for(tenant):
+    """Return the bot serving tenant (the default bot when there is none)"""
+    if tenants is None or tenant is None:
+        return bot
+    return tenants.get(tenant)
+
+class TenantRouting:
+    """WSGI middleware recording the request's tenant in the environ
+    
+    With path routing the tenant prefix moves from PATH_INFO to SCRIPT_NAME,
+    so routes and url_for work unchanged under /<tenant>/.
+    """
+    
+    RESERVED = ('static', 'chat', 'check-eligibility', 'reset', 'metrics', 'admin', 'faq')
+    
+    def __init__(self, wsgi_app):
+        self.wsgi_app = wsgi_app
+        self.header_key = 'HTTP_' + TENANT_HEADER.upper().replace('-', '_')
+    
+    def __call__(self, environ, start_response):
+        tenant, path = tenant_from_request(TENANT_MODE, environ.get('HTTP_HOST', ''), environ.get('PATH_INFO', ''),
+                                           environ.get(self.header_key), self.RESERVED, TENANT_BASE_HOST)
+        if tenant is not None and TENANT_MODE == 'path':
+            environ['SCRIPT_NAME'] = environ.get('SCRIPT_NAME', '') + '/' + tenant
+            environ['PATH_INFO'] = path
+        environ['admissions.tenant'] = tenant
+        return self.wsgi_app(environ, start_response)
+
+if tenants is not None:
+    app.wsgi_app = TenantRouting(app.wsgi_app)
+
+# Conversation history lives server-side; the cookie only carries a session ID
+conversation_store = create_conversation_store(
+    os.environ.get('CONVERSATION_STORE', 'memory'),
+    max_messages=int(os.environ.get('CONVERSATION_MAX_MESSAGES', '100')),
+    idle_timeout=int(os.environ.get('CONVERSATION_IDLE_TIMEOUT', '1800'))
+)
+
+# Per-stage request timing, exposed on /metrics (METRICS_ENABLED=1 to record)
+metrics = MetricsRegistry(
+    enabled=os.environ.get('METRICS_ENABLED') == '1',
+    slow_requests=int(os.environ.get('METRICS_SLOW_REQUESTS', '20')),
+    profile_rate=float(os.environ.get('METRICS_PROFILE_RATE', '0'))
+)
+metrics.add_collector('admissions_response_cache', 'Response cache counters.', bot.response_cache.stats)
+metrics.add_collector(
+    'admissions_conversation_store', 'Conversation store size.',
+    lambda: {key: value for key, value in conversation_store.stats().items() if key != 'backend'}
+)
+metrics.add_collector('admissions_knowledge_base', 'Loaded knowledge base.', lambda: {'version': bot.knowledge.version})
+if tenants is not None:
+    metrics.add_collector('admissions_tenants', 'Loaded tenant knowledge bases.', tenants.stats)
+TIMED_ENDPOINTS = {'chat', 'chat_stream', 'check_eligibility'}
+
+# Admission control: RATE_LIMITS="chat=2:20,chat_stream=2:20,check_eligibility=1:10"
+# gives each client `rate` requests a second with bursts of `burst` per endpoint,
+# keyed by session (RATE_LIMIT_KEY=ip to key by address). MAX_IN_FLIGHT sheds
+# requests beyond that many in progress in this worker.
+admission = AdmissionController(
+    parse_limits(os.environ.get('RATE_LIMITS', '')),
+    max_in_flight=int(os.environ.get('MAX_IN_FLIGHT', '0')),
+    shed_retry_after=int(os.environ.get('SHED_RETRY_AFTER', '1'))
+)
+RATE_LIMIT_KEY = os.environ.get('RATE_LIMIT_KEY', 'session')
+ADMISSION_ENDPOINTS = {'chat', 'chat_stream', 'check_eligibility', 'check_eligibility_batch'}
+REFUSAL_MESSAGES = {
+    429: '{"status": "error", "message": "Too many requests. Please slow down."}',
+    503: '{"status": "error", "message": "The server is busy. Please try again shortly."}'
+}
+throttled_requests = metrics.register(Counter(
+    'admissions_throttled_requests_total', 'Requests refused by a per-client rate limit.', ('route',)))
+shed_requests = metrics.register(Counter(
+    'admissions_shed_requests_total', 'Requests refused because the worker was at capacity.', ('route',)))
+metrics.add_collector('admissions_in_flight', 'Requests in progress.', lambda: {'requests': admission.in_flight})
+
+def client_key():
+    """Identify the caller for rate limiting without reading the request body"""
+    if RATE_LIMIT_KEY == 'session' and 'sid' in session:
+        return session['sid']
+    return request.remote_addr or 'unknown'
+
+def refuse_request(status, retry_after):
+    (throttled_requests if status == 429 else shed_requests).inc(request.path)
+    return Response(REFUSAL_MESSAGES[status], status=status, mimetype='application/json',
+                    headers={'Retry-After': str(retry_after)})
+
+class TimedSessionInterface(SecureCookieSessionInterface):
+    """Signed cookie sessions whose serialization is timed as its own stage"""
+    
+    def save_session(self, app, session, response):
+        with stage('session_cookie'):
+            return super().save_session(app, session, response)
+
+app.session_interface = TimedSessionInterface()
+
+@app.before_request
+def admit_request():
+    if not admission.enabled or request.endpoint not in ADMISSION_ENDPOINTS:
+        return None
+    refusal = admission.admit(request.endpoint, client_key())
+    if refusal is not None:
+        return refuse_request(*refusal)
+    g.admitted = True
+
+@app.before_request
+def select_tenant():
+    # After admission control, so a refused request never loads a tenant
+    try:
+        g.bot = bot_for(request.environ.get('admissions.tenant'))
+    except UnknownTenant:
+        return jsonify({'status': 'error', 'message': 'Unknown tenant'}), 404
+
+@app.before_request
+def start_request_timer():
+    if metrics.enabled and request.endpoint in TIMED_ENDPOINTS:
+        g.request_timer = metrics.start_request(request.path)
+
+@app.after_request
+def remember_status(response):
+    g.response_status = response.status_code
+    return response
+
+# Client-side caching: static URLs carry a content fingerprint (?v=...) and
+# are cached for a year; the page and the FAQ bundle revalidate by ETag.
+STATIC_MAX_AGE = 365 * 24 * 3600
+FAQ_MAX_AGE = int(os.environ.get('FAQ_MAX_AGE', '300'))
+_static_fingerprints = {}
+_compressed = {}
+
+def static_fingerprint(filename):
+    """Return a short content hash of a static file (None if it does not exist)"""
+    path = os.path.join(app.static_folder, filename)
+    try:
+        mtime = os.stat(path).st_mtime_ns
+    except OSError:
+        return None
+    cached = _static_fingerprints.get(filename)
+    if cached is None or cached[0] != mtime:
+        with open(path, 'rb') as file:
+            cached = _static_fingerprints[filename] = (mtime, hashlib.sha256(file.read()).hexdigest()[:12])
+    return cached[1]
+
+@app.url_defaults
+def fingerprint_static_urls(endpoint, values):
+    if endpoint == 'static' and 'filename' in values and 'v' not in values:
+        fingerprint = static_fingerprint(values['filename'])
+        if fingerprint is not None:
+            values['v'] = fingerprint
+
+@app.after_request
+def cache_static_assets(response):
+    if request.endpoint == 'static' and request.args.get('v') and response.status_code in (200, 304):
+        response.cache_control.no_cache = None
+        response.cache_control.public = True
+        response.cache_control.max_age = STATIC_MAX_AGE
+        response.cache_control.immutable = True
+    return response
+
+@app.after_request
+def compress_response(response):
+    """gzip or brotli encode text responses for clients that accept it"""
+    if (response.status_code != 200 or response.mimetype not in COMPRESSIBLE_TYPES
+            or 'Content-Encoding' in response.headers or request.method == 'HEAD'):
+        return response
+    response.vary.add('Accept-Encoding')
+    encoding = choose_encoding(request.headers.get('Accept-Encoding', ''))
+    if encoding is None:
+        return response
+    response.direct_passthrough = False
+    body = response.get_data()
+    if len(body) < MIN_SIZE:
+        return response
+    
+    # Responses with an ETag (static files, the page, the FAQ bundle) repeat; encode them once
+    etag, _ = response.get_etag()
+    key = (request.path, etag, encoding)
+    compressed = _compressed.get(key) if etag else None
+    if compressed is None:
+        compressed = compress(body, encoding)
+        if etag:
+            if len(_compressed) >= 256:
+                _compressed.clear()
+            _compressed[key] = compressed
+    response.set_data(compressed)
+    response.headers['Content-Encoding'] = encoding
+    if etag:
+        # Same content, different bytes: a weak validator, as for any encoded variant
+        response.set_etag(etag, weak=True)
+    return response
+
+@app.teardown_request
+def release_request(exception):
+    if g.pop('admitted', False):
+        admission.release()
+
+@app.teardown_request
+def stop_request_timer(exception):
+    timer = g.pop('request_timer', None)
+    if timer is not None:
+        metrics.end_request(timer, g.get('response_status', 500))
+
+def get_session_id():
+    """Return the caller's session ID, issuing one on first contact"""
+    if 'sid' not in session:
+        session['sid'] = secrets.token_urlsafe(16)
+    return session['sid']
+
+ELIGIBILITY_FORM_PROMPT = "Let's check your eligibility! Please fill out the eligibility checker form below."
+ELIGIBILITY_FORM_PHRASES = ('check eligibility', 'am i eligible')
+
+_index_pages = {}
 
 @app.route('/')
 def home():
-    """Render the chat interface"""
-    return render_template('index.html')
+    """Render the chat interface (once per script root; revalidated by ETag)"""
+    page = _index_pages.get(request.script_root)
+    if page is None or app.debug:
+        html = render_template('index.html').encode('utf-8')
+        page = _index_pages[request.script_root] = (html, hashlib.sha256(html).hexdigest()[:20])
+    response = Response(page[0], mimetype='text/html')
+    response.set_etag(page[1], weak=True)
+    response.cache_control.no_cache = True
+    return response.make_conditional(request)
+
+@app.route('/faq')
+def faq():
+    """FAQ bundle the page uses to answer common questions without calling /chat"""
+    body, etag, last_modified = compiled_bundle(
+        g.bot.knowledge.current, () if g.bot.retrieval else FAQ_INTENTS, ELIGIBILITY_FORM_PHRASES)
+    response = Response(body, mimetype='application/json')
+    response.set_etag(etag, weak=True)
+    if last_modified is not None:
+        response.last_modified = last_modified
+    response.cache_control.public = True
+    response.cache_control.max_age = FAQ_MAX_AGE
+    if tenants is not None and TENANT_MODE == 'header':
+        response.vary.add(TENANT_HEADER)
+    return response.make_conditional(request)
+
+def answer_chat_message(session_id, user_message, dialogue=None, chat_bot=None):
+    """Record the user's turn and return (intent, answer parts, show_eligibility_form)"""
+    with stage('session_store'):
+        conversation_store.append(session_id, {'user': user_message, 'timestamp': datetime.now().isoformat()})
+    
+    # Check if user wants to check eligibility
+    if any(phrase in user_message.lower() for phrase in ELIGIBILITY_FORM_PHRASES):
+        metrics.count_intent('eligibility_form')
+        return 'eligibility_form', (ELIGIBILITY_FORM_PROMPT,), True
+    
+    # Generate bot response
+    intent, parts = (chat_bot or bot).respond_parts(user_message, dialogue)
+    metrics.count_intent(intent)
+    return intent, parts, False
+
+def record_bot_turn(session_id, response):
+    with stage('session_store'):
+        conversation_store.append(session_id, {'bot': response, 'timestamp': datetime.now().isoformat()})
+
+def handle_chat_message(session_id, user_message, dialogue=None, chat_bot=None):
+    """Answer one chat message and record the turn (shared by the WSGI and ASGI apps)"""
+    intent, parts, show_form = answer_chat_message(session_id, user_message, dialogue, chat_bot)
+    response = "\n\n".join(parts)
+    if not show_form:
+        record_bot_turn(session_id, response)
+    
+    return {
+        'response': response,
+        'show_eligibility_form': show_form,
+        'level': dialogue.level if dialogue is not None else None
+    }
+
+def server_sent_event(event, payload):
+    return f"event: {event}\ndata: {json.dumps(payload)}\n\n"
+
+def stream_chat_message(session_id, user_message, dialogue=None, chat_bot=None):
+    """Answer a chat message now; return a generator of its Server-Sent Events
+    
+    Events are the intent (with the remembered study level), then each
+    answer part, then done. The answer is computed before streaming starts
+    so the dialogue state it updates can still be saved in the session.
+    """
+    intent, parts, show_form = answer_chat_message(session_id, user_message, dialogue, chat_bot)
+    level = dialogue.level if dialogue is not None else None
+    
+    def events():
+        yield server_sent_event('intent', {'intent': intent, 'show_eligibility_form': show_form, 'level': level})
+        for part in parts:
+            yield server_sent_event('part', {'text': part})
+        if not show_form:
+            record_bot_turn(session_id, "\n\n".join(parts))
+        yield server_sent_event('done', {})
+    
+    return events()
+
+# Keep proxies from buffering the event stream
+SSE_HEADERS = {'Cache-Control': 'no-cache', 'X-Accel-Buffering': 'no'}
 
 @app.route('/chat', methods=['POST'])
 def chat():
     """Handle chat messages"""
     try:
-        data = request.json
+        with stage('parse_json'):
+            data = request.json
         user_message = data.get('message', '')
-        
-        # Store conversation in session
-        if 'conversation' not in session:
-            session['conversation'] = []
-        
-        session['conversation'].append({'user': user_message, 'timestamp': datetime.now().isoformat()})
-        
-        # Check if user wants to check eligibility
-        if 'check eligibility' in user_message.lower() or 'am i eligible' in user_message.lower():
-            return jsonify({
-                'response': "Let's check your eligibility! Please fill out the eligibility checker form below.",
-                'show_eligibility_form': True
-            })
-        
-        # Generate bot response
-        intent = bot.find_intent(user_message)
-        response = bot.generate_response(intent, user_message)
-        
-        session['conversation'].append({'bot': response, 'timestamp': datetime.now().isoformat()})
-        
-        return jsonify({
-            'response': response,
-            'show_eligibility_form': False
-        })
+        dialogue = DialogueState.from_list(session.get('dialogue'))
+        g.bot.remember_local_turn(dialogue, data.get('context'))
+        payload = handle_chat_message(get_session_id(), user_message, dialogue, g.bot)
+        session['dialogue'] = dialogue.to_list()
+        with stage('serialize'):
+            return jsonify(payload)
         
     except Exception as e:
         return jsonify({'error': str(e)}), 500
 
+@app.route('/chat/stream', methods=['POST'])
+def chat_stream():
+    """Handle chat messages, streaming the answer as Server-Sent Events"""
+    try:
+        with stage('parse_json'):
+            data = request.json
+        user_message = data.get('message', '')
+        if not isinstance(user_message, str):
+            return jsonify({'error': 'message must be a string'}), 400
+    except Exception as e:
+        return jsonify({'error': str(e)}), 400
+    
+    dialogue = DialogueState.from_list(session.get('dialogue'))
+    g.bot.remember_local_turn(dialogue, data.get('context'))
+    events = stream_chat_message(get_session_id(), user_message, dialogue, g.bot)
+    session['dialogue'] = dialogue.to_list()
+    return Response(stream_with_context(events), mimetype='text/event-stream', headers=SSE_HEADERS)
+
+def record_eligibility_outcome(data, result):
+    if not metrics.enabled:
+        return
+    level = LEVEL_ALIASES.get(str(data.get('level', '')).lower(), 'unknown')
+    if result.get('status') != 'success':
+        outcome = 'error'
+    else:
+        outcome = 'eligible' if result.get('eligible') else 'not_eligible'
+    metrics.count_eligibility(level, outcome)
+
 @app.route('/check-eligibility', methods=['POST'])
 def check_eligibility():
     """Handle eligibility check requests"""
     try:
-        data = request.json
-        result = bot.check_eligibility_api(data)
-        return jsonify(result)
+        with stage('parse_json'):
+            data = request.json
+        with stage('eligibility'):
+            result = g.bot.check_eligibility_api(data)
+        record_eligibility_outcome(data, result)
+        with stage('serialize'):
+            return jsonify(result)
     except Exception as e:
         return jsonify({'status': 'error', 'message': str(e)}), 500
 
+@app.route('/check-eligibility/batch', methods=['POST'])
+def check_eligibility_batch():
+    """Screen a CSV or NDJSON upload of applicants, streaming NDJSON results back"""
+    input_format = request.args.get('format')
+    if input_format is None:
+        input_format = 'ndjson' if 'json' in (request.mimetype or '') else 'csv'
+    if input_format not in ('csv', 'ndjson'):
+        return jsonify({'status': 'error', 'message': 'format must be csv or ndjson'}), 400
+    
+    stream = request.stream
+    engine = g.bot.eligibility_checker.engine
+    
+    def generate():
+        lines = codecs.iterdecode(iter(stream.readline, b''), 'utf-8')
+        rows = iter_rows(lines, input_format)
+        yield from to_ndjson(screen_rows(engine, rows, chunk_size=256))
+    
+    return Response(stream_with_context(generate()), mimetype='application/x-ndjson')
+
 @app.route('/reset', methods=['POST'])
 def reset_conversation():
     """Reset the conversation"""
+    if 'sid' in session:
+        conversation_store.clear(session['sid'])
     session.clear()
     return jsonify({'status': 'success', 'message': 'Conversation reset'})
 
+@app.route('/metrics')
+def metrics_endpoint():
+    """Prometheus text exposition of this worker's metrics"""
+    return Response(metrics.render(), mimetype='text/plain; version=0.0.4')
+
+@app.route('/metrics/slow')
+def slow_requests():
+    """The slowest recorded requests with their stage breakdown"""
+    return jsonify(metrics.slow_requests.entries())
+
+@app.route('/admin/reload', methods=['POST'])
+def reload_knowledge_base():
+    """Reload the knowledge base now (requires ADMIN_TOKEN)"""
+    token = os.environ.get('ADMIN_TOKEN')
+    if not token or not secrets.compare_digest(request.headers.get('X-Admin-Token', ''), token):
+        return jsonify({'status': 'error', 'message': 'Forbidden'}), 403
+    
+    reloaded = g.bot.knowledge.reload(force=True)
+    return jsonify({'status': 'success', 'reloaded': reloaded, 'version': g.bot.knowledge.version})
+
 if __name__ == '__main__':
     app.run(debug=True, port=5000)
\ No newline at end of file
@@ -0,0 +1,329 @@
+"""ASGI entry point serving the chat API with coroutine handlers
+
+Production launch (multiple worker processes):
+
+    SECRET_KEY=... CONVERSATION_STORE=sqlite:///var/lib/admissions/sessions.db \\
+        uvicorn asgi:app --host 0.0.0.0 --port 8000 --workers 4
+
+The routes and JSON payloads are the same as the Flask app in app.py, and
+both share its bot, knowledge base watcher and conversation store. Calls
+into a blocking store (SQLite) run in a worker thread so they never stall
+the event loop. Caching headers match the Flask app; responses are gzip
+encoded by Starlette's GZipMiddleware, except the event stream, which the
+page renders as it arrives.
+"""
+import hashlib
+import secrets
+
+from flask import render_template
+from starlette.applications import Starlette
+from starlette.concurrency import run_in_threadpool
+from starlette.middleware import Middleware
+from starlette.middleware.gzip import GZipMiddleware
+from starlette.middleware.sessions import SessionMiddleware
+from starlette.responses import JSONResponse, PlainTextResponse, Response, StreamingResponse
+from starlette.routing import Mount, Route
+from starlette.staticfiles import StaticFiles
+
+import app as wsgi
+from compression import MIN_SIZE
+from dialogue import DialogueState
+from faq import FAQ_INTENTS, compiled_bundle
+from tenants import UnknownTenant, tenant_from_request
+
+bot = wsgi.bot
+conversation_store = wsgi.conversation_store
+
+# The page only depends on static URLs, so render it once with Flask's Jinja setup
+with wsgi.app.test_request_context('/'):
+    INDEX_HTML = render_template('index.html')
+INDEX_ETAG = hashlib.sha256(INDEX_HTML.encode('utf-8')).hexdigest()[:20]
+
+
+def not_modified(request, etag):
+    """Does the request's If-None-Match already name this ETag? (weak comparison)"""
+    header = request.headers.get('if-none-match')
+    if not header:
+        return False
+    tags = {tag.strip().removeprefix('W/') for tag in header.split(',')}
+    return '*' in tags or f'"{etag}"' in tags
+
+
+def cached_response(request, body, etag, media_type, headers):
+    """Return body with a weak ETag, or 304 when the client already has it"""
+    headers = dict(headers, ETag=f'W/"{etag}"')
+    if not_modified(request, etag):
+        return Response(status_code=304, headers=headers)
+    return Response(body, media_type=media_type, headers=headers)
+
+
+class FingerprintedStaticFiles(StaticFiles):
+    """Static files; URLs carrying a ?v= content fingerprint are cached for a year"""
+
+    async def get_response(self, path, scope):
+        response = await super().get_response(path, scope)
+        if b'v=' in scope.get('query_string', b'') and response.status_code in (200, 304):
+            response.headers['Cache-Control'] = f'public, max-age={wsgi.STATIC_MAX_AGE}, immutable'
+        return response
+
+
+def route_path(scope):
+    """The request path below the mount point (a path-routed tenant's prefix)"""
+    root_path = scope.get('root_path', '')
+    return scope['path'][len(root_path):] if scope['path'].startswith(root_path) else scope['path']
+
+
+async def tenant_bot(request):
+    """Return the bot for the request's tenant, loading it off the event loop"""
+    tenant = request.scope.get('admissions.tenant')
+    if wsgi.tenants is None or tenant is None:
+        return bot
+    return await run_in_threadpool(wsgi.bot_for, tenant)
+
+
+async def unknown_tenant(request, exc):
+    return JSONResponse({'status': 'error', 'message': 'Unknown tenant'}, status_code=404)
+
+
+async def call_store(function, *args):
+    """Run a conversation store call without blocking the event loop"""
+    if conversation_store.blocking:
+        return await run_in_threadpool(function, *args)
+    return function(*args)
+
+
+def get_session_id(request):
+    """Return the caller's session ID, issuing one on first contact"""
+    if 'sid' not in request.session:
+        request.session['sid'] = secrets.token_urlsafe(16)
+    return request.session['sid']
+
+
+async def home(request):
+    """Render the chat interface"""
+    await tenant_bot(request)
+    root = request.scope.get('root_path', '')
+    html, etag = INDEX_HTML, INDEX_ETAG
+    if root:
+        html = INDEX_HTML.replace('data-api-root=""', f'data-api-root="{root}"')
+        etag = hashlib.sha256(html.encode('utf-8')).hexdigest()[:20]
+    return cached_response(request, html, etag, 'text/html', {'Cache-Control': 'no-cache'})
+
+
+async def faq(request):
+    """FAQ bundle the page uses to answer common questions without calling /chat"""
+    faq_bot = await tenant_bot(request)
+    body, etag, last_modified = compiled_bundle(
+        faq_bot.knowledge.current, () if faq_bot.retrieval else FAQ_INTENTS, wsgi.ELIGIBILITY_FORM_PHRASES)
+    headers = {'Cache-Control': f'public, max-age={wsgi.FAQ_MAX_AGE}'}
+    if last_modified is not None:
+        headers['Last-Modified'] = last_modified.strftime('%a, %d %b %Y %H:%M:%S GMT')
+    if wsgi.tenants is not None and wsgi.TENANT_MODE == 'header':
+        headers['Vary'] = wsgi.TENANT_HEADER
+    return cached_response(request, body, etag, 'application/json', headers)
+
+
+async def chat(request):
+    """Handle chat messages"""
+    chat_bot = await tenant_bot(request)
+    try:
+        data = await request.json()
+        user_message = data.get('message', '')
+        dialogue = DialogueState.from_list(request.session.get('dialogue'))
+        chat_bot.remember_local_turn(dialogue, data.get('context'))
+        payload = await call_store(wsgi.handle_chat_message, get_session_id(request), user_message, dialogue,
+                                   chat_bot)
+        request.session['dialogue'] = dialogue.to_list()
+        return JSONResponse(payload)
+    except Exception as e:
+        return JSONResponse({'error': str(e)}, status_code=500)
+
+
+async def chat_stream(request):
+    """Handle chat messages, streaming the answer as Server-Sent Events"""
+    chat_bot = await tenant_bot(request)
+    try:
+        data = await request.json()
+        user_message = data.get('message', '')
+        if not isinstance(user_message, str):
+            return JSONResponse({'error': 'message must be a string'}, status_code=400)
+    except Exception as e:
+        return JSONResponse({'error': str(e)}, status_code=400)
+    dialogue = DialogueState.from_list(request.session.get('dialogue'))
+    chat_bot.remember_local_turn(dialogue, data.get('context'))
+    events = await call_store(wsgi.stream_chat_message, get_session_id(request), user_message, dialogue, chat_bot)
+    request.session['dialogue'] = dialogue.to_list()
+    # A plain generator: Starlette iterates it in a worker thread
+    return StreamingResponse(events, media_type='text/event-stream', headers=wsgi.SSE_HEADERS)
+
+
+async def check_eligibility(request):
+    """Handle eligibility check requests"""
+    eligibility_bot = await tenant_bot(request)
+    try:
+        data = await request.json()
+        result = eligibility_bot.check_eligibility_api(data)
+        wsgi.record_eligibility_outcome(data, result)
+        return JSONResponse(result)
+    except Exception as e:
+        return JSONResponse({'status': 'error', 'message': str(e)}, status_code=500)
+
+
+async def reset_conversation(request):
+    """Reset the conversation"""
+    if 'sid' in request.session:
+        await call_store(conversation_store.clear, request.session['sid'])
+    request.session.clear()
+    return JSONResponse({'status': 'success', 'message': 'Conversation reset'})
+
+
+async def metrics_endpoint(request):
+    """Prometheus text exposition of this worker's metrics"""
+    return PlainTextResponse(wsgi.metrics.render(), media_type='text/plain; version=0.0.4')
+
+
+async def slow_requests(request):
+    """The slowest recorded requests with their stage breakdown"""
+    return JSONResponse(wsgi.metrics.slow_requests.entries())
+
+
+# Same endpoint names as the Flask app, so RATE_LIMITS applies to both
+ADMISSION_PATHS = {
+    '/chat': 'chat',
+    '/chat/stream': 'chat_stream',
+    '/check-eligibility': 'check_eligibility'
+}
+
+# Sent uncompressed: the pinned Starlette gzips text/event-stream, and the
+# compressor holds events back until it has a block to flush
+UNCOMPRESSED_PATHS = {'/chat/stream'}
+
+
+class CompressionMiddleware:
+    """GZipMiddleware for every route except UNCOMPRESSED_PATHS"""
+
+    def __init__(self, app, minimum_size=MIN_SIZE):
+        self.app = app
+        self.gzip = GZipMiddleware(app, minimum_size=minimum_size)
+
+    async def __call__(self, scope, receive, send):
+        if scope['type'] == 'http' and route_path(scope) in UNCOMPRESSED_PATHS:
+            await self.app(scope, receive, send)
+        else:
+            await self.gzip(scope, receive, send)
+
+
+class AdmissionControlMiddleware:
+    """Apply the Flask app's rate limits and load shedding before a route runs"""
+
+    def __init__(self, app):
+        self.app = app
+
+    async def __call__(self, scope, receive, send):
+        endpoint = ADMISSION_PATHS.get(route_path(scope)) if scope['type'] == 'http' else None
+        if endpoint is None or not wsgi.admission.enabled:
+            await self.app(scope, receive, send)
+            return
+
+        session_id = scope.get('session', {}).get('sid')
+        if wsgi.RATE_LIMIT_KEY == 'session' and session_id:
+            client = session_id
+        else:
+            client = scope['client'][0] if scope.get('client') else 'unknown'
+        refusal = wsgi.admission.admit(endpoint, client)
+        if refusal is not None:
+            status, retry_after = refusal
+            (wsgi.throttled_requests if status == 429 else wsgi.shed_requests).inc(scope['path'])
+            response = Response(wsgi.REFUSAL_MESSAGES[status], status_code=status, media_type='application/json',
+                                headers={'Retry-After': str(retry_after)})
+            await response(scope, receive, send)
+            return
+
+        try:
+            await self.app(scope, receive, send)
+        finally:
+            wsgi.admission.release()
+
+
+class RequestTimingMiddleware:
+    """Time the Flask app's TIMED_ENDPOINTS for /metrics, as its request hooks do
+
+    The timer is the request's context variable, so stage() blocks in the
+    shared handlers (and the worker threads they run in) report to it.
+    """
+
+    def __init__(self, app):
+        self.app = app
+
+    async def __call__(self, scope, receive, send):
+        endpoint = ADMISSION_PATHS.get(route_path(scope)) if scope['type'] == 'http' else None
+        if endpoint not in wsgi.TIMED_ENDPOINTS or not wsgi.metrics.enabled:
+            await self.app(scope, receive, send)
+            return
+
+        timer = wsgi.metrics.start_request(route_path(scope))
+        status = 500
+
+        async def send_with_status(message):
+            nonlocal status
+            if message['type'] == 'http.response.start':
+                status = message['status']
+            await send(message)
+
+        try:
+            await self.app(scope, receive, send_with_status)
+        finally:
+            wsgi.metrics.end_request(timer, status)
+
+
+class TenantRoutingMiddleware:
+    """Record the request's tenant in the scope, as the Flask app's TenantRouting does
+    
+    With path routing the tenant prefix becomes part of root_path, so the
+    routes below match unchanged under /<tenant>/.
+    """
+
+    def __init__(self, app):
+        self.app = app
+        self.header = wsgi.TENANT_HEADER.lower().encode('latin-1')
+
+    async def __call__(self, scope, receive, send):
+        if scope['type'] == 'http':
+            headers = dict(scope['headers'])
+            header = headers.get(self.header)
+            tenant, _ = tenant_from_request(
+                wsgi.TENANT_MODE, headers.get(b'host', b'').decode('latin-1'), route_path(scope),
+                header.decode('latin-1') if header is not None else None, wsgi.TenantRouting.RESERVED,
+                wsgi.TENANT_BASE_HOST
+            )
+            scope = dict(scope)
+            if tenant is not None and wsgi.TENANT_MODE == 'path':
+                scope['root_path'] = scope.get('root_path', '') + '/' + tenant
+            scope['admissions.tenant'] = tenant
+        await self.app(scope, receive, send)
+
+
+middleware = [
+    Middleware(CompressionMiddleware, minimum_size=MIN_SIZE),
+    Middleware(SessionMiddleware, secret_key=wsgi.app.secret_key),
+    Middleware(AdmissionControlMiddleware),
+    Middleware(RequestTimingMiddleware)
+]
+if wsgi.tenants is not None:
+    middleware.insert(0, Middleware(TenantRoutingMiddleware))
+
+app = Starlette(
+    routes=[
+        Route('/', home),
+        Route('/faq', faq),
+        Route('/chat', chat, methods=['POST']),
+        Route('/chat/stream', chat_stream, methods=['POST']),
+        Route('/check-eligibility', check_eligibility, methods=['POST']),
+        Route('/reset', reset_conversation, methods=['POST']),
+        Route('/metrics', metrics_endpoint),
+        Route('/metrics/slow', slow_requests),
+        Mount('/static', FingerprintedStaticFiles(directory=wsgi.app.static_folder), name='static')
+    ],
+    middleware=middleware,
+    exception_handlers={UnknownTenant: unknown_tenant}
+)
@@ -0,0 +1,157 @@
+"""Bulk eligibility screening over CSV or NDJSON applicant streams
+
+Usage:
+    python batch_screening.py applicants.csv > results.ndjson
+    python batch_screening.py --format ndjson - < applicants.ndjson
+
+Input rows carry level, gpa, test_type and test_score. Every row produces
+one NDJSON line, in input order, either with the eligible programs or with a
+validation error. Rows are read and evaluated chunk by chunk, so memory use
+does not grow with the size of the input.
+"""
+import argparse
+import csv
+import json
+import math
+import sys
+
+import numpy as np
+
+from eligibility_checker import EligibilityChecker
+from eligibility_engine import LEVEL_ALIASES, LEVELS, METRICS
+
+FIELDS = ('level', 'gpa', 'test_type', 'test_score')
+# Above every real test's scale; bounds the value handed to the float64 arrays
+MAX_TEST_SCORE = 10000
+
+
+def iter_csv_rows(lines):
+    """Yield one dict per CSV record from an iterable of text lines"""
+    return csv.DictReader(lines)
+
+
+def iter_ndjson_rows(lines):
+    """Yield one dict per non-empty NDJSON line; bad JSON yields an error marker"""
+    for line in lines:
+        line = line.strip()
+        if not line:
+            continue
+        try:
+            row = json.loads(line)
+        except ValueError:
+            yield {'_error': 'Invalid JSON'}
+            continue
+        yield row if isinstance(row, dict) else {'_error': 'Each line must be a JSON object'}
+
+
+def iter_rows(lines, input_format):
+    if input_format == 'csv':
+        return iter_csv_rows(lines)
+    if input_format == 'ndjson':
+        return iter_ndjson_rows(lines)
+    raise ValueError(f"Unsupported format: {input_format}")
+
+
+def parse_row(row):
+    """Validate one applicant row; return (level, gpa, test_type, test_score) or an error message"""
+    if '_error' in row:
+        return row['_error']
+
+    missing = [field for field in FIELDS if row.get(field) in (None, '')]
+    if missing:
+        return f"Missing field(s): {', '.join(missing)}"
+
+    level = LEVEL_ALIASES.get(str(row['level']).strip().lower())
+    if level is None:
+        return 'Please select undergraduate or graduate'
+
+    try:
+        gpa = float(row['gpa'])
+        test_score = int(row['test_score'])
+    except (TypeError, ValueError, OverflowError):
+        return 'Please enter valid numbers'
+
+    if not math.isfinite(gpa) or gpa < 0 or gpa > 4.0:
+        return 'GPA must be between 0.0 and 4.0'
+    if test_score < 0 or test_score > MAX_TEST_SCORE:
+        return f'Test score must be between 0 and {MAX_TEST_SCORE}'
+
+    return level, gpa, str(row['test_type']).strip().lower(), test_score
+
+
+def screen_rows(engine, rows, chunk_size=1024):
+    """Yield one result dict per row, evaluating valid rows a chunk at a time"""
+    names = np.array(engine.table.names, dtype=object)
+    chunk = []
+
+    for number, row in enumerate(rows, start=1):
+        chunk.append((number, parse_row(row)))
+        if len(chunk) >= chunk_size:
+            yield from _screen_chunk(engine, names, chunk)
+            chunk = []
+
+    if chunk:
+        yield from _screen_chunk(engine, names, chunk)
+
+
+def _screen_chunk(engine, names, chunk):
+    valid = [parsed for _, parsed in chunk if isinstance(parsed, tuple)]
+    if valid:
+        levels = np.array([LEVELS.index(level) for level, _, _, _ in valid], dtype=np.int8)
+        gpas = np.array([gpa for _, gpa, _, _ in valid], dtype=np.float64)
+        tests = np.array([METRICS.index(test) if test in METRICS else -1 for _, _, test, _ in valid], dtype=np.int8)
+        scores = np.array([score for _, _, _, score in valid], dtype=np.float64)
+        matrix = engine.evaluate_codes(levels, gpas, tests, scores)
+
+    position = 0
+    for number, parsed in chunk:
+        if not isinstance(parsed, tuple):
+            yield {'row': number, 'status': 'error', 'message': parsed}
+            continue
+        eligible = names[matrix[position]].tolist()
+        position += 1
+        yield {
+            'row': number,
+            'status': 'success',
+            'level': parsed[0],
+            'eligible': bool(eligible),
+            'programs': eligible
+        }
+
+
+def to_ndjson(results):
+    """Encode result dicts as NDJSON lines"""
+    for result in results:
+        yield json.dumps(result, ensure_ascii=False) + '\n'
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description='Screen a file of applicants against every program.')
+    parser.add_argument('input', help="CSV or NDJSON file of applicants, or '-' for stdin")
+    parser.add_argument('--format', choices=['csv', 'ndjson'],
+                        help='input format (default: guessed from the file extension, csv for stdin)')
+    parser.add_argument('-o', '--output', help='write results here instead of stdout')
+    parser.add_argument('--chunk-size', type=int, default=4096, help='rows evaluated per vectorized batch')
+    args = parser.parse_args(argv)
+
+    input_format = args.format
+    if input_format is None:
+        input_format = 'ndjson' if args.input.endswith(('.ndjson', '.jsonl')) else 'csv'
+
+    source = sys.stdin if args.input == '-' else open(args.input, newline='', encoding='utf-8')
+    target = sys.stdout if args.output is None else open(args.output, 'w', encoding='utf-8')
+    engine = EligibilityChecker().engine
+
+    try:
+        rows = iter_rows(source, input_format)
+        for line in to_ndjson(screen_rows(engine, rows, args.chunk_size)):
+            target.write(line)
+    finally:
+        if source is not sys.stdin:
+            source.close()
+        if target is not sys.stdout:
+            target.close()
+
+
+if __name__ == '__main__':
+    main()
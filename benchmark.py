@@ -0,0 +1,278 @@
+"""Micro-benchmarks and a load generator for the chat and eligibility paths
+
+Usage:
+    python benchmark.py micro --sizes 10 100 1000 10000 -o micro.json
+    python benchmark.py load --requests 2000 --concurrency 8 -o load.json
+    python benchmark.py all -o current.json
+    python benchmark.py compare baseline.json current.json --threshold 0.15
+
+Results are saved as JSON. `compare` exits with status 1 when any latency
+grew, or any throughput fell, by more than the threshold.
+"""
+import argparse
+import json
+import os
+import platform
+import random
+import statistics
+import string
+import sys
+import tempfile
+import threading
+import time
+import timeit
+from datetime import datetime
+
+from admissions_bot import UniversityAdmissionsBot
+from eligibility_checker import EligibilityChecker
+
+CHAT_MESSAGES = [
+    "How do I apply?",
+    "When is the deadline?",
+    "What documents do I need?",
+    "Do I need a transcript?",
+    "How much is tuition?",
+    "Are there scholarships?",
+    "What graduate programs do you offer?",
+    "Am I eligible for the engineering program?",
+    "What is the weather like on campus?",
+    "Thanks!"
+]
+
+ELIGIBILITY_REQUESTS = [
+    {'level': 'ug', 'gpa': '3.4', 'test_type': 'sat', 'test_score': '1280'},
+    {'level': 'ug', 'gpa': '2.6', 'test_type': 'act', 'test_score': '21'},
+    {'level': 'g', 'gpa': '3.3', 'test_type': 'gre', 'test_score': '318'},
+    {'level': 'g', 'gpa': '3.0', 'test_type': 'gmat', 'test_score': '620'}
+]
+
+# Metrics where a bigger number is better; everything else is a latency
+HIGHER_IS_BETTER = ('rps',)
+
+
+def random_word(rng, length=8):
+    return ''.join(rng.choice(string.ascii_lowercase) for _ in range(length))
+
+
+def synthetic_knowledge_base(size, seed=0):
+    """Return the real knowledge base padded with `size` extra keywords
+
+    Synthetic intents are declared after the real ones, so real questions
+    still resolve and misses have to scan the whole automaton.
+    """
+    rng = random.Random(seed)
+    with open('admissions_data.json') as file:
+        data = json.load(file)
+    per_intent = 20
+    for start in range(0, size, per_intent):
+        intent = f'synthetic_{start // per_intent}'
+        data['keywords'][intent] = [random_word(rng) for _ in range(min(per_intent, size - start))]
+        data['admissions'].setdefault('synthetic', {})[intent] = ' '.join(random_word(rng) for _ in range(30))
+    return data
+
+
+def synthetic_programs(size, seed=0):
+    """Return `size` programs split across both levels with random thresholds"""
+    rng = random.Random(seed)
+    programs = {'undergraduate': {}, 'graduate': {}}
+    for number in range(size):
+        if number % 2:
+            programs['graduate'][f'Graduate Program {number}'] = {
+                'gpa': round(rng.uniform(2.5, 3.8), 1),
+                'gre': rng.randint(295, 330),
+                'gmat': rng.randint(50, 75) * 10
+            }
+        else:
+            programs['undergraduate'][f'Undergraduate Program {number}'] = {
+                'gpa': round(rng.uniform(2.0, 3.8), 1),
+                'sat': rng.randint(90, 150) * 10,
+                'act': rng.randint(18, 33)
+            }
+    return programs
+
+
+def time_call(function, repeat=3):
+    """Return the best per-call time in microseconds"""
+    timer = timeit.Timer(function)
+    number, _ = timer.autorange()
+    return min(timer.repeat(repeat=repeat, number=number)) / number * 1e6
+
+
+def run_micro(sizes):
+    """Time the hot-path functions against knowledge bases of each size"""
+    results = {}
+    for size in sizes:
+        handle, path = tempfile.mkstemp(suffix='.json')
+        with os.fdopen(handle, 'w') as file:
+            json.dump(synthetic_knowledge_base(size), file)
+        try:
+            bot = UniversityAdmissionsBot(path, cache_size=0)
+        finally:
+            os.remove(path)
+        checker = EligibilityChecker(synthetic_programs(size))
+        message = "Could you tell me about the financial aid and scholarship options?"
+        miss = "Is the campus library open late during the exam period?"
+        typo = "Could you tell me about the finacial scholarshp options?"
+        request = ELIGIBILITY_REQUESTS[0]
+
+        results[str(size)] = {
+            'preprocess_input_us': time_call(lambda: bot.preprocess_input(message)),
+            'find_intent_hit_us': time_call(lambda: bot.find_intent(message)),
+            'find_intent_miss_us': time_call(lambda: bot.find_intent(miss)),
+            'find_intent_typo_us': time_call(lambda: bot.find_intent(typo)),
+            'generate_response_us': time_call(lambda: bot.generate_response('fees', message)),
+            'respond_us': time_call(lambda: bot.respond(message)),
+            'check_eligibility_api_us': time_call(lambda: checker.check_eligibility_api(request))
+        }
+        print(f"micro size={size}: " + ', '.join(f"{k}={v:.2f}" for k, v in results[str(size)].items()),
+              file=sys.stderr)
+    return results
+
+
+def percentile(ordered, fraction):
+    index = min(len(ordered) - 1, max(0, int(round(fraction * (len(ordered) - 1)))))
+    return ordered[index]
+
+
+def summarize(latencies, elapsed):
+    ordered = sorted(latencies)
+    return {
+        'requests': len(ordered),
+        'p50_ms': percentile(ordered, 0.50) * 1000,
+        'p95_ms': percentile(ordered, 0.95) * 1000,
+        'p99_ms': percentile(ordered, 0.99) * 1000,
+        'mean_ms': statistics.fmean(ordered) * 1000,
+        'rps': len(ordered) / elapsed if elapsed else 0.0
+    }
+
+
+def run_load(requests, concurrency):
+    """Drive the Flask routes through test clients and report latency percentiles"""
+    os.environ.setdefault('KB_POLL_INTERVAL', '0')
+    import app as web
+
+    scenarios = {
+        '/chat': [{'message': message} for message in CHAT_MESSAGES],
+        '/check-eligibility': ELIGIBILITY_REQUESTS
+    }
+    results = {}
+    for route, payloads in scenarios.items():
+        latencies = []
+        lock = threading.Lock()
+        per_worker = max(1, requests // concurrency)
+
+        def worker(seed):
+            client = web.app.test_client()
+            rng = random.Random(seed)
+            local = []
+            for _ in range(per_worker):
+                payload = rng.choice(payloads)
+                started = time.perf_counter()
+                response = client.post(route, json=payload)
+                local.append(time.perf_counter() - started)
+                if response.status_code != 200:
+                    raise RuntimeError(f"{route} returned {response.status_code}")
+            with lock:
+                latencies.extend(local)
+
+        threads = [threading.Thread(target=worker, args=(seed,)) for seed in range(concurrency)]
+        started = time.perf_counter()
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+        results[route] = summarize(latencies, time.perf_counter() - started)
+        print(f"load {route}: " + ', '.join(f"{k}={v:.2f}" for k, v in results[route].items()), file=sys.stderr)
+    return results
+
+
+def flatten(results, prefix=''):
+    """Flatten nested result dicts into {'a.b.c': number}"""
+    flat = {}
+    for key, value in results.items():
+        name = f'{prefix}{key}'
+        if isinstance(value, dict):
+            flat.update(flatten(value, name + '.'))
+        elif isinstance(value, (int, float)) and not isinstance(value, bool):
+            flat[name] = value
+    return flat
+
+
+def compare(baseline, current, threshold):
+    """Return a list of (metric, baseline, current, change) regressions"""
+    regressions = []
+    old = flatten({key: baseline.get(key, {}) for key in ('micro', 'load')})
+    new = flatten({key: current.get(key, {}) for key in ('micro', 'load')})
+    for metric, before in old.items():
+        after = new.get(metric)
+        if after is None or not before or metric.endswith('.requests'):
+            continue
+        change = (after - before) / before
+        if metric.endswith(HIGHER_IS_BETTER):
+            regressed = change < -threshold
+        else:
+            regressed = change > threshold
+        if regressed:
+            regressions.append((metric, before, after, change))
+    return regressions
+
+
+def save(results, path):
+    results['meta'] = {
+        'timestamp': datetime.now().isoformat(),
+        'python': platform.python_version(),
+        'platform': platform.platform()
+    }
+    text = json.dumps(results, indent=2, sort_keys=True)
+    if path:
+        with open(path, 'w') as file:
+            file.write(text + '\n')
+    else:
+        print(text)
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description='Benchmark the admissions bot.')
+    subparsers = parser.add_subparsers(dest='command', required=True)
+
+    for name in ('micro', 'load', 'all'):
+        command = subparsers.add_parser(name)
+        command.add_argument('-o', '--output', help='write JSON results here (default: stdout)')
+        if name in ('micro', 'all'):
+            command.add_argument('--sizes', type=int, nargs='+', default=[10, 100, 1000, 10000],
+                                 help='synthetic keyword/program counts')
+        if name in ('load', 'all'):
+            command.add_argument('--requests', type=int, default=2000, help='requests per route')
+            command.add_argument('--concurrency', type=int, default=4, help='client threads')
+
+    command = subparsers.add_parser('compare')
+    command.add_argument('baseline')
+    command.add_argument('current')
+    command.add_argument('--threshold', type=float, default=0.15,
+                         help='allowed relative slowdown before failing (default 0.15)')
+
+    args = parser.parse_args(argv)
+
+    if args.command == 'compare':
+        with open(args.baseline) as file:
+            baseline = json.load(file)
+        with open(args.current) as file:
+            current = json.load(file)
+        regressions = compare(baseline, current, args.threshold)
+        for metric, before, after, change in regressions:
+            print(f"REGRESSION {metric}: {before:.3f} -> {after:.3f} ({change:+.1%})")
+        if not regressions:
+            print("No regressions beyond the threshold.")
+        return 1 if regressions else 0
+
+    results = {}
+    if args.command in ('micro', 'all'):
+        results['micro'] = run_micro(args.sizes)
+    if args.command in ('load', 'all'):
+        results['load'] = run_load(args.requests, args.concurrency)
+    save(results, args.output)
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,238 @@
+"""The admissions bot engine shared by the CLI, the web apps and worker processes
+
+Every front end builds its bot on AdmissionsBot, so they
+all answer the same question with the same compiled knowledge base,
+response table and eligibility model.
+"""
+import math
+import re
+
+from dialogue import detect_level
+from eligibility_engine import LEVELS
+from knowledge_base import KnowledgeBaseManager, default_data
+from metrics import stage
+from response_cache import ResponseCache
+
+
+class AdmissionsBot:
+    def __init__(self, knowledge_base_file='admissions_data.json', retrieval=False, retrieval_min_score=3.0,
+                 cache_size=1024, cache_ttl=None, spelling=True, strict=False):
+        """Initialize the bot with a knowledge base JSON file or compiled .snapshot
+
+        strict=True refuses a missing or invalid knowledge base instead of
+        falling back to the default data.
+        """
+        self.retrieval = retrieval
+        self.strict = strict
+        self.spelling = spelling
+        self.retrieval_min_score = retrieval_min_score
+        self.response_cache = ResponseCache(cache_size, cache_ttl)
+        self.load_knowledge_base(knowledge_base_file)
+    
+    def load_knowledge_base(self, filename):
+        """Load the knowledge base from JSON file and compile its indexes"""
+        if 'knowledge' in self.__dict__:
+            self.knowledge.stop_watching()
+        self.knowledge = KnowledgeBaseManager(filename, self.get_default_data, strict=self.strict)
+        # Cached answers belong to the previous knowledge base
+        self.knowledge.add_listener(lambda knowledge_base: self.response_cache.clear())
+        self.response_cache.clear()
+    
+    @property
+    def data(self):
+        return self.knowledge.current.data
+    
+    @property
+    def eligibility_checker(self):
+        return self.knowledge.current.eligibility_checker
+    
+    def get_default_data(self):
+        """Provide default data if JSON file is missing"""
+        return default_data()
+    
+    def preprocess_input(self, user_input):
+        """Clean and normalize user input"""
+        user_input = user_input.lower().strip()
+        # Remove special characters
+        user_input = re.sub(r'[^\w\s]', '', user_input)
+        return user_input
+    
+    def find_intent(self, user_input):
+        """Determine user intent based on keywords"""
+        processed_input = self.preprocess_input(user_input)
+        return self.match_intent(self.knowledge.current, processed_input)[0]
+    
+    def match_intent(self, knowledge_base, processed_input):
+        """Return (intent, text); retries with typos corrected when nothing matches"""
+        intent = knowledge_base.intent_matcher.match(processed_input)
+        if intent is None and self.spelling:
+            corrected = knowledge_base.spelling.correct_text(processed_input)
+            if corrected is not None:
+                intent = knowledge_base.intent_matcher.match(corrected)
+                if intent is not None:
+                    return intent, corrected
+        return intent or 'unknown', processed_input
+    
+    def retrieve(self, user_input, top_k=3):
+        """Score user input against every answer in the knowledge base"""
+        return self.knowledge.current.answer_index.search(user_input, top_k)
+    
+    def respond(self, user_input, dialogue=None):
+        """Answer user input, memoized on its normalized form"""
+        intent, parts = self.respond_parts(user_input, dialogue)
+        return intent, "\n\n".join(parts)
+    
+    def respond_parts(self, user_input, dialogue=None):
+        """Answer user input as (intent, tuple of answer parts) for streaming
+        
+        With a DialogueState, follow-ups are resolved against it and it is
+        updated with this turn.
+        """
+        # Pin one knowledge base version for the whole request
+        knowledge_base = self.knowledge.current
+        with stage('preprocess'):
+            processed_input = self.preprocess_input(user_input)
+        cache_key = (knowledge_base.version, processed_input)
+        if dialogue is not None:
+            cache_key += dialogue.key()
+        with stage('cache'):
+            result = self.response_cache.get(cache_key)
+        if result is None:
+            result = self._answer(knowledge_base, processed_input, dialogue)
+            self.response_cache.put(cache_key, result)
+        
+        intent, parts, topic, level = result
+        if dialogue is not None:
+            if intent in knowledge_base.responses.intents:
+                dialogue.remember(intent, topic, level)
+            else:
+                # A retrieval hit outside every intent is labelled with its section; keep only the level
+                dialogue.remember('unknown', None, level)
+        return intent, parts
+    
+    def _answer(self, knowledge_base, processed_input, dialogue):
+        if self.retrieval:
+            with stage('retrieval'):
+                hits = knowledge_base.answer_index.search(processed_input, top_k=1)
+            if hits and hits[0]['score'] >= self.retrieval_min_score:
+                level = detect_level(processed_input) or (dialogue.level if dialogue else None)
+                return hits[0]['intent'], (hits[0]['answer'],), hits[0]['path'].rsplit('.', 1)[-1], level
+        
+        with stage('find_intent'):
+            intent, matched_input = self.match_intent(knowledge_base, processed_input)
+        with stage('generate_response'):
+            return self.resolve_answer(knowledge_base, intent, matched_input, dialogue)
+    
+    def resolve_answer(self, knowledge_base, intent, text, dialogue=None):
+        """Return (intent, parts, topic, level), resolving follow-ups from dialogue state"""
+        stated_level = level = detect_level(text)
+        topic = None
+        if dialogue is not None:
+            if intent == 'unknown' and dialogue.is_follow_up(text):
+                # "what about for graduate?": same question, new detail
+                intent = dialogue.last_intent
+                topic = dialogue.last_topic
+                if topic in LEVELS:
+                    topic = level or dialogue.level
+            if level is None:
+                level = dialogue.level
+                if level == 'graduate':
+                    # Let the graduate answer rules apply to the remembered level
+                    text += ' graduate'
+        topic, parts = knowledge_base.responses.choose(intent, text, topic, stated_level)
+        return intent, parts, topic, level
+    
+    def remember_local_turn(self, dialogue, context):
+        """Record in dialogue a turn the page answered itself from the FAQ bundle
+        
+        context is [intent, topic, level]; anything that does not name an
+        answer of the current knowledge base is ignored.
+        """
+        if dialogue is None or not isinstance(context, list) or len(context) != 3:
+            return
+        intent, topic, level = context
+        if not isinstance(intent, str) or not isinstance(topic, str):
+            return
+        entry = self.knowledge.current.responses.intents.get(intent)
+        if entry is None:
+            return
+        rules, default = entry
+        if topic != default[1] and all(topic != rule_topic for _, _, rule_topic in rules):
+            return
+        dialogue.remember(intent, topic, level if level in LEVELS else None)
+    
+    def generate_response(self, intent, user_input, knowledge_base=None, dialogue=None):
+        """Generate response based on intent"""
+        knowledge_base = knowledge_base or self.knowledge.current
+        _, parts, _, _ = self.resolve_answer(knowledge_base, intent, user_input.lower(), dialogue)
+        return "\n\n".join(parts)
+    
+    def check_eligibility_api(self, data):
+        """API endpoint for eligibility checking"""
+        try:
+            education_level = data.get('level', '').lower()
+            
+            if education_level in ['ug', 'undergraduate']:
+                return self.check_undergraduate_eligibility_api(data)
+            elif education_level in ['g', 'graduate']:
+                return self.check_graduate_eligibility_api(data)
+            else:
+                return {"status": "error", "message": "Please specify undergraduate or graduate."}
+        except Exception as e:
+            return {"status": "error", "message": str(e)}
+    
+    def check_undergraduate_eligibility_api(self, data):
+        try:
+            gpa = float(data.get('gpa', 0))
+            test_type = data.get('test_type', '').lower()
+            test_score = int(data.get('test_score', 0))
+            
+            if not math.isfinite(gpa) or gpa > 4.0 or gpa < 0:
+                return {"status": "error", "message": "Invalid GPA. Please enter a value between 0.0 and 4.0."}
+            
+            eligible_programs, _ = self.eligibility_checker.engine.split('undergraduate', gpa, test_type, test_score)
+            
+            if eligible_programs:
+                return {
+                    "status": "success", 
+                    "eligible": True,
+                    "programs": eligible_programs,
+                    "message": f"✅ You are eligible for: {', '.join(eligible_programs)}"
+                }
+            else:
+                return {
+                    "status": "success",
+                    "eligible": False,
+                    "message": "📝 Based on your current scores, you may need to improve your GPA or test scores."
+                }
+                
+        except ValueError:
+            return {"status": "error", "message": "Please enter valid numerical values."}
+    
+    def check_graduate_eligibility_api(self, data):
+        try:
+            gpa = float(data.get('gpa', 0))
+            test_type = data.get('test_type', '').lower()
+            test_score = int(data.get('test_score', 0))
+            
+            if not math.isfinite(gpa) or gpa > 4.0 or gpa < 0:
+                return {"status": "error", "message": "Invalid GPA. Please enter a value between 0.0 and 4.0."}
+            
+            eligible_programs, _ = self.eligibility_checker.engine.split('graduate', gpa, test_type, test_score)
+            
+            if eligible_programs:
+                return {
+                    "status": "success",
+                    "eligible": True,
+                    "programs": eligible_programs,
+                    "message": f"✅ You are eligible for: {', '.join(eligible_programs)}"
+                }
+            else:
+                return {
+                    "status": "success",
+                    "eligible": False,
+                    "message": "📝 Your scores don't meet the minimum requirements for our graduate programs."
+                }
+                
+        except ValueError:
+            return {"status": "error", "message": "Please enter valid numerical values."}
@@ -0,0 +1,41 @@
+"""Response compression shared by the web apps
+
+gzip is always available; brotli is used when the optional `brotli`
+package is installed and the client accepts it.
+"""
+import gzip
+
+try:
+    import brotli
+except ImportError:
+    brotli = None
+
+COMPRESSIBLE_TYPES = ('text/html', 'text/css', 'text/javascript', 'application/javascript', 'application/json')
+
+# Below this, the encoding overhead outweighs the bytes saved
+MIN_SIZE = 512
+
+
+def choose_encoding(accept_encoding):
+    """Return 'br', 'gzip' or None for an Accept-Encoding header value"""
+    accepted = {}
+    for item in accept_encoding.split(','):
+        coding, _, params = item.strip().partition(';')
+        quality = 1.0
+        params = params.strip()
+        if params.startswith('q='):
+            try:
+                quality = float(params[2:])
+            except ValueError:
+                quality = 0.0
+        accepted[coding.strip().lower()] = quality
+    for coding in (('br', 'gzip') if brotli is not None else ('gzip',)):
+        if accepted.get(coding, accepted.get('*', 0)) > 0:
+            return coding
+    return None
+
+
+def compress(body, encoding):
+    if encoding == 'br':
+        return brotli.compress(body)
+    return gzip.compress(body, compresslevel=6, mtime=0)
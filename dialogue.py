@@ -0,0 +1,70 @@
+"""Compact per-session dialogue state for resolving follow-up questions"""
+
+# Intents that say nothing about the topic of the conversation
+NON_TOPICAL_INTENTS = ('greetings', 'thanks', 'exit', 'unknown')
+
+# Openings of elliptical follow-ups such as "what about for graduate?"
+FOLLOW_UP_CUES = ('what about', 'how about', 'what if', 'and ', 'same for', 'for ')
+
+# Word prefixes naming a study level ("graduation" is not one)
+LEVEL_WORDS = (
+    ('undergraduate', ('undergrad', 'bachelor')),
+    ('graduate', ('graduate', 'master', 'postgrad', 'phd'))
+)
+# Whole words that also name the graduate level
+GRADUATE_WORDS = ('grad', 'grads')
+
+
+def detect_level(text):
+    """Return 'undergraduate', 'graduate' or None for a preprocessed message"""
+    for word in text.split():
+        if word in GRADUATE_WORDS:
+            return 'graduate'
+        for level, prefixes in LEVEL_WORDS:
+            if word.startswith(prefixes):
+                return level
+    return None
+
+
+class DialogueState:
+    """What the session last asked about: intent, answer topic and study level
+
+    A fixed three-field record instead of a transcript. It serializes to a
+    three-item list for the session cookie.
+    """
+
+    __slots__ = ('last_intent', 'last_topic', 'level')
+
+    def __init__(self, last_intent=None, last_topic=None, level=None):
+        self.last_intent = last_intent
+        self.last_topic = last_topic
+        self.level = level
+
+    @classmethod
+    def from_list(cls, values):
+        """Rebuild a state saved with to_list(); anything malformed starts fresh"""
+        if isinstance(values, (list, tuple)) and len(values) == 3:
+            return cls(*values)
+        return cls()
+
+    def to_list(self):
+        return [self.last_intent, self.last_topic, self.level]
+
+    def key(self):
+        return (self.last_intent, self.last_topic, self.level)
+
+    def is_follow_up(self, text):
+        """Is text an elliptical follow-up to the previous topical question?"""
+        if self.last_intent is None:
+            return False
+        return text.startswith(FOLLOW_UP_CUES) or detect_level(text) is not None
+
+    def remember(self, intent, topic, level):
+        if intent not in NON_TOPICAL_INTENTS:
+            self.last_intent = intent
+            self.last_topic = topic
+        if level is not None:
+            self.level = level
+
+    def __repr__(self):
+        return f"DialogueState({self.last_intent!r}, {self.last_topic!r}, {self.level!r})"
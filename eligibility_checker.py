@@ -1,24 +1,47 @@
+import math
+
+from eligibility_engine import EligibilityEngine
+
+DEFAULT_PROGRAMS = {
+    'undergraduate': {
+        'Computer Science': {'gpa': 3.0, 'sat': 1200, 'act': 25},
+        'Business Administration': {'gpa': 2.8, 'sat': 1100, 'act': 23},
+        'Engineering': {'gpa': 3.2, 'sat': 1250, 'act': 26},
+        'Psychology': {'gpa': 2.7, 'sat': 1050, 'act': 22},
+        'Biology': {'gpa': 3.0, 'sat': 1150, 'act': 24},
+        'Economics': {'gpa': 2.9, 'sat': 1120, 'act': 23}
+    },
+    'graduate': {
+        'MBA': {'gpa': 3.0, 'gmat': 600, 'gre': 310},
+        'MS in Computer Science': {'gpa': 3.2, 'gre': 315},
+        'MS in Engineering': {'gpa': 3.1, 'gre': 310},
+        'MA in Psychology': {'gpa': 3.0, 'gre': 305},
+        'MPH': {'gpa': 3.0, 'gre': 300}
+    }
+}
+
+
 class EligibilityChecker:
     """Enhanced eligibility checker for web interface"""
     
-    def __init__(self):
-        self.programs = {
-            'undergraduate': {
-                'Computer Science': {'gpa': 3.0, 'sat': 1200, 'act': 25},
-                'Business Administration': {'gpa': 2.8, 'sat': 1100, 'act': 23},
-                'Engineering': {'gpa': 3.2, 'sat': 1250, 'act': 26},
-                'Psychology': {'gpa': 2.7, 'sat': 1050, 'act': 22},
-                'Biology': {'gpa': 3.0, 'sat': 1150, 'act': 24},
-                'Economics': {'gpa': 2.9, 'sat': 1120, 'act': 23}
-            },
-            'graduate': {
-                'MBA': {'gpa': 3.0, 'gmat': 600, 'gre': 310},
-                'MS in Computer Science': {'gpa': 3.2, 'gre': 315},
-                'MS in Engineering': {'gpa': 3.1, 'gre': 310},
-                'MA in Psychology': {'gpa': 3.0, 'gre': 305},
-                'MPH': {'gpa': 3.0, 'gre': 300}
-            }
-        }
+    def __init__(self, programs=None, engine=None):
+        self.programs = programs or DEFAULT_PROGRAMS
+        self.engine = engine or EligibilityEngine(self.programs)
+    
+    def check_eligibility(self):
+        """Prompt for applicant details on the command line and check them"""
+        level = input("Program level (ug/g): ").strip().lower()
+        gpa = input("GPA (0.0 - 4.0): ").strip()
+        test_type = input("Test type (SAT/ACT/GRE/GMAT): ").strip().lower()
+        test_score = input("Test score: ").strip()
+        
+        result = self.check_eligibility_api({
+            'level': level,
+            'gpa': gpa,
+            'test_type': test_type,
+            'test_score': test_score
+        })
+        return result.get('error') or result['message']
     
     def check_eligibility_api(self, data):
         """API endpoint for eligibility checking"""
@@ -29,7 +52,7 @@ class EligibilityChecker:
             test_score = int(data.get('test_score', 0))
             
             # Validate inputs
-            if gpa < 0 or gpa > 4.0:
+            if not math.isfinite(gpa) or gpa < 0 or gpa > 4.0:
                 return {'error': 'GPA must be between 0.0 and 4.0'}
             
             if level in ['ug', 'undergraduate']:
@@ -38,7 +61,7 @@ class EligibilityChecker:
                 return self.check_graduate(gpa, test_type, test_score)
             else:
                 return {'error': 'Please select undergraduate or graduate'}
-                
+        
         except ValueError:
             return {'error': 'Please enter valid numbers'}
         except Exception as e:
@@ -46,41 +69,15 @@ class EligibilityChecker:
     
     def check_undergraduate(self, gpa, test_type, test_score):
         """Check undergraduate eligibility"""
-        eligible = []
-        not_eligible = []
-        
-        for program, req in self.programs['undergraduate'].items():
-            if gpa >= req['gpa']:
-                if test_type == 'sat' and test_score >= req['sat']:
-                    eligible.append(program)
-                elif test_type == 'act' and test_score >= req['act']:
-                    eligible.append(program)
-                else:
-                    not_eligible.append(program)
-            else:
-                not_eligible.append(program)
-        
-        return self.format_results(eligible, not_eligible, 'undergraduate')
+        eligible, not_eligible = self.engine.split('undergraduate', gpa, test_type, test_score)
+        return self.format_results(eligible, not_eligible, 'undergraduate', gpa, test_type, test_score)
     
     def check_graduate(self, gpa, test_type, test_score):
         """Check graduate eligibility"""
-        eligible = []
-        not_eligible = []
-        
-        for program, req in self.programs['graduate'].items():
-            if gpa >= req['gpa']:
-                if test_type == 'gre' and test_score >= req.get('gre', 0):
-                    eligible.append(program)
-                elif test_type == 'gmat' and test_score >= req.get('gmat', 0):
-                    eligible.append(program)
-                else:
-                    not_eligible.append(program)
-            else:
-                not_eligible.append(program)
-        
-        return self.format_results(eligible, not_eligible, 'graduate')
+        eligible, not_eligible = self.engine.split('graduate', gpa, test_type, test_score)
+        return self.format_results(eligible, not_eligible, 'graduate', gpa, test_type, test_score)
     
-    def format_results(self, eligible, not_eligible, level):
+    def format_results(self, eligible, not_eligible, level, gpa=None, test_type='', test_score=None):
         """Format eligibility results"""
         if eligible:
             message = f"✅ You are eligible for: {', '.join(eligible)}"
@@ -92,6 +89,10 @@ class EligibilityChecker:
             message = "📝 Based on your current scores, you are not eligible for our programs. Consider retaking exams or improving your GPA."
             
             # Add suggestions
+            gpa_improvement_needed, test_improvement_needed = False, False
+            if gpa is not None and test_score is not None:
+                gpa_improvement_needed, test_improvement_needed = self.engine.shortfalls(level, gpa, test_type, test_score)
+            
             suggestions = []
             if gpa_improvement_needed:
                 suggestions.append("improve your GPA")
@@ -101,4 +102,4 @@ class EligibilityChecker:
             if suggestions:
                 message += f"\n\n💡 Suggestions: {', '.join(suggestions)}."
         
-        return {'message': message, 'eligible': eligible, 'not_eligible': not_eligible}
\ No newline at end of file
+        return {'message': message, 'eligible': eligible, 'not_eligible': not_eligible}
@@ -0,0 +1,216 @@
+from bisect import bisect_right
+
+import numpy as np
+
+METRICS = ('gpa', 'sat', 'act', 'gre', 'gmat')
+LEVELS = ('undergraduate', 'graduate')
+LEVEL_ALIASES = {
+    'ug': 'undergraduate',
+    'undergraduate': 'undergraduate',
+    'g': 'graduate',
+    'graduate': 'graduate'
+}
+
+
+class ProgramTable:
+    """Program thresholds stored column-wise, one float column per metric
+
+    A NaN threshold means the program sets no minimum for that metric. A test
+    type is accepted for a level when at least one program of that level
+    lists a threshold for it.
+    """
+
+    def __init__(self, programs):
+        self.names = []
+        levels = []
+        rows = []
+        for level in LEVELS:
+            for name, requirements in programs.get(level, {}).items():
+                self.names.append(name)
+                levels.append(LEVELS.index(level))
+                rows.append([requirements.get(metric, np.nan) for metric in METRICS])
+
+        self._set_columns(np.array(levels, dtype=np.int8),
+                          np.array(rows, dtype=np.float64).reshape(len(rows), len(METRICS)))
+
+    @classmethod
+    def from_arrays(cls, names, levels, thresholds):
+        """Wrap existing level and threshold arrays (e.g. views of a mapped file)"""
+        table = cls.__new__(cls)
+        table.names = list(names)
+        table._set_columns(levels, thresholds.reshape(len(table.names), len(METRICS)))
+        return table
+
+    def _set_columns(self, levels, thresholds):
+        self.levels = levels
+        self.thresholds = thresholds
+
+        # accepted[level, metric]: may an applicant at this level submit this test?
+        self.accepted = np.zeros((len(LEVELS), len(METRICS)), dtype=bool)
+        for code in range(len(LEVELS)):
+            rows_at_level = self.thresholds[self.levels == code]
+            self.accepted[code] = ~np.isnan(rows_at_level).all(axis=0)
+        self.accepted[:, METRICS.index('gpa')] = False
+
+    def __len__(self):
+        return len(self.names)
+
+    def programs_for(self, level):
+        """Return the indexes of a level's programs in declaration order"""
+        return np.flatnonzero(self.levels == LEVELS.index(level))
+
+
+class EligibilityIndex:
+    """Threshold breakpoints and program bitmasks for O(log n) single checks
+
+    For every level, the distinct GPA thresholds and the distinct thresholds
+    of each accepted test are kept sorted, each paired with the bitmask of
+    programs whose minimum is met at that breakpoint. A check is then two
+    binary searches, one AND and a bitmask decode. Bit i stands for the
+    level's i-th program in declaration order.
+    """
+
+    def __init__(self, table):
+        self.levels = {}
+        for code, level in enumerate(LEVELS):
+            indexes = table.programs_for(level)
+            names = tuple(table.names[index] for index in indexes)
+            thresholds = table.thresholds[indexes]
+            tests = {}
+            for metric_code, metric in enumerate(METRICS):
+                if metric_code and table.accepted[code, metric_code]:
+                    tests[metric] = self._breakpoints(thresholds[:, metric_code])
+            self.levels[level] = {
+                'names': names,
+                'gpa': self._breakpoints(thresholds[:, 0]),
+                'tests': tests,
+                'decoded': {}
+            }
+
+    @staticmethod
+    def _breakpoints(column):
+        """Return (sorted thresholds, masks, max threshold) for one metric column
+
+        masks[i] holds the programs satisfied by any value v with
+        bisect_right(thresholds, v) == i; programs without a minimum are
+        always included.
+        """
+        mask = 0
+        pending = {}
+        for bit, value in enumerate(column.tolist()):
+            if value != value:
+                mask |= 1 << bit
+            else:
+                pending[value] = pending.get(value, 0) | (1 << bit)
+
+        breaks = sorted(pending)
+        masks = [mask]
+        for value in breaks:
+            mask |= pending[value]
+            masks.append(mask)
+        return breaks, masks, (breaks[-1] if breaks else None)
+
+    def lookup(self, level, gpa, test_type, test_score):
+        """Return the bitmask of eligible programs at a level (0 for unknown tests)"""
+        entry = self.levels[level]
+        test = entry['tests'].get(test_type)
+        if test is None:
+            return 0
+        gpa_breaks, gpa_masks, _ = entry['gpa']
+        test_breaks, test_masks, _ = test
+        return gpa_masks[bisect_right(gpa_breaks, gpa)] & test_masks[bisect_right(test_breaks, test_score)]
+
+    def split(self, level, gpa, test_type, test_score):
+        """Return (eligible, not_eligible) program names"""
+        entry = self.levels[level]
+        mask = self.lookup(level, gpa, test_type, test_score)
+        decoded = entry['decoded'].get(mask)
+        if decoded is None:
+            names = entry['names']
+            decoded = ([], [])
+            for bit, name in enumerate(names):
+                decoded[0 if mask >> bit & 1 else 1].append(name)
+            decoded = (tuple(decoded[0]), tuple(decoded[1]))
+            entry['decoded'][mask] = decoded
+        return list(decoded[0]), list(decoded[1])
+
+    def shortfalls(self, level, gpa, test_type, test_score):
+        """Return (gpa_short, test_short) against the level's highest minimums"""
+        entry = self.levels[level]
+        highest_gpa = entry['gpa'][2]
+        test = entry['tests'].get(test_type)
+        highest_score = test[2] if test else None
+        return (
+            highest_gpa is not None and gpa < highest_gpa,
+            highest_score is not None and test_score < highest_score
+        )
+
+
+class EligibilityEngine:
+    """Vectorized eligibility checks over a ProgramTable
+
+    evaluate_batch compares a whole matrix of applicants against every
+    program at once. Single-applicant helpers go through the precomputed
+    EligibilityIndex instead, which avoids NumPy's per-call overhead.
+    """
+
+    def __init__(self, programs=None, table=None):
+        self.table = table if table is not None else ProgramTable(programs)
+        self.index = EligibilityIndex(self.table)
+
+    def encode(self, levels, test_types):
+        """Map level and test names to integer codes (-1 when unknown)"""
+        level_codes = np.array(
+            [LEVELS.index(LEVEL_ALIASES[level]) if level in LEVEL_ALIASES else -1 for level in levels],
+            dtype=np.int8
+        )
+        test_codes = np.array(
+            [METRICS.index(test) if test in METRICS else -1 for test in test_types],
+            dtype=np.int8
+        )
+        return level_codes, test_codes
+
+    def evaluate_batch(self, levels, gpas, test_types, test_scores):
+        """Return an (applicants x programs) boolean eligibility matrix
+
+        levels and test_types are sequences of names (e.g. 'ug', 'sat');
+        gpas and test_scores are numeric sequences of the same length.
+        """
+        level_codes, test_codes = self.encode(levels, test_types)
+        return self.evaluate_codes(level_codes, np.asarray(gpas, dtype=np.float64),
+                                   test_codes, np.asarray(test_scores, dtype=np.float64))
+
+    def evaluate_codes(self, level_codes, gpas, test_codes, test_scores):
+        """Vectorized core of evaluate_batch working on encoded columns"""
+        table = self.table
+        valid = (level_codes >= 0) & (test_codes >= 0)
+        safe_levels = np.where(valid, level_codes, 0)
+        safe_tests = np.where(valid, test_codes, 0)
+        valid &= table.accepted[safe_levels, safe_tests]
+
+        gpa_required = table.thresholds[:, 0]
+        gpa_ok = np.isnan(gpa_required) | (gpas[:, None] >= gpa_required)
+
+        score_required = table.thresholds[:, safe_tests].T
+        score_ok = np.isnan(score_required) | (test_scores[:, None] >= score_required)
+
+        level_ok = level_codes[:, None] == table.levels[None, :]
+        return level_ok & gpa_ok & score_ok & valid[:, None]
+
+    def evaluate(self, level, gpa, test_type, test_score):
+        """Return one boolean per program in the table for a single applicant"""
+        return self.evaluate_batch([level], [gpa], [test_type], [test_score])[0]
+
+    def split(self, level, gpa, test_type, test_score):
+        """Return (eligible, not_eligible) program names for the applicant's level"""
+        level = LEVEL_ALIASES.get(level, level)
+        if level not in LEVELS:
+            return [], []
+        return self.index.split(level, gpa, test_type, test_score)
+
+    def shortfalls(self, level, gpa, test_type, test_score):
+        """Return (gpa_short, test_short): does any program need a higher GPA or score?"""
+        level = LEVEL_ALIASES.get(level, level)
+        if level not in LEVELS:
+            return False, False
+        return self.index.shortfalls(level, gpa, test_type, test_score)
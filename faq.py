@@ -0,0 +1,68 @@
+"""FAQ bundle that lets the chat page answer common questions without /chat
+
+The bundle carries what the page needs to reproduce the bot's answer for
+messages that match a keyword: every intent's keywords in declaration order
+(the first-declared intent wins, as in KeywordMatcher), the answer rules of
+the FAQ intents, and the words that set the remembered study level. Typo
+correction and follow-up resolution only apply to messages no keyword
+matches, so those always go to the server; so do messages matching any
+intent outside the bundle.
+
+Bundles are built once per knowledge base version and identified by a hash
+of their content, which every worker computes identically.
+"""
+import hashlib
+import json
+import weakref
+from datetime import datetime, timezone
+
+from dialogue import GRADUATE_WORDS, LEVEL_WORDS
+
+BUNDLE_FORMAT = 'admissions-faq/1'
+
+# Stable, frequently asked intents worth answering in the page
+FAQ_INTENTS = ('apply', 'documents', 'deadline', 'courses', 'fees', 'international')
+
+_bundles = weakref.WeakKeyDictionary()
+
+
+def build_bundle(knowledge_base, intents=FAQ_INTENTS, form_phrases=()):
+    """Return the FAQ bundle dict for a compiled knowledge base
+
+    form_phrases are messages the server answers with the eligibility form;
+    the page sends those to the server.
+    """
+    responses = knowledge_base.responses
+    answers = {}
+    for intent in intents:
+        if intent not in responses.intents:
+            continue
+        rules, (default, default_topic) = responses.export(intent)
+        answers[intent] = {
+            'rules': [[list(triggers), list(parts), topic] for triggers, parts, topic in rules],
+            'default': [list(default), default_topic]
+        }
+    return {
+        'format': BUNDLE_FORMAT,
+        'keywords': [[intent, [phrase for phrase in phrases if phrase]]
+                     for intent, phrases in knowledge_base.data.get('keywords', {}).items()],
+        'answers': answers,
+        'level_words': [[level, list(prefixes)] for level, prefixes in LEVEL_WORDS],
+        'graduate_words': list(GRADUATE_WORDS),
+        'form_phrases': list(form_phrases)
+    }
+
+
+def compiled_bundle(knowledge_base, intents=FAQ_INTENTS, form_phrases=()):
+    """Return (JSON bytes, ETag, Last-Modified or None), built once per knowledge base"""
+    key = (tuple(intents), tuple(form_phrases))
+    compiled = _bundles.setdefault(knowledge_base, {})
+    if key not in compiled:
+        body = json.dumps(build_bundle(knowledge_base, intents, form_phrases), ensure_ascii=False,
+                          separators=(',', ':')).encode('utf-8')
+        etag = hashlib.sha256(body).hexdigest()[:20]
+        last_modified = None
+        if knowledge_base.signature is not None:
+            last_modified = datetime.fromtimestamp(knowledge_base.signature[0] / 1e9, timezone.utc)
+        compiled[key] = (body, etag, last_modified)
+    return compiled[key]
@@ -0,0 +1,132 @@
+class KeywordMatcher:
+    """Aho-Corasick automaton over the intent keywords of the knowledge base
+
+    The automaton is compiled once into a dense transition table, so matching a
+    message is a single pass over its characters no matter how many keywords
+    are loaded. Intents keep their declaration order: when several intents hit,
+    the one declared first in the knowledge base wins.
+    """
+
+    def __init__(self, keywords):
+        self.intents = list(keywords)
+        self._charmap = {}
+        self._build(keywords)
+
+    def _build(self, keywords):
+        """Compile the keyword trie into a full transition table"""
+        goto = [{}]
+        hits = [set()]
+
+        # 1. Trie of every keyword, remembering which intents end at each node
+        for index, intent in enumerate(self.intents):
+            for keyword in keywords[intent]:
+                if not keyword:
+                    continue
+                state = 0
+                for char in keyword:
+                    if char not in self._charmap:
+                        self._charmap[char] = len(self._charmap) + 1
+                    if char not in goto[state]:
+                        goto.append({})
+                        hits.append(set())
+                        goto[state][char] = len(goto) - 1
+                    state = goto[state][char]
+                hits[state].add(index)
+
+        # 2. Breadth-first pass resolving failure links into direct transitions
+        width = len(self._charmap) + 1
+        delta = [0] * (len(goto) * width)
+        fail = [0] * len(goto)
+        queue = []
+        for char, child in goto[0].items():
+            delta[self._charmap[char]] = child
+            queue.append(child)
+
+        for state in queue:
+            hits[state] |= hits[fail[state]]
+            row = state * width
+            fail_row = fail[state] * width
+            for column in range(width):
+                delta[row + column] = delta[fail_row + column]
+            for char, child in goto[state].items():
+                column = self._charmap[char]
+                fail[child] = delta[fail_row + column]
+                delta[row + column] = child
+                queue.append(child)
+
+        # Intents hit at each state, flattened: state s owns
+        # hit_values[hit_offsets[s]:hit_offsets[s + 1]]
+        hit_offsets = [0]
+        hit_values = []
+        first = []
+        for found in hits:
+            found = sorted(found)
+            hit_values.extend(found)
+            hit_offsets.append(len(hit_values))
+            first.append(found[0] if found else len(self.intents))
+
+        self._width = width
+        self._delta = delta
+        self._hit_offsets = hit_offsets
+        self._hit_values = hit_values
+        self._first = first
+
+    @classmethod
+    def attach(cls, intents, charmap, delta, first, hit_offsets, hit_values):
+        """Build a matcher around precompiled tables (lists or memoryviews)"""
+        matcher = cls.__new__(cls)
+        matcher.intents = list(intents)
+        matcher._charmap = dict(charmap)
+        matcher._width = len(matcher._charmap) + 1
+        matcher._delta = delta
+        matcher._first = first
+        matcher._hit_offsets = hit_offsets
+        matcher._hit_values = hit_values
+        return matcher
+
+    def tables(self):
+        """Return the compiled tables in the form attach() accepts"""
+        return {
+            'intents': self.intents,
+            'charmap': self._charmap,
+            'delta': self._delta,
+            'first': self._first,
+            'hit_offsets': self._hit_offsets,
+            'hit_values': self._hit_values
+        }
+
+    def match(self, text):
+        """Return the first-declared intent with a keyword in text, or None"""
+        charmap = self._charmap
+        delta = self._delta
+        first = self._first
+        width = self._width
+        best = len(self.intents)
+        state = 0
+
+        for char in text:
+            state = delta[state * width + charmap.get(char, 0)]
+            if first[state] < best:
+                best = first[state]
+                if best == 0:
+                    break
+
+        if best < len(self.intents):
+            return self.intents[best]
+        return None
+
+    def find_all(self, text):
+        """Return every intent with a keyword in text, in declaration order"""
+        charmap = self._charmap
+        delta = self._delta
+        width = self._width
+        offsets = self._hit_offsets
+        values = self._hit_values
+        found = set()
+        state = 0
+
+        for char in text:
+            state = delta[state * width + charmap.get(char, 0)]
+            found.update(values[offsets[state]:offsets[state + 1]])
+
+        return [self.intents[index] for index in sorted(found)]
@@ -0,0 +1,359 @@
+"""Compiled knowledge base shared by the CLI bot, the web app and worker processes
+
+Usage:
+    python knowledge_base.py admissions_data.json --check
+    python knowledge_base.py admissions_data.json -o admissions.snapshot
+    python knowledge_base.py admissions_data.json -o admissions.kbimg
+
+The source is validated first (see knowledge_schema.py); nothing is written
+if it has errors.
+A snapshot is the fully compiled KnowledgeBase (keyword automaton, answer
+index, response table and eligibility engine) serialized with pickle.
+Pointing the bot at a .snapshot file skips JSON parsing and index building
+at startup. A .kbimg file is a read-only image (see knowledge_image.py) that
+every worker process memory-maps and shares instead of loading a copy.
+"""
+import argparse
+import copy
+import hashlib
+import json
+import os
+import pickle
+import subprocess
+import sys
+import tempfile
+import threading
+import time
+
+from eligibility_checker import EligibilityChecker
+from intent_matcher import KeywordMatcher
+from knowledge_image import MappedKnowledgeBase, write_image
+from knowledge_schema import check, validate
+from responses import ResponseTable
+from retrieval import AnswerIndex
+from spelling import SpellingCorrector
+
+# Bump whenever KnowledgeBase or a compiled component it pickles changes layout,
+# so snapshots from older code are refused instead of failing per request
+SNAPSHOT_FORMAT = 'admissions-knowledge-base/2'
+
+# Compiled components a loaded snapshot must carry
+SNAPSHOT_ATTRIBUTES = {
+    'data': dict,
+    'intent_matcher': KeywordMatcher,
+    'answer_index': AnswerIndex,
+    'responses': ResponseTable,
+    'spelling': SpellingCorrector,
+    'eligibility_checker': EligibilityChecker
+}
+
+DEFAULT_DATA = {
+    "admissions": {
+        "general": {
+            "apply": "You can apply through our online portal. Complete the application form, upload documents, and pay the application fee.",
+            "deadlines": "Fall 2024: Early Decision - Nov 1, 2023, Regular Decision - Jan 15, 2024. Spring 2024: Nov 15, 2023."
+        },
+        "documents": {
+            "required": "Required documents: Application form, Official transcripts, Test scores (SAT/ACT), English proficiency scores, 2-3 letters of recommendation, Personal statement, Resume, Passport copy (international).",
+            "transcripts": "Official transcripts must be sent directly to the admissions office by your previous institutions.",
+            "recommendation": "Letters of recommendation should come from teachers, counselors, or employers who know your work."
+        },
+        "eligibility": {
+            "undergraduate": "Undergraduate: High school graduate, 2.5+ GPA, SAT 1000+ or ACT 20+, TOEFL 80+ or IELTS 6.5+.",
+            "graduate": "Graduate: Bachelor's degree, 3.0+ GPA, GRE/GMAT scores (program dependent), TOEFL 90+ or IELTS 7.0+.",
+            "international": "International students need: Valid passport, Student visa eligibility, English proficiency scores, Financial documentation, Evaluated transcripts."
+        },
+        "courses": {
+            "undergraduate": "Undergraduate programs: Computer Science, Business, Psychology, Biology, Engineering, English, Economics.",
+            "graduate": "Graduate programs: MBA, MS in Computer Science, MA in Psychology, MS in Engineering, MPH.",
+            "engineering": "Engineering programs: Computer, Electrical, Mechanical, Civil, Chemical and Biomedical Engineering."
+        },
+        "fees": {
+            "tuition": "Tuition per semester: In-state undergraduate $5,000, Out-of-state undergraduate $12,000, Graduate $8,000-$15,000.",
+            "application": "Application fee: $50 for domestic students, $75 for international students.",
+            "financial_aid": "Financial aid: Merit scholarships, Need-based grants, Work-study, Student loans. FAFSA required for US students."
+        }
+    },
+    "keywords": {
+        "apply": ["apply", "application", "admission", "how to"],
+        "documents": ["document", "transcript", "letter", "certificate"],
+        "deadline": ["deadline", "date", "last date", "when"],
+        "eligibility": ["eligible", "eligibility", "qualify", "requirements"],
+        "courses": ["course", "program", "major", "degree"],
+        "fees": ["fee", "cost", "tuition", "scholarship"],
+        "international": ["international", "foreign", "visa"],
+        "greetings": ["hello", "hi", "hey"],
+        "thanks": ["thank", "thanks"],
+        "exit": ["bye", "goodbye"]
+    }
+}
+
+
+def default_data():
+    """Return a fresh copy of the built-in fallback knowledge base"""
+    return copy.deepcopy(DEFAULT_DATA)
+
+
+class KnowledgeBase:
+    """One parsed and fully compiled version of the knowledge base
+
+    This is the engine every front end shares: the keyword automaton, the
+    spelling index, the answer index, the response table and the eligibility
+    engine, all built once. Instances are never mutated after construction. A request that
+    holds a reference keeps reading the same version even if a newer one is
+    swapped in meanwhile; the old version is freed once the last reference
+    is gone.
+    """
+
+    def __init__(self, data, version=1, signature=None):
+        self.data = data
+        self.version = version
+        self.signature = signature
+        self.intent_matcher = KeywordMatcher(data.get('keywords', {}))
+        self.answer_index = AnswerIndex(data.get('admissions', {}), data.get('keywords', {}))
+        self.responses = ResponseTable(data.get('admissions', {}))
+        self.spelling = SpellingCorrector.from_keywords(data.get('keywords', {}))
+        self.eligibility_checker = EligibilityChecker(data.get('programs'))
+
+    def save_snapshot(self, path, build=None):
+        """Serialize the compiled knowledge base to path (atomically, like write_image)"""
+        payload = {'format': SNAPSHOT_FORMAT, 'build': build or {}, 'knowledge_base': self}
+        handle, temporary = tempfile.mkstemp(dir=os.path.dirname(os.path.abspath(path)), suffix='.tmp')
+        try:
+            with os.fdopen(handle, 'wb') as file:
+                pickle.dump(payload, file, protocol=pickle.HIGHEST_PROTOCOL)
+            os.chmod(temporary, 0o644)
+            os.replace(temporary, path)
+        except BaseException:
+            os.remove(temporary)
+            raise
+
+    @staticmethod
+    def load_snapshot(path):
+        """Load a knowledge base written by save_snapshot"""
+        with open(path, 'rb') as file:
+            try:
+                payload = pickle.load(file)
+            except Exception as e:
+                # Truncated files, or classes that no longer exist under the pickled name
+                raise ValueError(f"{path} could not be unpickled ({e!r})") from e
+        if not isinstance(payload, dict) or payload.get('format') != SNAPSHOT_FORMAT:
+            raise ValueError(f"{path} is not a {SNAPSHOT_FORMAT} snapshot; rebuild it with knowledge_base.py")
+        return payload['knowledge_base']
+
+
+def check_snapshot(knowledge_base, path):
+    """Raise ValueError unless a loaded snapshot has the layout this code answers from"""
+    if not isinstance(knowledge_base, KnowledgeBase):
+        raise ValueError(f"{path} does not hold a KnowledgeBase")
+    for name, expected in SNAPSHOT_ATTRIBUTES.items():
+        if not isinstance(getattr(knowledge_base, name, None), expected):
+            raise ValueError(f"{path} has no compiled {name}; rebuild it with knowledge_base.py")
+    for intent, entry in knowledge_base.responses.intents.items():
+        try:
+            rules, (default, _) = entry
+            if not all(len(rule) == 3 for rule in rules) or not all(isinstance(part, str) for part in default):
+                raise ValueError
+        except (TypeError, ValueError):
+            raise ValueError(f"{path} has an outdated response table ({intent}); rebuild it with knowledge_base.py")
+    check(knowledge_base.data, path)
+
+
+class KnowledgeBaseManager:
+    """Hold the current knowledge base and hot-swap it when the file changes
+
+    A reload parses and compiles the new version completely before replacing
+    the current one with a single reference assignment, so readers never see
+    a half-built knowledge base. Reloads are triggered by reload(), by
+    request_reload() (safe to call from a signal handler) or by the optional
+    watcher thread that polls the file's mtime, inode and size.
+
+    With strict=True a missing file raises instead of falling back to the
+    default data, JSON is validated before it is compiled and a snapshot's
+    compiled layout is checked after it is loaded, so a worker
+    refuses to start on a broken knowledge base and a reload that fails
+    validation keeps the current version.
+    """
+
+    def __init__(self, filename, default_factory=default_data, poll_interval=2.0, strict=False):
+        self.filename = filename
+        self.strict = strict
+        self.default_factory = default_factory
+        self.poll_interval = poll_interval
+        self._listeners = []
+        self._lock = threading.Lock()
+        self._wake = threading.Event()
+        self._stop = threading.Event()
+        self._watcher = None
+        self._failed_signature = None
+        self._current = self._load(1, self._stat())
+
+    @property
+    def current(self):
+        """The knowledge base version new requests should use"""
+        return self._current
+
+    @property
+    def version(self):
+        return self._current.version
+
+    def _stat(self):
+        """Return a signature that changes whenever the file is replaced or edited"""
+        try:
+            stat = os.stat(self.filename)
+        except OSError:
+            return None
+        return (stat.st_mtime_ns, stat.st_ino, stat.st_size)
+
+    def _load(self, version, signature):
+        """Parse and compile the file, falling back to default data if it is missing
+
+        Files ending in .snapshot are loaded as precompiled knowledge bases
+        and .kbimg images are memory-mapped.
+        """
+        if self.filename.endswith('.kbimg'):
+            return MappedKnowledgeBase(self.filename, version, signature)
+        if self.filename.endswith('.snapshot'):
+            knowledge_base = KnowledgeBase.load_snapshot(self.filename)
+            if self.strict:
+                check_snapshot(knowledge_base, self.filename)
+            knowledge_base.version = version
+            knowledge_base.signature = signature
+            return knowledge_base
+        try:
+            with open(self.filename, 'r') as file:
+                data = json.load(file)
+        except FileNotFoundError:
+            if self.strict:
+                raise
+            print("Error: Knowledge base file not found. Using default data.")
+            data = self.default_factory()
+        if self.strict:
+            check(data, self.filename)
+        return KnowledgeBase(data, version, signature)
+
+    def add_listener(self, callback):
+        """Call callback(knowledge_base) after every swap"""
+        self._listeners.append(callback)
+
+    def reload(self, force=False):
+        """Reload the file if it changed since the last load; return True on swap"""
+        with self._lock:
+            signature = self._stat()
+            if signature is None:
+                return False
+            # A file that failed to load is retried only once it changes again
+            if not force and signature in (self._current.signature, self._failed_signature):
+                return False
+            try:
+                knowledge_base = self._load(self._current.version + 1, signature)
+            except Exception as e:
+                self._failed_signature = signature
+                print(f"Error: Could not reload knowledge base, keeping version {self._current.version}. ({e!r})")
+                return False
+            self._failed_signature = None
+            self._current = knowledge_base
+
+        for callback in self._listeners:
+            callback(knowledge_base)
+        return True
+
+    def request_reload(self):
+        """Ask the watcher thread to reload as soon as possible"""
+        self._wake.set()
+
+    def start_watching(self):
+        """Poll the file for changes in a background daemon thread"""
+        if self._watcher is not None:
+            return
+        self._stop.clear()
+        self._watcher = threading.Thread(target=self._watch, name='knowledge-base-watcher', daemon=True)
+        self._watcher.start()
+
+    def stop_watching(self):
+        if self._watcher is None:
+            return
+        self._stop.set()
+        self._wake.set()
+        self._watcher.join()
+        self._watcher = None
+
+    def _watch(self):
+        while not self._stop.is_set():
+            forced = self._wake.wait(self.poll_interval)
+            self._wake.clear()
+            if self._stop.is_set():
+                break
+            try:
+                self.reload(force=forced)
+            except Exception as e:
+                # A failing listener must not stop future reloads
+                print(f"Error: Knowledge base reload failed. ({e!r})")
+
+
+LOAD_CHECK = """
+import sys, time
+sys.path.insert(0, sys.argv[1])
+from knowledge_base import KnowledgeBaseManager
+started = time.perf_counter()
+KnowledgeBaseManager(sys.argv[2], strict=True)
+print(f"{(time.perf_counter() - started) * 1000:.1f}")
+"""
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description='Validate a knowledge base JSON file and compile it into a snapshot or image.')
+    parser.add_argument('source', help='knowledge base JSON file')
+    parser.add_argument('-o', '--output', help='file to write: admissions.snapshot (pickle) or admissions.kbimg (memory-mapped image)')
+    parser.add_argument('--check', action='store_true', help='only validate the source')
+    args = parser.parse_args(argv)
+    if not args.check and not args.output:
+        parser.error('an --output file is required unless --check is given')
+
+    with open(args.source, 'rb') as file:
+        raw = file.read()
+    try:
+        data = json.loads(raw)
+    except ValueError as e:
+        print(f"{args.source}: invalid JSON ({e})", file=sys.stderr)
+        return 1
+    errors, warnings = validate(data)
+    for warning in warnings:
+        print(f"warning: {warning}", file=sys.stderr)
+    for error in errors:
+        print(f"error: {error}", file=sys.stderr)
+    if errors:
+        print(f"{args.source}: {len(errors)} error(s); nothing written", file=sys.stderr)
+        return 1
+    if args.check:
+        print(f"{args.source} is valid")
+        return 0
+
+    # Run as a script this module is __main__; pickle the importable class so workers can load it
+    import knowledge_base as module
+    knowledge_base = module.KnowledgeBase(data)
+    build = {'source': os.path.basename(args.source), 'sha256': hashlib.sha256(raw).hexdigest()}
+    directory = os.path.dirname(os.path.abspath(args.output))
+    handle, temporary = tempfile.mkstemp(dir=directory, suffix=os.path.splitext(args.output)[1])
+    os.close(handle)
+    try:
+        if args.output.endswith('.kbimg'):
+            write_image(knowledge_base, temporary, build)
+        else:
+            knowledge_base.save_snapshot(temporary, build)
+        # Load the artifact in a fresh process, exactly as a worker will, before it replaces the old one
+        loaded = subprocess.run([sys.executable, '-c', LOAD_CHECK, os.path.dirname(os.path.abspath(__file__)), temporary],
+                                capture_output=True, text=True)
+        if loaded.returncode != 0:
+            print(f"{args.output}: the built file does not load; nothing written\n{loaded.stderr}", file=sys.stderr)
+            return 1
+        os.replace(temporary, args.output)
+    finally:
+        if os.path.exists(temporary):
+            os.remove(temporary)
+    print(f"Wrote {args.output} ({os.path.getsize(args.output)} bytes, loads in {loaded.stdout.strip()} ms)")
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,278 @@
+"""Read-only knowledge base image that worker processes map instead of parsing
+
+An image holds a compiled knowledge base as flat arrays in one file:
+
+    magic (8 bytes) | header length (uint32) | JSON header | aligned sections
+
+The header carries the format version, a CRC-32 of the sections and the
+build metadata (source file and its SHA-256). Sections are the answer strings (one UTF-8 blob plus an offset array), the
+keyword automaton's transition tables (int32) and the program threshold
+columns (int8 levels, float64 thresholds). MappedKnowledgeBase maps the file
+with mmap and wraps the sections in memoryviews and NumPy views, so every
+worker on a host shares the same page-cache pages instead of holding its own
+dict trees. Answers are decoded only when they are returned.
+
+The mapping is read-only and holds no locks, so a knowledge base attached
+before a fork keeps working in the children. Images are replaced with
+os.replace, never rewritten in place, so a mapped file never changes under a
+running worker. A truncated or corrupted image, or one written in another
+format version, is refused when it is attached.
+"""
+import json
+import mmap
+import os
+import struct
+import tempfile
+import zlib
+from array import array
+
+import numpy as np
+
+from eligibility_checker import EligibilityChecker
+from eligibility_engine import EligibilityEngine, ProgramTable
+from intent_matcher import KeywordMatcher
+from responses import ResponseTable
+from retrieval import AnswerIndex
+from spelling import SpellingCorrector
+
+MAGIC = b'ADMKBIMG'
+IMAGE_FORMAT = 'admissions-knowledge-image/2'
+ALIGNMENT = 8
+
+# Subtrees of the knowledge base whose strings go into the string blob
+TEXT_SECTIONS = ('admissions', 'keywords')
+
+
+class StringTable:
+    """UTF-8 strings stored back to back in one buffer, decoded on access"""
+
+    def __init__(self, blob, offsets):
+        self._blob = blob
+        self._offsets = offsets
+
+    def __len__(self):
+        return len(self._offsets) - 1
+
+    def __getitem__(self, index):
+        return str(self._blob[self._offsets[index]:self._offsets[index + 1]], 'utf-8')
+
+
+class MappedResponseTable(ResponseTable):
+    """ResponseTable whose answer parts are indexes into a StringTable"""
+
+    def __init__(self, intents, unknown, strings):
+        self.intents = {
+            intent: (
+                tuple((tuple(triggers), tuple(parts), topic) for triggers, parts, topic in rules),
+                (tuple(default), default_topic)
+            )
+            for intent, (rules, (default, default_topic)) in intents.items()
+        }
+        self.unknown = tuple(unknown)
+        self.strings = strings
+
+    def choose(self, intent, text, topic=None, level=None):
+        topic, parts = super().choose(intent, text, topic, level)
+        return topic, self._decode(parts)
+
+    def export(self, intent):
+        rules, (default, default_topic) = self.intents[intent]
+        return (
+            tuple((triggers, self._decode(parts), topic) for triggers, parts, topic in rules),
+            (self._decode(default), default_topic)
+        )
+
+    def _decode(self, parts):
+        return tuple(self.strings[index] for index in parts)
+
+
+class MappedKnowledgeBase:
+    """A knowledge base attached zero-copy to an image written by write_image
+
+    Offers the same attributes the bot uses on KnowledgeBase. `data` is
+    rebuilt from the image on every access and `answer_index` is built on
+    first use, so only processes that need them (tooling, retrieval mode)
+    pay for a private copy.
+    """
+
+    def __init__(self, path, version=1, signature=None):
+        self.path = path
+        self.version = version
+        self.signature = signature
+        with open(path, 'rb') as file:
+            self._mmap = mmap.mmap(file.fileno(), 0, access=mmap.ACCESS_READ)
+        try:
+            self._attach(memoryview(self._mmap))
+        except (KeyError, IndexError, TypeError, AttributeError, struct.error) as e:
+            # A header with missing fields or sections of the wrong shape
+            raise ValueError(f"{path} has a malformed layout ({e!r}); rebuild it with knowledge_base.py") from e
+
+    def _attach(self, view):
+        """Check the header and checksum, then attach to the image's sections"""
+        if bytes(view[:len(MAGIC)]) != MAGIC:
+            raise ValueError(f"{self.path} is not a knowledge base image")
+        (header_length,) = struct.unpack_from('<I', view, len(MAGIC))
+        start = len(MAGIC) + 4
+        header = json.loads(bytes(view[start:start + header_length]))
+        if header.get('format') != IMAGE_FORMAT:
+            raise ValueError(f"{self.path} is not a {IMAGE_FORMAT} image; rebuild it with knowledge_base.py")
+
+        checksum = 0
+        for offset, length, _ in header['sections'].values():
+            if offset + length > len(view):
+                raise ValueError(f"{self.path} is truncated")
+            checksum = zlib.crc32(view[offset:offset + length], checksum)
+        if checksum != header['checksum']:
+            raise ValueError(f"{self.path} is corrupt (checksum mismatch)")
+        self.build = header.get('build', {})
+
+        sections = {
+            name: view[offset:offset + length].cast(typecode)
+            for name, (offset, length, typecode) in header['sections'].items()
+        }
+        self._sections = sections
+        self.strings = StringTable(sections['strings'], sections['string_offsets'])
+        self.intent_matcher = KeywordMatcher.attach(
+            header['intents'], header['charmap'], sections['delta'], sections['first'],
+            sections['hit_offsets'], sections['hit_values']
+        )
+        self.responses = MappedResponseTable(header['responses'], header['unknown'], self.strings)
+        self.spelling = SpellingCorrector(header['vocabulary'])
+
+        table = ProgramTable.from_arrays(
+            header['program_names'],
+            np.frombuffer(sections['program_levels'], dtype=np.int8),
+            np.frombuffer(sections['program_thresholds'], dtype=np.float64)
+        )
+        self.eligibility_checker = EligibilityChecker(engine=EligibilityEngine(table=table))
+
+    @property
+    def data(self):
+        """Rebuild the knowledge base dict (a private copy; not for hot paths)"""
+        skeleton = json.loads(bytes(self._sections['skeleton']))
+        for key in TEXT_SECTIONS:
+            if key in skeleton:
+                skeleton[key] = _decode(skeleton[key], self.strings)
+        return skeleton
+
+    @property
+    def answer_index(self):
+        index = self.__dict__.get('_answer_index')
+        if index is None:
+            data = self.data
+            index = self._answer_index = AnswerIndex(data.get('admissions', {}), data.get('keywords', {}))
+        return index
+
+
+def _encode(node, intern):
+    """Replace every string in a text subtree with its string table index"""
+    if isinstance(node, str):
+        return intern(node)
+    if isinstance(node, dict):
+        return {key: _encode(value, intern) for key, value in node.items()}
+    if isinstance(node, list):
+        return [_encode(value, intern) for value in node]
+    raise ValueError(f"Expected text in the knowledge base, found {node!r}")
+
+
+def _decode(node, strings):
+    if isinstance(node, int):
+        return strings[node]
+    if isinstance(node, dict):
+        return {key: _decode(value, strings) for key, value in node.items()}
+    return [_decode(value, strings) for value in node]
+
+
+def write_image(knowledge_base, path, build=None):
+    """Serialize a compiled KnowledgeBase into an image at path (atomically)
+
+    build is metadata recorded in the header, e.g. the source file's digest.
+    """
+    strings = []
+    interned = {}
+
+    def intern(text):
+        if text not in interned:
+            interned[text] = len(strings)
+            strings.append(text)
+        return interned[text]
+
+    responses = {}
+    for intent, (rules, (default, default_topic)) in knowledge_base.responses.intents.items():
+        responses[intent] = [
+            [[list(triggers), [intern(part) for part in parts], topic] for triggers, parts, topic in rules],
+            [[intern(part) for part in default], default_topic]
+        ]
+    unknown = [intern(part) for part in knowledge_base.responses.unknown]
+
+    skeleton = dict(knowledge_base.data)
+    for key in TEXT_SECTIONS:
+        if key in skeleton:
+            skeleton[key] = _encode(skeleton[key], intern)
+
+    encoded = [text.encode('utf-8') for text in strings]
+    string_offsets = array('q', [0])
+    for text in encoded:
+        string_offsets.append(string_offsets[-1] + len(text))
+
+    matcher = knowledge_base.intent_matcher.tables()
+    table = knowledge_base.eligibility_checker.engine.table
+    payloads = {
+        'strings': (b''.join(encoded), 'B'),
+        'string_offsets': (string_offsets.tobytes(), 'q'),
+        'delta': (array('i', matcher['delta']).tobytes(), 'i'),
+        'first': (array('i', matcher['first']).tobytes(), 'i'),
+        'hit_offsets': (array('i', matcher['hit_offsets']).tobytes(), 'i'),
+        'hit_values': (array('i', matcher['hit_values']).tobytes(), 'i'),
+        'program_levels': (np.ascontiguousarray(table.levels, dtype=np.int8).tobytes(), 'b'),
+        'program_thresholds': (np.ascontiguousarray(table.thresholds, dtype=np.float64).tobytes(), 'd'),
+        'skeleton': (json.dumps(skeleton, separators=(',', ':')).encode('utf-8'), 'B')
+    }
+    header = {
+        'format': IMAGE_FORMAT,
+        'intents': matcher['intents'],
+        'charmap': matcher['charmap'],
+        'responses': responses,
+        'unknown': unknown,
+        'program_names': table.names,
+        'vocabulary': list(knowledge_base.spelling.words),
+        'build': build or {},
+        'checksum': 0,
+        'sections': {}
+    }
+    for payload, _ in payloads.values():
+        header['checksum'] = zlib.crc32(payload, header['checksum'])
+
+    # Section offsets depend on the header length, which depends on the
+    # offsets; lay out until the header stops growing.
+    header_bytes = b''
+    while True:
+        offset = _align(len(MAGIC) + 4 + len(header_bytes))
+        for name, (payload, typecode) in payloads.items():
+            header['sections'][name] = [offset, len(payload), typecode]
+            offset = _align(offset + len(payload))
+        encoded_header = json.dumps(header, separators=(',', ':')).encode('utf-8')
+        if len(encoded_header) <= len(header_bytes):
+            header_bytes = encoded_header.ljust(len(header_bytes))
+            break
+        header_bytes = encoded_header
+
+    directory = os.path.dirname(os.path.abspath(path))
+    handle, temporary = tempfile.mkstemp(dir=directory, suffix='.tmp')
+    try:
+        with os.fdopen(handle, 'wb') as file:
+            file.write(MAGIC)
+            file.write(struct.pack('<I', len(header_bytes)))
+            file.write(header_bytes)
+            for name, (payload, _) in payloads.items():
+                file.seek(header['sections'][name][0])
+                file.write(payload)
+        os.chmod(temporary, 0o644)
+        os.replace(temporary, path)
+    except BaseException:
+        os.remove(temporary)
+        raise
+
+
+def _align(offset):
+    return (offset + ALIGNMENT - 1) // ALIGNMENT * ALIGNMENT
@@ -0,0 +1,130 @@
+"""Validation of knowledge base JSON before it is compiled or served
+
+Checked against the knowledge base layout the bot reads:
+
+    admissions  {section: {key: answer text}}
+    keywords    {intent: [keyword, ...]}
+    programs    {level: {program: {metric: minimum}}}    (optional)
+
+and against RESPONSE_RULES, so every intent a message can match resolves
+to an answer. Errors make a knowledge base unusable: an answer the bot
+would look up and not find, a keyword that can never match, a matched
+intent with no response. Warnings flag what merely degrades: a refinement
+rule whose answer is missing (its trigger falls back to the intent's
+default answer) or an intent nothing can match.
+"""
+import math
+import re
+
+from eligibility_engine import LEVELS, METRICS
+from responses import RESPONSE_RULES
+
+
+class InvalidKnowledgeBase(ValueError):
+    """A knowledge base failed validation; errors lists every problem found"""
+
+    def __init__(self, source, errors):
+        self.errors = errors
+        super().__init__(f"{source} is not a valid knowledge base:\n  " + "\n  ".join(errors))
+
+
+def normalize_keyword(keyword):
+    """The form of keyword that survives the bot's input preprocessing"""
+    return re.sub(r'[^\w\s]', '', keyword.lower().strip())
+
+
+def validate(data, rules=RESPONSE_RULES):
+    """Return (errors, warnings) as lists of messages naming the offending path"""
+    errors = []
+    warnings = []
+    if not isinstance(data, dict):
+        return ["knowledge base: expected a JSON object"], warnings
+
+    admissions = data.get('admissions')
+    if not isinstance(admissions, dict):
+        errors.append("admissions: expected an object of answer sections")
+        admissions = {}
+    for section, answers in admissions.items():
+        if not isinstance(answers, dict):
+            errors.append(f"admissions.{section}: expected an object of answers")
+            continue
+        for key, answer in answers.items():
+            if not isinstance(answer, str) or not answer.strip():
+                errors.append(f"admissions.{section}.{key}: expected non-empty answer text")
+
+    keywords = data.get('keywords')
+    if not isinstance(keywords, dict):
+        errors.append("keywords: expected an object mapping intents to keyword lists")
+        keywords = {}
+    for intent, phrases in keywords.items():
+        if not isinstance(phrases, list) or not phrases:
+            errors.append(f"keywords.{intent}: expected a non-empty list of keywords")
+            continue
+        for index, phrase in enumerate(phrases):
+            if not isinstance(phrase, str) or not normalize_keyword(phrase):
+                errors.append(f"keywords.{intent}[{index}]: expected a non-empty keyword")
+            elif normalize_keyword(phrase) != phrase:
+                errors.append(f"keywords.{intent}[{index}]: {phrase!r} can never match; "
+                              f"write it as {normalize_keyword(phrase)!r}")
+        if intent not in rules:
+            errors.append(f"keywords.{intent}: no response is defined for this intent")
+
+    for intent, spec in rules.items():
+        for path in _missing_paths(admissions, spec['default']):
+            errors.append(f"admissions.{path}: missing answer for intent {intent!r}")
+        for triggers, parts in spec.get('rules', ()):
+            for path in _missing_paths(admissions, parts):
+                warnings.append(f"admissions.{path}: missing answer for {intent!r} questions "
+                                f"mentioning {'/'.join(triggers)}; the default answer is used")
+        if intent not in keywords:
+            warnings.append(f"keywords.{intent}: no keywords, so this intent is never matched")
+
+    if 'programs' in data:
+        errors.extend(_program_errors(data['programs']))
+    return errors, warnings
+
+
+def check(data, source='knowledge base'):
+    """Raise InvalidKnowledgeBase if data has errors; return its warnings"""
+    errors, warnings = validate(data)
+    if errors:
+        raise InvalidKnowledgeBase(source, errors)
+    return warnings
+
+
+def _missing_paths(admissions, parts):
+    missing = []
+    for part in parts:
+        if isinstance(part, str):
+            continue
+        node = admissions
+        for key in part:
+            node = node.get(key) if isinstance(node, dict) else None
+        if not isinstance(node, str):
+            missing.append('.'.join(part))
+    return missing
+
+
+def _program_errors(programs):
+    if not isinstance(programs, dict):
+        return ["programs: expected an object mapping levels to programs"]
+    errors = []
+    for level, named in programs.items():
+        if level not in LEVELS:
+            errors.append(f"programs.{level}: unknown level; expected one of {', '.join(LEVELS)}")
+            continue
+        if not isinstance(named, dict):
+            errors.append(f"programs.{level}: expected an object of programs")
+            continue
+        for name, requirements in named.items():
+            if not isinstance(requirements, dict):
+                errors.append(f"programs.{level}.{name}: expected an object of minimum scores")
+                continue
+            for metric, minimum in requirements.items():
+                if metric not in METRICS:
+                    errors.append(f"programs.{level}.{name}.{metric}: unknown test; "
+                                  f"expected one of {', '.join(METRICS)}")
+                elif (isinstance(minimum, bool) or not isinstance(minimum, (int, float))
+                      or not math.isfinite(minimum) or minimum < 0):
+                    errors.append(f"programs.{level}.{name}.{metric}: expected a non-negative number")
+    return errors
@@ -0,0 +1,255 @@
+"""Lightweight request instrumentation with a Prometheus text exposition
+
+Code on the hot path wraps work in `with stage('find_intent'):`. When no
+request timer is active (metrics disabled, or outside a request) stage()
+returns a shared no-op context manager, so the cost is one ContextVar
+lookup.
+"""
+import contextvars
+import cProfile
+import heapq
+import io
+import itertools
+import pstats
+import random
+import threading
+import time
+from contextlib import nullcontext
+
+DEFAULT_BUCKETS = (0.0001, 0.00025, 0.0005, 0.001, 0.0025, 0.005, 0.01,
+                   0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, float('inf'))
+
+_NO_OP = nullcontext()
+_current_timer = contextvars.ContextVar('request_timer', default=None)
+
+
+def _format_labels(labelnames, values):
+    if not labelnames:
+        return ''
+    pairs = []
+    for name, value in zip(labelnames, values):
+        escaped = str(value).replace('\\', '\\\\').replace('"', '\\"').replace('\n', '\\n')
+        pairs.append(f'{name}="{escaped}"')
+    return '{' + ','.join(pairs) + '}'
+
+
+def _format_value(value):
+    if value == float('inf'):
+        return '+Inf'
+    return repr(float(value)) if isinstance(value, float) else str(value)
+
+
+class Counter:
+    """Monotonic counter with optional labels"""
+
+    def __init__(self, name, help_text, labelnames=()):
+        self.name = name
+        self.help_text = help_text
+        self.labelnames = tuple(labelnames)
+        self._values = {}
+        self._lock = threading.Lock()
+
+    def inc(self, *labels, amount=1):
+        with self._lock:
+            self._values[labels] = self._values.get(labels, 0) + amount
+
+    def value(self, *labels):
+        return self._values.get(labels, 0)
+
+    def render(self):
+        lines = [f'# HELP {self.name} {self.help_text}', f'# TYPE {self.name} counter']
+        with self._lock:
+            for labels, value in sorted(self._values.items()):
+                lines.append(f'{self.name}{_format_labels(self.labelnames, labels)} {_format_value(value)}')
+        return lines
+
+
+class Histogram:
+    """Cumulative-bucket histogram of observed durations in seconds"""
+
+    def __init__(self, name, help_text, labelnames=(), buckets=DEFAULT_BUCKETS):
+        self.name = name
+        self.help_text = help_text
+        self.labelnames = tuple(labelnames)
+        self.buckets = tuple(buckets)
+        self._series = {}
+        self._lock = threading.Lock()
+
+    def observe(self, value, *labels):
+        with self._lock:
+            series = self._series.get(labels)
+            if series is None:
+                series = self._series[labels] = [[0] * len(self.buckets), 0.0, 0]
+            for index, bound in enumerate(self.buckets):
+                if value <= bound:
+                    series[0][index] += 1
+                    break
+            series[1] += value
+            series[2] += 1
+
+    def count(self, *labels):
+        series = self._series.get(labels)
+        return series[2] if series else 0
+
+    def render(self):
+        lines = [f'# HELP {self.name} {self.help_text}', f'# TYPE {self.name} histogram']
+        bucket_names = self.labelnames + ('le',)
+        with self._lock:
+            for labels, (counts, total, count) in sorted(self._series.items()):
+                for bound, cumulative in zip(self.buckets, itertools.accumulate(counts)):
+                    label_text = _format_labels(bucket_names, labels + (_format_value(bound),))
+                    lines.append(f'{self.name}_bucket{label_text} {cumulative}')
+                label_text = _format_labels(self.labelnames, labels)
+                lines.append(f'{self.name}_sum{label_text} {_format_value(total)}')
+                lines.append(f'{self.name}_count{label_text} {count}')
+        return lines
+
+
+class SlowRequestLog:
+    """Keep the N slowest requests with their stage breakdown"""
+
+    def __init__(self, size=20):
+        self.size = size
+        self._heap = []
+        self._counter = itertools.count()
+        self._lock = threading.Lock()
+
+    def would_keep(self, duration):
+        return len(self._heap) < self.size or duration > self._heap[0][0]
+
+    def add(self, duration, entry):
+        with self._lock:
+            item = (duration, next(self._counter), entry)
+            if len(self._heap) < self.size:
+                heapq.heappush(self._heap, item)
+            elif duration > self._heap[0][0]:
+                heapq.heapreplace(self._heap, item)
+
+    def entries(self):
+        with self._lock:
+            return [entry for _, _, entry in sorted(self._heap, reverse=True)]
+
+
+class RequestTimer:
+    """Stage timings for one request, plus an optional cProfile run"""
+
+    def __init__(self, registry, route, profile=False):
+        self.registry = registry
+        self.route = route
+        self.stages = {}
+        self.started = time.perf_counter()
+        self.profiler = None
+        if profile:
+            self.profiler = cProfile.Profile()
+            self.profiler.enable()
+
+    def finish(self, status=200):
+        duration = time.perf_counter() - self.started
+        if self.profiler is not None:
+            self.profiler.disable()
+        self.registry.record_request(self, duration, status)
+
+
+class _Stage:
+    __slots__ = ('timer', 'name', 'started')
+
+    def __init__(self, timer, name):
+        self.timer = timer
+        self.name = name
+
+    def __enter__(self):
+        self.started = time.perf_counter()
+
+    def __exit__(self, *exc_info):
+        elapsed = time.perf_counter() - self.started
+        self.timer.stages[self.name] = self.timer.stages.get(self.name, 0.0) + elapsed
+        return False
+
+
+class MetricsRegistry:
+    """All metrics of one worker process"""
+
+    def __init__(self, enabled=False, slow_requests=20, profile_rate=0.0):
+        self.enabled = enabled
+        self.profile_rate = profile_rate
+        self.request_duration = Histogram(
+            'admissions_request_duration_seconds', 'Time spent handling a request.', ('route', 'status'))
+        self.stage_duration = Histogram(
+            'admissions_stage_duration_seconds', 'Time spent in each stage of a request.', ('route', 'stage'))
+        self.intents = Counter('admissions_chat_intents_total', 'Chat messages by resolved intent.', ('intent',))
+        self.eligibility = Counter(
+            'admissions_eligibility_checks_total', 'Eligibility checks by level and outcome.', ('level', 'outcome'))
+        self.slow_requests = SlowRequestLog(slow_requests)
+        self._metrics = [self.request_duration, self.stage_duration, self.intents, self.eligibility]
+        self._collectors = []
+
+    def register(self, metric):
+        """Add an extra Counter or Histogram to the exposition"""
+        self._metrics.append(metric)
+        return metric
+
+    def add_collector(self, name, help_text, collect):
+        """Expose a gauge read at scrape time; collect() returns {key: number}"""
+        self._collectors.append((name, help_text, collect))
+
+    def start_request(self, route):
+        """Begin timing a request; returns None when metrics are disabled"""
+        if not self.enabled:
+            return None
+        profile = self.profile_rate > 0 and random.random() < self.profile_rate
+        timer = RequestTimer(self, route, profile)
+        _current_timer.set(timer)
+        return timer
+
+    def end_request(self, timer, status=200):
+        if timer is None:
+            return
+        _current_timer.set(None)
+        timer.finish(status)
+
+    def record_request(self, timer, duration, status):
+        self.request_duration.observe(duration, timer.route, str(status))
+        for name, elapsed in timer.stages.items():
+            self.stage_duration.observe(elapsed, timer.route, name)
+
+        if self.slow_requests.would_keep(duration):
+            entry = {
+                'route': timer.route,
+                'status': status,
+                'duration_ms': round(duration * 1000, 3),
+                'stages_ms': {name: round(elapsed * 1000, 3) for name, elapsed in timer.stages.items()},
+                'timestamp': time.time()
+            }
+            if timer.profiler is not None:
+                output = io.StringIO()
+                pstats.Stats(timer.profiler, stream=output).sort_stats('cumulative').print_stats(15)
+                entry['profile'] = output.getvalue()
+            self.slow_requests.add(duration, entry)
+
+    def count_intent(self, intent):
+        if self.enabled:
+            self.intents.inc(intent)
+
+    def count_eligibility(self, level, outcome):
+        if self.enabled:
+            self.eligibility.inc(level, outcome)
+
+    def render(self):
+        """Return every metric in the Prometheus text format"""
+        lines = []
+        for metric in self._metrics:
+            lines.extend(metric.render())
+        for name, help_text, collect in self._collectors:
+            lines.append(f'# HELP {name} {help_text}')
+            lines.append(f'# TYPE {name} gauge')
+            for key, value in sorted(collect().items()):
+                lines.append(f'{name}{_format_labels(("key",), (key,))} {_format_value(value)}')
+        return '\n'.join(lines) + '\n'
+
+
+def stage(name):
+    """Time a block as a stage of the current request (no-op outside one)"""
+    timer = _current_timer.get()
+    if timer is None:
+        return _NO_OP
+    return _Stage(timer, name)
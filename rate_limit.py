@@ -0,0 +1,106 @@
+import math
+import threading
+import time
+from collections import OrderedDict
+
+
+class TokenBucket:
+    __slots__ = ('tokens', 'updated')
+
+    def __init__(self, tokens, updated):
+        self.tokens = tokens
+        self.updated = updated
+
+
+class RateLimiter:
+    """Token bucket per client: `rate` requests a second, bursts of up to `burst`
+
+    Buckets are kept in LRU order and the least recently seen clients are
+    dropped past max_clients, so a flood of one-off clients cannot grow the
+    table without bound. A dropped client simply starts with a full bucket.
+    """
+
+    def __init__(self, rate, burst, max_clients=100000):
+        self.rate = rate
+        self.burst = burst
+        self.max_clients = max_clients
+        self._buckets = OrderedDict()
+        self._lock = threading.Lock()
+
+    def acquire(self, client, now=None):
+        """Take one token; return 0 if allowed, else seconds until one is available"""
+        now = time.monotonic() if now is None else now
+        with self._lock:
+            bucket = self._buckets.get(client)
+            if bucket is None:
+                bucket = self._buckets[client] = TokenBucket(self.burst, now)
+                if len(self._buckets) > self.max_clients:
+                    self._buckets.popitem(last=False)
+            else:
+                self._buckets.move_to_end(client)
+                bucket.tokens = min(self.burst, bucket.tokens + (now - bucket.updated) * self.rate)
+                bucket.updated = now
+
+            if bucket.tokens >= 1:
+                bucket.tokens -= 1
+                return 0
+            return (1 - bucket.tokens) / self.rate
+
+    def __len__(self):
+        return len(self._buckets)
+
+
+class AdmissionController:
+    """Load shedding and per-route rate limits checked before a request is parsed
+
+    limits maps an endpoint name to (rate, burst); endpoints without an entry
+    are never throttled. max_in_flight caps the requests this worker handles
+    at once (0 disables shedding); past it, new requests are refused instead
+    of queueing behind the ones already running, which keeps latency bounded
+    for the requests that are admitted.
+    """
+
+    def __init__(self, limits=None, max_in_flight=0, shed_retry_after=1):
+        self.limiters = {endpoint: RateLimiter(rate, burst) for endpoint, (rate, burst) in (limits or {}).items()}
+        self.max_in_flight = max_in_flight
+        self.shed_retry_after = shed_retry_after
+        self.in_flight = 0
+        self._lock = threading.Lock()
+
+    @property
+    def enabled(self):
+        return bool(self.limiters) or self.max_in_flight > 0
+
+    def admit(self, endpoint, client):
+        """Return None to admit the request, or (status, retry_after seconds) to refuse it
+
+        An admitted request must be matched by a call to release().
+        """
+        limiter = self.limiters.get(endpoint)
+        if limiter is not None:
+            wait = limiter.acquire(client)
+            if wait:
+                return 429, max(1, math.ceil(wait))
+
+        with self._lock:
+            if self.max_in_flight and self.in_flight >= self.max_in_flight:
+                return 503, self.shed_retry_after
+            self.in_flight += 1
+        return None
+
+    def release(self):
+        with self._lock:
+            self.in_flight -= 1
+
+
+def parse_limits(spec):
+    """Parse 'chat=2:20,check_eligibility=1:10' into {endpoint: (rate, burst)}"""
+    limits = {}
+    for item in filter(None, (part.strip() for part in spec.split(','))):
+        endpoint, _, value = item.partition('=')
+        rate, _, burst = value.partition(':')
+        rate = float(rate)
+        if rate <= 0:
+            raise ValueError(f"Rate for {endpoint} must be positive")
+        limits[endpoint.strip()] = (rate, float(burst) if burst else max(1.0, rate))
+    return limits
@@ -0,0 +1,282 @@
+"""Replay a corpus of logged chat messages through the bot core
+
+Usage:
+    python replay.py corpus.ndjson -o report.json
+    python replay.py corpus.ndjson --kb admissions_data.json --against candidate.kbimg --fail-on-diff
+    python replay.py corpus.ndjson --against admissions_data.json:retrieval --workers 8
+
+Each corpus line is {"message": "...", "intent": "fees"} ("intent" is
+optional; a non-string intent counts as unlabelled) or a bare JSON string. Lines are read lazily and answered in
+chunks by a process pool, with a bounded number of chunks in flight, so a
+corpus of millions of messages runs in constant memory. Workers return
+counters, not per-message results.
+
+The report gives, for every variant: intent accuracy and the confusion
+between expected and predicted intents (over labelled messages), the
+unknown rate, and messages per second per core (messages over the time the
+workers spent answering). With --against, both variants answer every message
+and the messages whose intent or answer changed are counted, with examples.
+
+A variant is a knowledge base path, optionally followed by an engine:
+'keywords' (the default), 'retrieval' (BM25 ranking) or 'exact' (no typo
+correction), e.g. admissions_data.json:exact.
+"""
+import argparse
+import json
+import multiprocessing
+import os
+import sys
+import time
+from collections import Counter, deque
+
+from bot_core import AdmissionsBot
+
+ENGINES = {
+    'keywords': {},
+    'retrieval': {'retrieval': True},
+    'exact': {'spelling': False}
+}
+MAX_EXAMPLES = 20
+
+_bots = None
+
+
+def parse_variant(spec):
+    """Split 'path[:engine]' into (path, engine)"""
+    path, _, engine = spec.rpartition(':')
+    if path and engine in ENGINES:
+        return path, engine
+    return spec, 'keywords'
+
+
+def build_bot(variant):
+    path, engine = variant
+    # No response cache: every message measures the matcher, not a dict lookup
+    return AdmissionsBot(path, cache_size=0, **ENGINES[engine])
+
+
+def parse_line(line):
+    """Return (message, expected intent or None) for a corpus line, or None to skip it"""
+    line = line.strip()
+    if not line:
+        return None
+    try:
+        record = json.loads(line)
+    except ValueError:
+        return None
+    if isinstance(record, str):
+        return record, None
+    if isinstance(record, dict) and isinstance(record.get('message'), str):
+        # Only a string can name an intent; anything else is unlabelled
+        intent = record.get('intent')
+        return record['message'], intent if isinstance(intent, str) else None
+    return None
+
+
+def new_summary(variants):
+    return {
+        'messages': 0,
+        'skipped': 0,
+        'variants': [
+            {'seconds': 0.0, 'labelled': 0, 'correct': 0, 'predicted': Counter(), 'confusion': Counter()}
+            for _ in variants
+        ],
+        'intent_changed': 0,
+        'answer_changed': 0,
+        'transitions': Counter(),
+        'examples': []
+    }
+
+
+def replay_chunk(bots, lines):
+    """Answer one chunk of corpus lines with every bot and count the outcomes"""
+    records = []
+    summary = new_summary(bots)
+    for line in lines:
+        record = parse_line(line)
+        if record is None:
+            summary['skipped'] += 1
+        else:
+            records.append(record)
+    summary['messages'] = len(records)
+
+    answers = []
+    for bot, stats in zip(bots, summary['variants']):
+        started = time.perf_counter()
+        results = [bot.respond(message) for message, _ in records]
+        stats['seconds'] = time.perf_counter() - started
+        answers.append(results)
+        for (message, expected), (intent, _) in zip(records, results):
+            stats['predicted'][intent] += 1
+            if expected is not None:
+                stats['labelled'] += 1
+                stats['correct'] += intent == expected
+                stats['confusion'][(expected, intent)] += 1
+
+    if len(bots) == 2:
+        for (message, _), before, after in zip(records, answers[0], answers[1]):
+            if before == after:
+                continue
+            if before[0] != after[0]:
+                summary['intent_changed'] += 1
+                summary['transitions'][(before[0], after[0])] += 1
+            else:
+                summary['answer_changed'] += 1
+            if len(summary['examples']) < MAX_EXAMPLES:
+                summary['examples'].append({'message': message, 'before': before[0], 'after': after[0],
+                                            'answer_changed': before[1] != after[1]})
+    return summary
+
+
+def merge(total, summary):
+    total['messages'] += summary['messages']
+    total['skipped'] += summary['skipped']
+    for stats, part in zip(total['variants'], summary['variants']):
+        stats['seconds'] += part['seconds']
+        stats['labelled'] += part['labelled']
+        stats['correct'] += part['correct']
+        stats['predicted'].update(part['predicted'])
+        stats['confusion'].update(part['confusion'])
+    total['intent_changed'] += summary['intent_changed']
+    total['answer_changed'] += summary['answer_changed']
+    total['transitions'].update(summary['transitions'])
+    total['examples'].extend(summary['examples'][:MAX_EXAMPLES - len(total['examples'])])
+
+
+def _init_worker(variants):
+    global _bots
+    _bots = [build_bot(variant) for variant in variants]
+
+
+def _replay_worker(lines):
+    return replay_chunk(_bots, lines)
+
+
+def chunked(lines, size):
+    chunk = []
+    for line in lines:
+        chunk.append(line)
+        if len(chunk) >= size:
+            yield chunk
+            chunk = []
+    if chunk:
+        yield chunk
+
+
+def replay(lines, variants, workers=None, chunk_size=2000):
+    """Replay corpus lines against one or two variants; return the report dict
+
+    workers=0 answers in this process (handy for profiling).
+    """
+    if workers is None:
+        workers = os.cpu_count() or 1
+    total = new_summary(variants)
+    started = time.perf_counter()
+    if workers == 0:
+        bots = [build_bot(variant) for variant in variants]
+        for chunk in chunked(lines, chunk_size):
+            merge(total, replay_chunk(bots, chunk))
+    else:
+        with multiprocessing.Pool(workers, _init_worker, (variants,)) as pool:
+            # Pool.imap would read the whole corpus ahead; keep a few chunks per worker in flight
+            pending = deque()
+            for chunk in chunked(lines, chunk_size):
+                pending.append(pool.apply_async(_replay_worker, (chunk,)))
+                if len(pending) >= workers * 2:
+                    merge(total, pending.popleft().get())
+            while pending:
+                merge(total, pending.popleft().get())
+    return report(total, variants, workers, time.perf_counter() - started)
+
+
+def report(total, variants, workers, elapsed):
+    results = {
+        'messages': total['messages'],
+        'skipped': total['skipped'],
+        'workers': workers,
+        'seconds': round(elapsed, 3),
+        'messages_per_second': round(total['messages'] / elapsed, 1) if elapsed else None,
+        'variants': []
+    }
+    for (path, engine), stats in zip(variants, total['variants']):
+        confusion = {}
+        for (expected, predicted), count in sorted(stats['confusion'].items()):
+            confusion.setdefault(expected, {})[predicted] = count
+        messages = total['messages']
+        results['variants'].append({
+            'knowledge_base': path,
+            'engine': engine,
+            'labelled': stats['labelled'],
+            'accuracy': round(stats['correct'] / stats['labelled'], 4) if stats['labelled'] else None,
+            'unknown_rate': round(stats['predicted']['unknown'] / messages, 4) if messages else None,
+            'intents': dict(stats['predicted'].most_common()),
+            'confusion': confusion,
+            'messages_per_second_per_core': round(messages / stats['seconds'], 1) if stats['seconds'] else None
+        })
+    if len(variants) == 2:
+        results['diff'] = {
+            'intent_changed': total['intent_changed'],
+            'answer_changed': total['answer_changed'],
+            'transitions': {f'{before} -> {after}': count for (before, after), count in total['transitions'].most_common()},
+            'examples': total['examples']
+        }
+    return results
+
+
+def print_summary(results, file=sys.stderr):
+    print(f"{results['messages']} messages ({results['skipped']} skipped) in {results['seconds']}s "
+          f"on {results['workers'] or 1} process(es)", file=file)
+    for variant in results['variants']:
+        accuracy = 'n/a' if variant['accuracy'] is None else f"{variant['accuracy']:.2%}"
+        unknown = 'n/a' if variant['unknown_rate'] is None else f"{variant['unknown_rate']:.2%}"
+        print(f"{variant['knowledge_base']} [{variant['engine']}]: accuracy {accuracy} "
+              f"over {variant['labelled']} labelled, unknown {unknown}, "
+              f"{variant['messages_per_second_per_core']} msg/s/core", file=file)
+    diff = results.get('diff')
+    if diff is not None:
+        print(f"changed: {diff['intent_changed']} intents, {diff['answer_changed']} answers only", file=file)
+        for transition, count in list(diff['transitions'].items())[:10]:
+            print(f"  {transition}: {count}", file=file)
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description='Replay logged chat messages through the bot.')
+    parser.add_argument('corpus', help="NDJSON file of messages, or '-' for stdin")
+    parser.add_argument('--kb', default='admissions_data.json', help='variant to measure: path[:engine]')
+    parser.add_argument('--against', help='second variant to diff against --kb: path[:engine]')
+    parser.add_argument('--workers', type=int, help='worker processes (default: one per core; 0 runs in-process)')
+    parser.add_argument('--chunk-size', type=int, default=2000, help='messages per task sent to a worker')
+    parser.add_argument('--fail-on-diff', action='store_true',
+                        help='exit with status 1 if any intent or answer changed between the variants')
+    parser.add_argument('-o', '--output', help='write the JSON report here (default: stdout)')
+    args = parser.parse_args(argv)
+
+    variants = [parse_variant(args.kb)]
+    if args.against:
+        variants.append(parse_variant(args.against))
+    for path, _ in variants:
+        if not os.path.isfile(path):
+            parser.error(f"knowledge base not found: {path}")
+
+    source = sys.stdin if args.corpus == '-' else open(args.corpus, encoding='utf-8')
+    try:
+        results = replay(source, variants, args.workers, args.chunk_size)
+    finally:
+        if source is not sys.stdin:
+            source.close()
+
+    print_summary(results)
+    text = json.dumps(results, indent=2, ensure_ascii=False)
+    if args.output:
+        with open(args.output, 'w') as file:
+            file.write(text + '\n')
+    else:
+        print(text)
+    diff = results.get('diff')
+    if args.fail_on_diff and diff and (diff['intent_changed'] or diff['answer_changed']):
+        return 1
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,149 @@
+"""Rule table mapping each intent to its answer in the knowledge base"""
+
+UNKNOWN_RESPONSE = "I'm not sure I understand. Could you please rephrase your question? You can ask me about admissions, documents, deadlines, eligibility, courses, or fees."
+
+# Answer parts are literal strings or paths under data['admissions']. Rules are
+# tried in order; the first whose trigger words appear in the message wins.
+RESPONSE_RULES = {
+    'greetings': {
+        'default': ["Hello! I'm the University Admissions Bot. How can I assist you with your admission questions today?"]
+    },
+    'apply': {
+        'default': [('general', 'apply')]
+    },
+    'documents': {
+        'rules': [
+            (('transcript',), [('documents', 'transcripts')]),
+            (('recommendation',), [('documents', 'recommendation')])
+        ],
+        'default': [('documents', 'required')]
+    },
+    'deadline': {
+        'default': [('general', 'deadlines')]
+    },
+    'eligibility': {
+        'rules': [
+            (('international',), [('eligibility', 'international')]),
+            (('graduate', 'master'), [('eligibility', 'graduate')])
+        ],
+        'default': [('eligibility', 'undergraduate')]
+    },
+    'courses': {
+        'rules': [
+            (('engineering',), [('courses', 'engineering')]),
+            (('graduate', 'master'), [('courses', 'graduate')])
+        ],
+        'default': [('courses', 'undergraduate')]
+    },
+    'fees': {
+        'rules': [
+            (('aid', 'scholarship'), [('fees', 'financial_aid')]),
+            (('application',), [('fees', 'application')])
+        ],
+        'default': [('fees', 'tuition')]
+    },
+    'international': {
+        'default': [
+            ('eligibility', 'international'),
+            "Additional requirements: Valid passport, student visa, financial documentation, and evaluated transcripts."
+        ]
+    },
+    'thanks': {
+        'default': ["You're welcome! Is there anything else I can help you with?"]
+    },
+    'exit': {
+        'default': ["Thank you for using the University Admissions Bot. Good luck with your application! 🎓"]
+    }
+}
+
+
+class ResponseTable:
+    """Intent -> answer lookup compiled from RESPONSE_RULES and the answer tree
+
+    Every answer is resolved to a tuple of text parts at compile time, so a
+    lookup is a few substring tests and never walks the nested data. Rules
+    whose answers are missing from the knowledge base are dropped; an intent
+    whose default answer is missing falls back to the unknown response.
+    Each answer carries a topic, the key of its first answer path (e.g.
+    'transcripts' for documents), which dialogue state remembers.
+    """
+
+    def __init__(self, admissions, rules=RESPONSE_RULES):
+        self.unknown = (UNKNOWN_RESPONSE,)
+        self.intents = {}
+        for intent, spec in rules.items():
+            compiled = []
+            for triggers, parts in spec.get('rules', ()):
+                resolved = self._resolve(admissions, parts)
+                if resolved is not None:
+                    compiled.append((tuple(triggers), resolved, _topic(intent, parts)))
+            default = self._resolve(admissions, spec['default'])
+            if default is None:
+                default = (self.unknown, None)
+            else:
+                default = (default, _topic(intent, spec['default']))
+            self.intents[intent] = (tuple(compiled), default)
+
+    @staticmethod
+    def _resolve(admissions, parts):
+        resolved = []
+        for part in parts:
+            if isinstance(part, str):
+                resolved.append(part)
+                continue
+            node = admissions
+            for key in part:
+                if not isinstance(node, dict) or key not in node:
+                    return None
+                node = node[key]
+            if not isinstance(node, str):
+                return None
+            resolved.append(node)
+        return tuple(resolved)
+
+    def choose(self, intent, text, topic=None, level=None):
+        """Return (topic, parts) for intent
+
+        The answer for level (a study level named in the message) wins, so
+        "undergraduate" is not taken for the 'graduate' trigger it contains.
+        Then a rule whose trigger appears in text wins. Otherwise the rule
+        for topic (the previous turn's topic on a follow-up) is reused, then
+        the intent's default.
+        """
+        entry = self.intents.get(intent)
+        if entry is None:
+            return None, self.unknown
+        rules, default = entry
+        if level is not None:
+            for _, parts, rule_topic in rules:
+                if rule_topic == level:
+                    return rule_topic, parts
+            if default[1] == level:
+                return default[1], default[0]
+        for triggers, parts, rule_topic in rules:
+            for trigger in triggers:
+                if trigger in text:
+                    return rule_topic, parts
+        if topic is not None:
+            for _, parts, rule_topic in rules:
+                if rule_topic == topic:
+                    return rule_topic, parts
+        return default[1], default[0]
+
+    def export(self, intent):
+        """Return (rules, (default parts, default topic)) for intent with parts as text"""
+        return self.intents[intent]
+
+    def parts(self, intent, text, topic=None):
+        """Return the answer for intent as a tuple of text parts"""
+        return self.choose(intent, text, topic)[1]
+
+    def render(self, intent, text, topic=None):
+        return "\n\n".join(self.parts(intent, text, topic))
+
+
+def _topic(intent, parts):
+    for part in parts:
+        if not isinstance(part, str):
+            return part[-1]
+    return intent
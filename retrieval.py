@@ -0,0 +1,113 @@
+import math
+import re
+
+STOPWORDS = {
+    'a', 'about', 'an', 'and', 'any', 'are', 'at', 'be', 'can', 'do', 'does',
+    'for', 'from', 'get', 'have', 'how', 'i', 'in', 'is', 'it', 'me', 'much',
+    'my', 'need', 'of', 'on', 'or', 'that', 'the', 'there', 'this', 'to',
+    'what', 'when', 'where', 'which', 'who', 'will', 'with', 'you', 'your'
+}
+
+
+def tokenize(text):
+    """Lowercase, strip punctuation and reduce text to index terms"""
+    terms = []
+    for token in re.sub(r'[^\w\s]', ' ', text.lower()).split():
+        if token in STOPWORDS:
+            continue
+        if len(token) > 3 and token.endswith('s') and not token.endswith('ss'):
+            token = token[:-1]
+        terms.append(token)
+    return terms
+
+
+class AnswerIndex:
+    """BM25-weighted inverted index over every leaf answer in the knowledge base
+
+    Postings store precomputed BM25 weights, so scoring a message is one
+    tokenization followed by a sparse lookup per query term.
+    """
+
+    def __init__(self, admissions, intents=(), k1=1.5, b=0.75, path_boost=3):
+        self.k1 = k1
+        self.b = b
+        self.path_boost = path_boost
+        self.documents = []
+        self.postings = {}
+        self._collect(admissions, (), set(intents))
+        self._build()
+
+    def _collect(self, node, path, intents):
+        """Walk the nested answer tree and record one document per leaf"""
+        for key, value in node.items():
+            if isinstance(value, dict):
+                self._collect(value, path + (key,), intents)
+            elif isinstance(value, str):
+                leaf_path = path + (key,)
+                # Section and leaf names are the best summary of an answer
+                heading = ' '.join(leaf_path).replace('_', ' ')
+                self.documents.append({
+                    'path': leaf_path,
+                    'intent': self._intent_for(leaf_path, intents),
+                    'answer': value,
+                    'terms': tokenize(heading) * self.path_boost + tokenize(value)
+                })
+
+    def _intent_for(self, path, intents):
+        """Label a leaf with the keyword intent it answers"""
+        candidates = []
+        for key in reversed(path):
+            candidates.extend([key, key.rstrip('s')])
+        for candidate in candidates:
+            if candidate in intents:
+                return candidate
+        return path[0]
+
+    def _build(self):
+        """Compute BM25 weights for every (term, document) posting"""
+        if not self.documents:
+            return
+        average_length = sum(len(doc['terms']) for doc in self.documents) / len(self.documents)
+        frequencies = []
+        for doc in self.documents:
+            counts = {}
+            for term in doc['terms']:
+                counts[term] = counts.get(term, 0) + 1
+            frequencies.append(counts)
+            for term in counts:
+                self.postings.setdefault(term, [])
+
+        total = len(self.documents)
+        for doc_id, counts in enumerate(frequencies):
+            for term, count in counts.items():
+                self.postings[term].append((doc_id, count))
+
+        for term, postings in self.postings.items():
+            idf = math.log(1 + (total - len(postings) + 0.5) / (len(postings) + 0.5))
+            weighted = []
+            for doc_id, count in postings:
+                length_norm = 1 - self.b + self.b * len(self.documents[doc_id]['terms']) / average_length
+                weight = idf * count * (self.k1 + 1) / (count + self.k1 * length_norm)
+                weighted.append((doc_id, weight))
+            self.postings[term] = weighted
+
+        for doc in self.documents:
+            del doc['terms']
+
+    def search(self, text, top_k=3):
+        """Score text against every answer and return the top_k hits"""
+        scores = {}
+        for term in set(tokenize(text)):
+            for doc_id, weight in self.postings.get(term, ()):
+                scores[doc_id] = scores.get(doc_id, 0.0) + weight
+
+        ranked = sorted(scores.items(), key=lambda item: item[1], reverse=True)[:top_k]
+        return [
+            {
+                'path': '.'.join(self.documents[doc_id]['path']),
+                'intent': self.documents[doc_id]['intent'],
+                'answer': self.documents[doc_id]['answer'],
+                'score': round(score, 4)
+            }
+            for doc_id, score in ranked
+        ]
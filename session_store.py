@@ -0,0 +1,204 @@
+import os
+import sqlite3
+import threading
+import time
+from collections import deque
+
+
+class ConversationStore:
+    """Server-side conversation history keyed by session ID
+
+    Each session keeps at most max_messages entries and is dropped once it
+    has been idle for idle_timeout seconds. Entries are the same dicts the
+    web app used to keep in the cookie, e.g. {'user': text, 'timestamp': ...}.
+    Backends that touch disk set blocking = True so async servers know to
+    call them from a worker thread.
+    """
+
+    blocking = True
+
+    def __init__(self, max_messages=100, idle_timeout=1800, purge_interval=60):
+        self.max_messages = max_messages
+        self.idle_timeout = idle_timeout
+        self.purge_interval = purge_interval
+        self._last_purge = time.time()
+
+    def append(self, session_id, entry):
+        """Append one entry to the session's history"""
+        raise NotImplementedError
+
+    def history(self, session_id):
+        """Return the session's entries, oldest first"""
+        raise NotImplementedError
+
+    def clear(self, session_id):
+        """Forget everything stored for the session"""
+        raise NotImplementedError
+
+    def purge_expired(self):
+        """Drop sessions idle for longer than idle_timeout; return how many"""
+        raise NotImplementedError
+
+    def stats(self):
+        raise NotImplementedError
+
+    def _maybe_purge(self, now):
+        if now - self._last_purge >= self.purge_interval:
+            self._last_purge = now
+            self.purge_expired()
+
+
+class MemoryConversationStore(ConversationStore):
+    """In-process store; history is lost when the worker exits"""
+
+    blocking = False
+
+    def __init__(self, max_messages=100, idle_timeout=1800, purge_interval=60):
+        super().__init__(max_messages, idle_timeout, purge_interval)
+        self._sessions = {}
+        self._lock = threading.Lock()
+
+    def append(self, session_id, entry):
+        now = time.time()
+        with self._lock:
+            record = self._sessions.get(session_id)
+            if record is None:
+                record = [deque(maxlen=self.max_messages), now]
+                self._sessions[session_id] = record
+            record[0].append(entry)
+            record[1] = now
+        self._maybe_purge(now)
+
+    def history(self, session_id):
+        with self._lock:
+            record = self._sessions.get(session_id)
+            if record is None or time.time() - record[1] > self.idle_timeout:
+                return []
+            return list(record[0])
+
+    def clear(self, session_id):
+        with self._lock:
+            self._sessions.pop(session_id, None)
+
+    def purge_expired(self):
+        cutoff = time.time() - self.idle_timeout
+        with self._lock:
+            expired = [sid for sid, record in self._sessions.items() if record[1] < cutoff]
+            for session_id in expired:
+                del self._sessions[session_id]
+        return len(expired)
+
+    def stats(self):
+        with self._lock:
+            return {
+                'backend': 'memory',
+                'sessions': len(self._sessions),
+                'messages': sum(len(record[0]) for record in self._sessions.values())
+            }
+
+
+class SQLiteConversationStore(ConversationStore):
+    """SQLite-backed store shared by every worker process on the host
+
+    A turn is a single INSERT; older messages beyond max_messages are trimmed
+    with an indexed DELETE instead of rewriting the transcript.
+    """
+
+    def __init__(self, path, max_messages=100, idle_timeout=1800, purge_interval=60):
+        super().__init__(max_messages, idle_timeout, purge_interval)
+        self.path = path
+        self._local = threading.local()
+        with self._connect() as connection:
+            connection.executescript("""
+                CREATE TABLE IF NOT EXISTS sessions (
+                    session_id TEXT PRIMARY KEY,
+                    last_seen REAL NOT NULL
+                );
+                CREATE TABLE IF NOT EXISTS messages (
+                    id INTEGER PRIMARY KEY AUTOINCREMENT,
+                    session_id TEXT NOT NULL,
+                    role TEXT NOT NULL,
+                    text TEXT NOT NULL,
+                    timestamp TEXT
+                );
+                CREATE INDEX IF NOT EXISTS messages_by_session ON messages (session_id, id);
+                CREATE INDEX IF NOT EXISTS sessions_by_last_seen ON sessions (last_seen);
+            """)
+
+    def _connect(self):
+        """Return this thread's connection, opening it on first use"""
+        connection = getattr(self._local, 'connection', None)
+        if connection is None:
+            connection = sqlite3.connect(self.path, timeout=10)
+            connection.execute('PRAGMA journal_mode=WAL')
+            connection.execute('PRAGMA synchronous=NORMAL')
+            self._local.connection = connection
+        return connection
+
+    def append(self, session_id, entry):
+        now = time.time()
+        role = 'user' if 'user' in entry else 'bot'
+        with self._connect() as connection:
+            connection.execute(
+                'INSERT INTO messages (session_id, role, text, timestamp) VALUES (?, ?, ?, ?)',
+                (session_id, role, entry[role], entry.get('timestamp'))
+            )
+            connection.execute(
+                'INSERT INTO sessions (session_id, last_seen) VALUES (?, ?) '
+                'ON CONFLICT(session_id) DO UPDATE SET last_seen = excluded.last_seen',
+                (session_id, now)
+            )
+            connection.execute(
+                'DELETE FROM messages WHERE session_id = ? AND id <= ('
+                'SELECT id FROM messages WHERE session_id = ? ORDER BY id DESC LIMIT 1 OFFSET ?)',
+                (session_id, session_id, self.max_messages)
+            )
+        self._maybe_purge(now)
+
+    def history(self, session_id):
+        connection = self._connect()
+        row = connection.execute(
+            'SELECT last_seen FROM sessions WHERE session_id = ?', (session_id,)
+        ).fetchone()
+        if row is None or time.time() - row[0] > self.idle_timeout:
+            return []
+        rows = connection.execute(
+            'SELECT role, text, timestamp FROM messages WHERE session_id = ? ORDER BY id',
+            (session_id,)
+        ).fetchall()
+        return [{role: text, 'timestamp': timestamp} for role, text, timestamp in rows]
+
+    def clear(self, session_id):
+        with self._connect() as connection:
+            connection.execute('DELETE FROM messages WHERE session_id = ?', (session_id,))
+            connection.execute('DELETE FROM sessions WHERE session_id = ?', (session_id,))
+
+    def purge_expired(self):
+        cutoff = time.time() - self.idle_timeout
+        with self._connect() as connection:
+            connection.execute(
+                'DELETE FROM messages WHERE session_id IN '
+                '(SELECT session_id FROM sessions WHERE last_seen < ?)', (cutoff,)
+            )
+            return connection.execute('DELETE FROM sessions WHERE last_seen < ?', (cutoff,)).rowcount
+
+    def stats(self):
+        connection = self._connect()
+        return {
+            'backend': 'sqlite',
+            'sessions': connection.execute('SELECT COUNT(*) FROM sessions').fetchone()[0],
+            'messages': connection.execute('SELECT COUNT(*) FROM messages').fetchone()[0]
+        }
+
+
+def create_conversation_store(backend='memory', **options):
+    """Build a store from a backend name: 'memory' or 'sqlite:///path/to/file.db'"""
+    if backend == 'memory':
+        return MemoryConversationStore(**options)
+    if backend.startswith('sqlite:///'):
+        path = backend[len('sqlite:///'):]
+        directory = os.path.dirname(path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        return SQLiteConversationStore(path, **options)
+    raise ValueError(f"Unknown conversation store backend: {backend}")
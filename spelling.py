@@ -0,0 +1,132 @@
+class SpellingCorrector:
+    """SymSpell-style deletion index over the keyword vocabulary
+
+    Every vocabulary word is indexed under each string reachable from it by
+    deleting up to max_distance characters. A misspelt token meets its
+    intended word at a shared deletion, so a lookup generates the token's own
+    deletions and verifies the few candidates found instead of comparing
+    against every keyword. Cost depends on the token's length, not on the
+    vocabulary size. Recent lookups are memoized, since the same misspelling
+    tends to come back.
+    """
+
+    def __init__(self, vocabulary, max_distance=2, min_length=4, long_length=8, memo_size=4096):
+        self.max_distance = max_distance
+        self.min_length = min_length
+        self.long_length = long_length
+        self.memo_size = memo_size
+        self.words = {}
+        self._deletes = {}
+        self._memo = {}
+        for word in vocabulary:
+            # One edit away from a short keyword is usually another real word
+            # ("most" / "cost", "data" / "date"), so those are never targets
+            if len(word) <= min_length or word in self.words:
+                continue
+            self.words[word] = len(self.words)
+            for deletion in _deletions(word, max_distance):
+                self._deletes.setdefault(deletion, []).append(word)
+
+    @classmethod
+    def from_keywords(cls, keywords, **options):
+        """Build the vocabulary from the words of every intent keyword"""
+        return cls((word for phrases in keywords.values() for phrase in phrases for word in phrase.split()),
+                   **options)
+
+    def allowed_distance(self, token):
+        """Edits tolerated for a token: none if short, one, or two if long"""
+        if len(token) < self.min_length:
+            return 0
+        if len(token) < self.long_length:
+            return min(1, self.max_distance)
+        return self.max_distance
+
+    def correct(self, token):
+        """Return the closest vocabulary word within the allowed distance, or None"""
+        if token in self.words:
+            return token
+        distance = self.allowed_distance(token)
+        if not distance:
+            return None
+        if token in self._memo:
+            return self._memo[token]
+
+        candidates = set()
+        for deletion in _deletions(token, distance):
+            candidates.update(self._deletes.get(deletion, ()))
+
+        best = None
+        for word in candidates:
+            if abs(len(word) - len(token)) > distance:
+                continue
+            edits = edit_distance(token, word, distance)
+            if edits <= distance:
+                rank = (edits, self.words[word])
+                if best is None or rank < best[0]:
+                    best = (rank, word)
+        corrected = best[1] if best else None
+        if len(self._memo) >= self.memo_size:
+            self._memo.clear()
+        self._memo[token] = corrected
+        return corrected
+
+    def correct_text(self, text):
+        """Return text with misspelt tokens replaced, or None if nothing changed"""
+        tokens = text.split()
+        changed = False
+        for position, token in enumerate(tokens):
+            corrected = self.correct(token)
+            if corrected is not None and corrected != token:
+                tokens[position] = corrected
+                changed = True
+        return ' '.join(tokens) if changed else None
+
+
+def _deletions(word, distance):
+    """Return word plus every string made by deleting up to distance characters"""
+    found = {word}
+    frontier = {word}
+    for _ in range(distance):
+        frontier = {text[:index] + text[index + 1:] for text in frontier for index in range(len(text))}
+        found |= frontier
+    return found
+
+
+def edit_distance(source, target, limit):
+    """Optimal string alignment distance, or limit + 1 once it exceeds limit"""
+    # A shared prefix or suffix never needs an edit; strip it before the DP
+    start = 0
+    end_source, end_target = len(source), len(target)
+    while start < end_source and start < end_target and source[start] == target[start]:
+        start += 1
+    while end_source > start and end_target > start and source[end_source - 1] == target[end_target - 1]:
+        end_source -= 1
+        end_target -= 1
+    source = source[start:end_source]
+    target = target[start:end_target]
+    if abs(len(source) - len(target)) > limit:
+        return limit + 1
+    if not source or not target:
+        return max(len(source), len(target))
+
+    previous_row = None
+    row = list(range(len(target) + 1))
+    for i in range(1, len(source) + 1):
+        before, previous_row, row = previous_row, row, [i] + [0] * len(target)
+        char = source[i - 1]
+        lowest = i
+        for j in range(1, len(target) + 1):
+            best = previous_row[j - 1] + (char != target[j - 1])
+            if previous_row[j] + 1 < best:
+                best = previous_row[j] + 1
+            if row[j - 1] + 1 < best:
+                best = row[j - 1] + 1
+            if (i > 1 and j > 1 and char == target[j - 2] and source[i - 2] == target[j - 1]
+                    and before[j - 2] + 1 < best):
+                best = before[j - 2] + 1
+            row[j] = best
+            if best < lowest:
+                lowest = best
+        if lowest > limit:
+            return limit + 1
+    return row[-1]
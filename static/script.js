@@ -1,3 +1,14 @@
+// Prefix for API calls when the page is served under a tenant path (/mit/)
+const API_ROOT = document.body.dataset.apiRoot || '';
+
+// FAQ bundle from /faq: common questions are answered here without a request
+let faq = null;
+// Study level the server remembers for this conversation, mirrored here from
+// every answer it sends (its typo correction and Unicode handling are not repeated here)
+let faqLevel = null;
+// Last turn answered locally, reported with the next request so follow-ups resolve
+let localTurn = null;
+
 // Chat functionality
 document.addEventListener('DOMContentLoaded', function() {
     const userInput = document.getElementById('userInput');
@@ -7,6 +18,8 @@ document.addEventListener('DOMContentLoaded', function() {
     const checkEligibilityBtn = document.getElementById('checkEligibilityBtn');
     const eligibilityForm = document.getElementById('eligibilityForm');
     
+    loadFaq();
+    
     // Send message on button click
     sendBtn.addEventListener('click', sendMessage);
     
@@ -45,16 +58,96 @@ function sendMessage() {
     userInput.value = '';
     userInput.style.height = 'auto';
     
+    const answer = answerLocally(message);
+    if (answer !== null) {
+        addMessage(answer, 'bot');
+        return;
+    }
+    const context = localTurn;
+    localTurn = null;
+    
     // Show typing indicator
     showTypingIndicator();
     
-    // Send to backend
-    fetch('/chat', {
+    // Stream the answer; fall back to the JSON endpoint if streaming fails
+    streamMessage(message, context).catch(error => {
+        console.error('Streaming failed:', error);
+        if (document.getElementById('typingIndicator')) {
+            // Nothing rendered yet, so the JSON endpoint can answer instead
+            fetchMessage(message, context);
+        } else {
+            addMessage('Sorry, I encountered an error. Please try again.', 'bot');
+        }
+    });
+}
+
+function loadFaq() {
+    // The browser revalidates the bundle by ETag, so this is usually a 304
+    fetch(API_ROOT + '/faq')
+    .then(response => response.ok ? response.json() : null)
+    .then(bundle => {
+        faq = bundle && bundle.format === 'admissions-faq/1' ? bundle : null;
+    })
+    .catch(() => { faq = null; });
+}
+
+function detectLevel(text) {
+    for (const word of text.split(/\s+/)) {
+        if (faq.graduate_words.includes(word)) return 'graduate';
+        for (const [level, prefixes] of faq.level_words) {
+            if (prefixes.some(prefix => word.startsWith(prefix))) return level;
+        }
+    }
+    return null;
+}
+
+// Same as the bot: the first intent in declaration order with a keyword in the text
+function matchIntent(text) {
+    for (const [intent, keywords] of faq.keywords) {
+        if (keywords.some(keyword => text.includes(keyword))) return intent;
+    }
+    return null;
+}
+
+// Return the bot's answer from the FAQ bundle, or null to ask the server
+function answerLocally(message) {
+    // Only plain ASCII is sure to be preprocessed here exactly as on the server
+    if (!faq || !/^[\x20-\x7e]*$/.test(message)) return null;
+    const lowered = message.toLowerCase();
+    if (faq.form_phrases.some(phrase => lowered.includes(phrase))) return null;
+    
+    let text = lowered.trim().replace(/[^\w\s]/g, '');
+    const level = detectLevel(text);
+    if (level) faqLevel = level;
+    const intent = matchIntent(text);
+    const answers = faq.answers[intent];
+    if (!answers) return null;
+    
+    if (!level && faqLevel === 'graduate') text += ' graduate';
+    let [parts, topic] = answers.default;
+    // As on the server, a level named in the message beats the triggers ("undergraduate" contains "graduate")
+    const levelRule = level ? answers.rules.find(([, , ruleTopic]) => ruleTopic === level) : undefined;
+    if (levelRule) {
+        [parts, topic] = [levelRule[1], levelRule[2]];
+    } else if (!level || topic !== level) {
+        for (const [triggers, ruleParts, ruleTopic] of answers.rules) {
+            if (triggers.some(trigger => text.includes(trigger))) {
+                [parts, topic] = [ruleParts, ruleTopic];
+                break;
+            }
+        }
+    }
+    localTurn = [intent, topic, faqLevel];
+    return parts.join('\n\n');
+}
+
+function fetchMessage(message, context) {
+    fetch(API_ROOT + '/chat', {
         method: 'POST',
         headers: {
             'Content-Type': 'application/json',
         },
-        body: JSON.stringify({ message: message })
+        body: JSON.stringify({ message: message, context: context })
     })
     .then(response => response.json())
     .then(data => {
@@ -63,6 +156,7 @@ function sendMessage() {
         
         // Add bot response
         addMessage(data.response, 'bot');
+        faqLevel = data.level;
         
         // Show eligibility form if needed
         if (data.show_eligibility_form) {
@@ -76,6 +170,76 @@ function sendMessage() {
     });
 }
 
+async function streamMessage(message, context) {
+    const response = await fetch(API_ROOT + '/chat/stream', {
+        method: 'POST',
+        headers: {
+            'Content-Type': 'application/json',
+            'Accept': 'text/event-stream'
+        },
+        body: JSON.stringify({ message: message, context: context })
+    });
+    if (!response.ok || !response.body) {
+        throw new Error(`Streaming unavailable (${response.status})`);
+    }
+    
+    const reader = response.body.getReader();
+    const decoder = new TextDecoder();
+    let buffer = '';
+    let messageContent = null;
+    let showForm = false;
+    
+    // Render each event as soon as it arrives
+    const handleEvent = (event, data) => {
+        if (event === 'intent') {
+            removeTypingIndicator();
+            messageContent = addMessage('', 'bot');
+            messageContent.innerHTML = '';
+            showForm = data.show_eligibility_form;
+            faqLevel = data.level;
+        } else if (event === 'part') {
+            appendMessagePart(messageContent, data.text);
+        } else if (event === 'done' && showForm) {
+            showEligibilityForm();
+        }
+    };
+    
+    while (true) {
+        const { value, done } = await reader.read();
+        if (done) break;
+        buffer += decoder.decode(value, { stream: true });
+        
+        // Events are separated by a blank line
+        let boundary;
+        while ((boundary = buffer.indexOf('\n\n')) !== -1) {
+            const frame = buffer.slice(0, boundary);
+            buffer = buffer.slice(boundary + 2);
+            let event = 'message';
+            let data = '';
+            for (const line of frame.split('\n')) {
+                if (line.startsWith('event: ')) event = line.slice(7);
+                else if (line.startsWith('data: ')) data += line.slice(6);
+            }
+            handleEvent(event, data ? JSON.parse(data) : {});
+        }
+    }
+}
+
+function formatContent(content) {
+    // Convert newlines to <br> and URLs to links
+    content = content.replace(/\n/g, '<br>');
+    return content.replace(/(https?:\/\/[^\s]+)/g, '<a href="$1" target="_blank">$1</a>');
+}
+
+function appendMessagePart(messageContent, text) {
+    const paragraph = document.createElement('p');
+    paragraph.innerHTML = formatContent(text);
+    messageContent.appendChild(paragraph);
+    
+    const chatContainer = document.getElementById('chatContainer');
+    chatContainer.scrollTop = chatContainer.scrollHeight;
+}
+
 function addMessage(content, sender) {
     const chatContainer = document.getElementById('chatContainer');
     const messageDiv = document.createElement('div');
@@ -93,11 +257,7 @@ function addMessage(content, sender) {
     const messageContent = document.createElement('div');
     messageContent.className = 'message-content';
     
-    // Convert newlines to <br> and URLs to links
-    content = content.replace(/\n/g, '<br>');
-    content = content.replace(/(https?:\/\/[^\s]+)/g, '<a href="$1" target="_blank">$1</a>');
-    
-    messageContent.innerHTML = `<p>${content}</p>`;
+    messageContent.innerHTML = `<p>${formatContent(content)}</p>`;
     
     messageDiv.appendChild(avatar);
     messageDiv.appendChild(messageContent);
@@ -106,6 +266,8 @@ function addMessage(content, sender) {
     
     // Scroll to bottom
     chatContainer.scrollTop = chatContainer.scrollHeight;
+    
+    return messageContent;
 }
 
 function showTypingIndicator() {
@@ -171,7 +333,7 @@ function checkEligibility() {
     const resultDiv = document.getElementById('eligibilityResult');
     resultDiv.innerHTML = '<div class="loading"><span></span><span></span><span></span></div>';
     
-    fetch('/check-eligibility', {
+    fetch(API_ROOT + '/check-eligibility', {
         method: 'POST',
         headers: {
             'Content-Type': 'application/json',
@@ -203,7 +365,7 @@ function checkEligibility() {
 }
 
 function resetConversation() {
-    fetch('/reset', {
+    fetch(API_ROOT + '/reset', {
         method: 'POST',
         headers: {
             'Content-Type': 'application/json',
@@ -226,6 +388,8 @@ function resetConversation() {
         
         // Hide eligibility form
         hideEligibilityForm();
+        faqLevel = null;
+        localTurn = null;
     })
     .catch(error => console.error('Error:', error));
 }
@@ -0,0 +1,170 @@
+"""Serve several universities' knowledge bases from one process
+
+Each tenant is a knowledge base file in a directory, named after the tenant:
+mit.json, mit.snapshot or mit.kbimg (the first one found, in that order of
+preference: .kbimg, .snapshot, .json). A tenant's bot (compiled knowledge
+base, eligibility programs and response cache) is built on first use and
+shared by every request for that tenant. When the estimated footprint of
+the loaded tenants exceeds the memory budget, the least recently used ones
+are dropped and reloaded on their next request.
+"""
+import mmap
+import os
+import re
+import sys
+import threading
+import types
+from collections import OrderedDict
+
+import numpy as np
+
+TENANT_PATTERN = re.compile(r'^[a-z0-9][a-z0-9_-]{0,62}$')
+EXTENSIONS = ('.kbimg', '.snapshot', '.json')
+
+
+class UnknownTenant(KeyError):
+    """No knowledge base is configured for the requested tenant"""
+
+
+def deep_sizeof(root):
+    """Estimate the bytes held privately by an object graph
+
+    Objects reachable through several references are counted once. Memory
+    a process shares with others (mmap-backed buffers and the NumPy arrays
+    viewing them) is not counted.
+    """
+    seen = set()
+    total = 0
+    stack = [root]
+    while stack:
+        obj = stack.pop()
+        if id(obj) in seen:
+            continue
+        seen.add(id(obj))
+        if isinstance(obj, (memoryview, mmap.mmap, type, types.ModuleType)):
+            continue
+        if isinstance(obj, np.ndarray):
+            total += obj.nbytes if obj.base is None else 0
+            continue
+        total += sys.getsizeof(obj)
+        if isinstance(obj, dict):
+            stack.extend(obj.keys())
+            stack.extend(obj.values())
+        elif isinstance(obj, (list, tuple, set, frozenset)):
+            stack.extend(obj)
+        else:
+            if hasattr(obj, '__dict__'):
+                stack.append(obj.__dict__)
+            for slot in getattr(type(obj), '__slots__', ()):
+                if hasattr(obj, slot):
+                    stack.append(getattr(obj, slot))
+    return total
+
+
+class TenantRegistry:
+    """Lazily loaded, LRU-evicted bots keyed by tenant name"""
+
+    def __init__(self, directory, bot_factory, memory_budget=512 * 1024 * 1024, max_tenants=None,
+                 size_of=None):
+        self.directory = directory
+        self.bot_factory = bot_factory
+        self.memory_budget = memory_budget
+        self.max_tenants = max_tenants
+        self.size_of = size_of or (lambda bot: deep_sizeof(bot.knowledge.current))
+        self._bots = OrderedDict()
+        self._sizes = {}
+        self._loading = {}
+        self._lock = threading.Lock()
+        self.loads = 0
+        self.evictions = 0
+
+    def path_for(self, tenant):
+        """Return the knowledge base file for tenant, or raise UnknownTenant"""
+        if not tenant or not TENANT_PATTERN.match(tenant):
+            raise UnknownTenant(tenant)
+        for extension in EXTENSIONS:
+            path = os.path.join(self.directory, tenant + extension)
+            if os.path.isfile(path):
+                return path
+        raise UnknownTenant(tenant)
+
+    def get(self, tenant):
+        """Return the tenant's bot, loading it on first use"""
+        with self._lock:
+            bot = self._bots.get(tenant)
+            if bot is not None:
+                self._bots.move_to_end(tenant)
+                return bot
+            loading = self._loading.setdefault(tenant, threading.Lock())
+
+        # One thread loads a tenant; others asking for it wait for that load
+        with loading:
+            with self._lock:
+                bot = self._bots.get(tenant)
+                if bot is not None:
+                    self._bots.move_to_end(tenant)
+                    return bot
+            try:
+                bot = self.bot_factory(self.path_for(tenant))
+                size = self.size_of(bot)
+            except BaseException:
+                with self._lock:
+                    self._loading.pop(tenant, None)
+                raise
+            # Publish and retire the load lock together, so no request sees neither
+            with self._lock:
+                self._bots[tenant] = bot
+                self._sizes[tenant] = size
+                self._loading.pop(tenant, None)
+                self.loads += 1
+                self._evict()
+        return bot
+
+    def _evict(self):
+        """Drop least recently used tenants until within budget (keeps the newest)"""
+        while len(self._bots) > 1 and (
+                sum(self._sizes.values()) > self.memory_budget
+                or (self.max_tenants and len(self._bots) > self.max_tenants)):
+            tenant, bot = self._bots.popitem(last=False)
+            del self._sizes[tenant]
+            bot.knowledge.stop_watching()
+            self.evictions += 1
+
+    def loaded(self):
+        with self._lock:
+            return list(self._bots)
+
+    def stats(self):
+        with self._lock:
+            return {
+                'tenants': len(self._bots),
+                'bytes': sum(self._sizes.values()),
+                'memory_budget': self.memory_budget,
+                'loads': self.loads,
+                'evictions': self.evictions
+            }
+
+
+def tenant_from_request(mode, host='', path='', header=None, reserved=(), base_host=''):
+    """Return (tenant, remaining path) for a request under the given routing mode
+
+    mode is 'header' (the tenant header's value), 'host' (the label directly
+    left of base_host: mit for mit.admissions.example.com under
+    admissions.example.com) or 'path' (the first path segment, which is
+    removed unless it is one of the app's own reserved top-level segments).
+    Tenant names are lowercased; None means no tenant was given, as for a
+    host that is not a single label below base_host, or is its www.
+    """
+    if mode == 'header':
+        return (header.strip().lower() or None) if header else None, path
+    if mode == 'host':
+        name = host.rsplit(':', 1)[0].rstrip('.').lower()
+        suffix = '.' + base_host.strip('.').lower()
+        label = name[:-len(suffix)] if base_host and name.endswith(suffix) else ''
+        return (label if label != 'www' and TENANT_PATTERN.match(label) else None), path
+    if mode == 'path':
+        segments = path.lstrip('/').split('/', 1)
+        if segments[0] and segments[0] not in reserved and TENANT_PATTERN.match(segments[0].lower()):
+            return segments[0].lower(), '/' + (segments[1] if len(segments) > 1 else '')
+        return None, path
+    raise ValueError(f"Unknown tenant routing mode: {mode}")
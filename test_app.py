@@ -0,0 +1,317 @@
+import gzip
+import json
+import os
+import re
+import tempfile
+import unittest
+
+os.environ.setdefault('KB_POLL_INTERVAL', '0')
+
+import app as web
+from bot_core import AdmissionsBot
+from rate_limit import AdmissionController
+from tenants import TenantRegistry
+
+try:
+    from starlette.testclient import TestClient
+    import asgi
+except ImportError:
+    asgi = None
+
+
+def parse_events(body):
+    """Split a Server-Sent Events body into (event, decoded data) pairs"""
+    events = []
+    for frame in body.strip().split('\n\n'):
+        fields = dict(line.split(': ', 1) for line in frame.split('\n'))
+        events.append((fields['event'], json.loads(fields['data'])))
+    return events
+
+
+class TestChatRoutes(unittest.TestCase):
+    def setUp(self):
+        self.client = web.app.test_client()
+    
+    def test_chat_keeps_history_server_side(self):
+        response = self.client.post('/chat', json={'message': 'How do I apply?'})
+        self.assertEqual(response.status_code, 200)
+        self.assertIn('response', response.get_json())
+        
+        with self.client.session_transaction() as session:
+            self.assertNotIn('conversation', session)
+            session_id = session['sid']
+        history = web.conversation_store.history(session_id)
+        self.assertEqual(history[0]['user'], 'How do I apply?')
+        self.assertIn('bot', history[1])
+        
+        self.client.post('/reset')
+        self.assertEqual(web.conversation_store.history(session_id), [])
+    
+    def test_web_and_cli_answer_alike(self):
+        from admissions_bot import UniversityAdmissionsBot
+        cli = UniversityAdmissionsBot(cache_size=0)
+        for message in ('How much is tuition?', 'Are there scholarships?', 'Do I need a transcript?'):
+            response = self.client.post('/chat', json={'message': message}).get_json()
+            self.assertEqual(response['response'], cli.respond(message)[1])
+    
+    def test_follow_up_uses_session_state(self):
+        self.client.post('/chat', json={'message': 'What are the eligibility requirements?'})
+        response = self.client.post('/chat', json={'message': 'what about for graduate?'}).get_json()
+        self.assertEqual(response['response'], web.bot.data['admissions']['eligibility']['graduate'])
+        
+        self.client.post('/reset')
+        response = self.client.post('/chat', json={'message': 'what about for graduate?'}).get_json()
+        self.assertEqual(response['response'], web.bot.generate_response('unknown', ''))
+    
+    def test_stream_sends_intent_then_parts(self):
+        response = self.client.post('/chat/stream', json={'message': 'I am an international student'})
+        self.assertEqual(response.mimetype, 'text/event-stream')
+        events = parse_events(response.get_data(as_text=True))
+        self.assertEqual([event for event, _ in events], ['intent', 'part', 'part', 'done'])
+        self.assertEqual(events[0][1], {'intent': 'international', 'show_eligibility_form': False, 'level': None})
+        
+        expected = self.client.post('/chat', json={'message': 'I am an international student'}).get_json()
+        self.assertEqual("\n\n".join(data['text'] for event, data in events if event == 'part'), expected['response'])
+    
+    def test_answers_report_the_remembered_level(self):
+        # The page mirrors this level for the questions it answers from the FAQ bundle
+        response = self.client.post('/chat', json={'message': 'master\u2019s programs?'}).get_json()
+        self.assertEqual(response['level'], 'graduate')
+        events = parse_events(self.client.post('/chat/stream', json={'message': 'any scholarships?'})
+                              .get_data(as_text=True))
+        self.assertEqual(events[0][1]['level'], 'graduate')
+    
+    def test_stream_rejects_non_string_message(self):
+        response = self.client.post('/chat/stream', json={'message': 123})
+        self.assertEqual(response.status_code, 400)
+        self.assertEqual(response.get_json(), {'error': 'message must be a string'})
+
+class TestBatchEligibility(unittest.TestCase):
+    def setUp(self):
+        self.client = web.app.test_client()
+    
+    def test_csv_upload_streams_ndjson(self):
+        body = "level,gpa,test_type,test_score\nug,3.5,sat,1300\ng,five,gre,320\n"
+        response = self.client.post('/check-eligibility/batch', data=body, content_type='text/csv')
+        results = [json.loads(line) for line in response.get_data(as_text=True).splitlines()]
+        
+        self.assertEqual(response.mimetype, 'application/x-ndjson')
+        self.assertEqual(results[0]['row'], 1)
+        self.assertIn('Engineering', results[0]['programs'])
+        self.assertEqual(results[1], {'row': 2, 'status': 'error', 'message': 'Please enter valid numbers'})
+    
+    def test_ndjson_upload(self):
+        body = '{"level": "g", "gpa": 3.5, "test_type": "gmat", "test_score": 650}\nnot json\n'
+        response = self.client.post('/check-eligibility/batch', data=body, content_type='application/x-ndjson')
+        results = [json.loads(line) for line in response.get_data(as_text=True).splitlines()]
+        
+        self.assertTrue(results[0]['eligible'])
+        self.assertEqual(results[1]['message'], 'Invalid JSON')
+
+class TestAdmissionControl(unittest.TestCase):
+    def setUp(self):
+        self.client = web.app.test_client()
+        self.original = web.admission
+    
+    def tearDown(self):
+        web.admission = self.original
+    
+    def test_rate_limit_returns_429_before_parsing(self):
+        web.admission = AdmissionController({'chat': (1, 2)})
+        with self.client.session_transaction() as session:
+            session['sid'] = 'rate-limited-client'
+        throttled = web.throttled_requests.value('/chat')
+        statuses = [self.client.post('/chat', json={'message': 'hi'}).status_code for _ in range(2)]
+        self.assertEqual(statuses, [200, 200])
+        
+        response = self.client.post('/chat', data='not json', content_type='application/json')
+        self.assertEqual(response.status_code, 429)
+        self.assertGreaterEqual(int(response.headers['Retry-After']), 1)
+        self.assertEqual(web.throttled_requests.value('/chat'), throttled + 1)
+        self.assertEqual(web.admission.in_flight, 0)
+    
+    def test_sheds_when_busy(self):
+        web.admission = AdmissionController(max_in_flight=1)
+        web.admission.in_flight = 1
+        response = self.client.post('/check-eligibility', json={'level': 'ug'})
+        self.assertEqual(response.status_code, 503)
+        self.assertEqual(response.headers['Retry-After'], '1')
+        self.assertIn('/check-eligibility', web.metrics.render().split('admissions_shed_requests_total')[-1])
+
+class TestTenantRouting(unittest.TestCase):
+    def setUp(self):
+        with open('admissions_data.json') as file:
+            data = json.load(file)
+        data['admissions']['general']['deadlines'] = "North closes on March 1."
+        self.directory = tempfile.TemporaryDirectory()
+        with open(os.path.join(self.directory.name, 'north.json'), 'w') as file:
+            json.dump(data, file)
+        self.original = (web.tenants, web.TENANT_MODE, web.TENANT_BASE_HOST, web.app.wsgi_app)
+        web.tenants = TenantRegistry(self.directory.name, AdmissionsBot)
+        web.app.wsgi_app = web.TenantRouting(web.app.wsgi_app)
+        self.client = web.app.test_client()
+    
+    def tearDown(self):
+        web.tenants, web.TENANT_MODE, web.TENANT_BASE_HOST, web.app.wsgi_app = self.original
+        self.directory.cleanup()
+    
+    def test_header_routing(self):
+        web.TENANT_MODE = 'header'
+        response = self.client.post('/chat', json={'message': 'deadline'}, headers={'X-Tenant': 'north'})
+        self.assertEqual(response.get_json()['response'], "North closes on March 1.")
+        response = self.client.post('/chat', json={'message': 'deadline'})
+        self.assertNotEqual(response.get_json()['response'], "North closes on March 1.")
+        response = self.client.post('/chat', json={'message': 'deadline'}, headers={'X-Tenant': 'south'})
+        self.assertEqual(response.status_code, 404)
+    
+    def test_path_routing(self):
+        web.TENANT_MODE = 'path'
+        response = self.client.post('/north/chat', json={'message': 'deadline'})
+        self.assertEqual(response.get_json()['response'], "North closes on March 1.")
+        self.assertIn('data-api-root="/north"', self.client.get('/north/').get_data(as_text=True))
+        self.assertEqual(self.client.post('/chat', json={'message': 'hi'}).status_code, 200)
+        self.assertEqual(self.client.post('/south/chat', json={'message': 'hi'}).status_code, 404)
+    
+    def test_host_routing(self):
+        web.TENANT_MODE, web.TENANT_BASE_HOST = 'host', 'admissions.example.com'
+        response = self.client.post('/chat', json={'message': 'deadline'},
+                                    base_url='http://north.admissions.example.com')
+        self.assertEqual(response.get_json()['response'], "North closes on March 1.")
+        for host in ('admissions.example.com', 'www.admissions.example.com', '127.0.0.1:5000'):
+            response = self.client.post('/chat', json={'message': 'deadline'}, base_url='http://' + host)
+            self.assertEqual(response.status_code, 200)
+            self.assertNotEqual(response.get_json()['response'], "North closes on March 1.")
+
+class TestClientCaching(unittest.TestCase):
+    def setUp(self):
+        self.client = web.app.test_client()
+    
+    def test_page_and_faq_revalidate_by_etag(self):
+        for path in ('/', '/faq'):
+            response = self.client.get(path)
+            self.assertTrue(response.headers['ETag'].startswith('W/'))
+            again = self.client.get(path, headers={'If-None-Match': response.headers['ETag']})
+            self.assertEqual(again.status_code, 304)
+            self.assertEqual(again.data, b'')
+        
+        bundle = self.client.get('/faq').get_json()
+        self.assertEqual(bundle['keywords'][0][0], 'apply')
+        self.assertEqual(bundle['answers']['fees']['default'][1], 'tuition')
+        self.assertNotIn('eligibility', bundle['answers'])
+        self.assertIn('am i eligible', bundle['form_phrases'])
+    
+    def test_fingerprinted_static_assets_are_immutable_and_compressed(self):
+        page = self.client.get('/').get_data(as_text=True)
+        script = re.search(r'/static/script\.js\?v=\w+', page).group(0)
+        response = self.client.get(script, headers={'Accept-Encoding': 'gzip'})
+        self.assertEqual(response.headers['Content-Encoding'], 'gzip')
+        self.assertIn('immutable', response.headers['Cache-Control'])
+        self.assertIn('Accept-Encoding', response.headers['Vary'])
+        with open(os.path.join(web.app.static_folder, 'script.js'), 'rb') as file:
+            self.assertEqual(gzip.decompress(response.data), file.read())
+        self.assertNotIn('immutable', self.client.get('/static/script.js').headers.get('Cache-Control', ''))
+    
+    def test_locally_answered_turn_informs_follow_up(self):
+        response = self.client.post('/chat', json={'message': 'what about for graduate?',
+                                                   'context': ['courses', 'undergraduate', None]})
+        self.assertTrue(response.get_json()['response'].startswith('Graduate programs'))
+        
+        response = self.client.post('/reset')
+        response = self.client.post('/chat', json={'message': 'what about for graduate?',
+                                                   'context': ['courses', 'bogus', None]})
+        self.assertIn("not sure", response.get_json()['response'])
+
+class TestMetrics(unittest.TestCase):
+    def setUp(self):
+        self.client = web.app.test_client()
+        web.metrics.enabled = True
+    
+    def tearDown(self):
+        web.metrics.enabled = False
+    
+    def test_chat_stages_and_intents(self):
+        before = web.metrics.intents.value('unknown')
+        self.client.post('/chat', json={'message': 'xyzzy plugh'})
+        self.client.post('/check-eligibility', json={'level': 'g', 'gpa': '3.5', 'test_type': 'gre', 'test_score': '320'})
+        
+        self.assertEqual(web.metrics.intents.value('unknown'), before + 1)
+        self.assertGreater(web.metrics.stage_duration.count('/chat', 'find_intent'), 0)
+        self.assertGreater(web.metrics.eligibility.value('graduate', 'eligible'), 0)
+        
+        text = self.client.get('/metrics').get_data(as_text=True)
+        self.assertIn('admissions_stage_duration_seconds_bucket{route="/chat",stage="session_cookie",le="+Inf"}', text)
+        self.assertIn('admissions_response_cache{key="misses"}', text)
+        self.assertTrue(self.client.get('/metrics/slow').get_json())
+
+@unittest.skipIf(asgi is None, 'starlette is not installed')
+class TestAsgiRoutes(unittest.TestCase):
+    def setUp(self):
+        self.client = TestClient(asgi.app)
+    
+    def test_same_json_contract(self):
+        response = self.client.post('/chat', json={'message': 'How do I apply?'})
+        self.assertEqual(response.json(), web.app.test_client().post('/chat', json={'message': 'How do I apply?'}).get_json())
+        
+        response = self.client.post('/check-eligibility', json={'level': 'ug', 'gpa': '3.5', 'test_type': 'sat', 'test_score': '1300'})
+        self.assertEqual(response.json()['status'], 'success')
+        
+        response = self.client.post('/reset')
+        self.assertEqual(response.json(), {'status': 'success', 'message': 'Conversation reset'})
+    
+    def test_stream(self):
+        response = self.client.post('/chat/stream', json={'message': 'any scholarships?'},
+                                    headers={'Accept-Encoding': 'gzip'})
+        self.assertTrue(response.headers['content-type'].startswith('text/event-stream'))
+        self.assertNotIn('content-encoding', response.headers)
+        events = parse_events(response.text)
+        self.assertEqual(events[0], ('intent', {'intent': 'fees', 'show_eligibility_form': False, 'level': None}))
+        self.assertEqual(events[-1], ('done', {}))
+        response = self.client.post('/chat/stream', json={'message': 123})
+        self.assertEqual((response.status_code, response.json()), (400, {'error': 'message must be a string'}))
+    
+    def test_shed_before_route(self):
+        original = web.admission
+        web.admission = AdmissionController(max_in_flight=1)
+        web.admission.in_flight = 1
+        try:
+            response = self.client.post('/chat', content='not json')
+        finally:
+            web.admission = original
+        self.assertEqual(response.status_code, 503)
+        self.assertEqual(response.headers['retry-after'], '1')
+    
+    def test_home_page(self):
+        response = self.client.get('/')
+        self.assertIn('/static/script.js', response.text)
+        self.assertEqual(self.client.get('/static/script.js').status_code, 200)
+    
+    def test_faq_matches_flask(self):
+        response = self.client.get('/faq')
+        flask_response = web.app.test_client().get('/faq')
+        self.assertEqual(response.json(), flask_response.get_json())
+        self.assertEqual(response.headers['etag'], flask_response.headers['ETag'])
+        self.assertEqual(response.headers['content-encoding'], 'gzip')
+        self.assertEqual(self.client.get('/faq', headers={'If-None-Match': response.headers['etag']}).status_code, 304)
+    
+    def test_requests_are_timed(self):
+        routes = ('/chat', '/chat/stream', '/check-eligibility')
+        requests = [web.metrics.request_duration.count(route, '200') for route in routes]
+        stages = web.metrics.stage_duration.count('/chat', 'cache')
+        eligible = web.metrics.eligibility.value('undergraduate', 'eligible')
+        web.metrics.enabled = True
+        try:
+            self.client.post('/chat', json={'message': 'How much is tuition?'})
+            self.client.post('/chat/stream', json={'message': 'any scholarships?'})
+            self.client.post('/check-eligibility', json={'level': 'ug', 'gpa': '3.5', 'test_type': 'sat', 'test_score': '1300'})
+        finally:
+            web.metrics.enabled = False
+        self.assertEqual([web.metrics.request_duration.count(route, '200') for route in routes],
+                         [count + 1 for count in requests])
+        self.assertEqual(web.metrics.stage_duration.count('/chat', 'cache'), stages + 1)
+        self.assertEqual(web.metrics.eligibility.value('undergraduate', 'eligible'), eligible + 1)
+        slowest = self.client.get('/metrics/slow').json()
+        self.assertEqual(slowest, web.metrics.slow_requests.entries())
+        self.assertIn('/chat/stream', [entry['route'] for entry in slowest])
+
+if __name__ == '__main__':
+    unittest.main()
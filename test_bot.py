@@ -1,6 +1,32 @@
+import contextlib
+import io
+import json
+import os
+import pickle
+import struct
+import subprocess
+import sys
+import tempfile
 import unittest
+from concurrent.futures import ThreadPoolExecutor
 from admissions_bot import UniversityAdmissionsBot
 from eligibility_checker import EligibilityChecker
+from intent_matcher import KeywordMatcher
+from response_cache import ResponseCache
+import knowledge_base
+from knowledge_base import KnowledgeBase, KnowledgeBaseManager, default_data
+from knowledge_image import IMAGE_FORMAT, MAGIC, MappedKnowledgeBase, write_image
+from knowledge_schema import InvalidKnowledgeBase, validate
+from eligibility_engine import EligibilityEngine
+import benchmark
+from batch_screening import parse_row, screen_rows
+import replay
+from faq import build_bundle
+from dialogue import DialogueState, detect_level
+from spelling import SpellingCorrector, edit_distance
+from rate_limit import AdmissionController, RateLimiter, parse_limits
+from session_store import MemoryConversationStore, SQLiteConversationStore
+from tenants import TenantRegistry, UnknownTenant, deep_sizeof, tenant_from_request
 
 class TestAdmissionsBot(unittest.TestCase):
     def setUp(self):
@@ -16,5 +42,559 @@ class TestAdmissionsBot(unittest.TestCase):
         self.assertIsNotNone(response)
         self.assertIsInstance(response, str)
 
+class TestDialogueState(unittest.TestCase):
+    def setUp(self):
+        self.bot = UniversityAdmissionsBot()
+        self.admissions = self.bot.data['admissions']
+    
+    def test_follow_up_reuses_intent_and_level(self):
+        dialogue = DialogueState()
+        self.assertEqual(self.bot.respond("What are the eligibility requirements?", dialogue)[0], 'eligibility')
+        intent, response = self.bot.respond("what about for graduate?", dialogue)
+        self.assertEqual((intent, response), ('eligibility', self.admissions['eligibility']['graduate']))
+        self.assertEqual(dialogue.to_list(), ['eligibility', 'graduate', 'graduate'])
+        
+        # The level carries over to the next question
+        self.assertEqual(self.bot.respond("What courses do you offer?", dialogue)[1],
+                         self.admissions['courses']['graduate'])
+    
+    def test_follow_up_switches_level_both_ways(self):
+        for intent in ('eligibility', 'courses'):
+            answers = self.admissions[intent]
+            dialogue = DialogueState()
+            question = "What are the eligibility requirements for graduate?" if intent == 'eligibility' \
+                else "What graduate courses do you offer?"
+            self.assertEqual(self.bot.respond(question, dialogue), (intent, answers['graduate']))
+            self.assertEqual(self.bot.respond("what about undergraduate?", dialogue), (intent, answers['undergraduate']))
+            self.assertEqual(dialogue.to_list(), [intent, 'undergraduate', 'undergraduate'])
+            self.assertEqual(self.bot.respond("and for graduate?", dialogue), (intent, answers['graduate']))
+            self.assertEqual(dialogue.to_list(), [intent, 'graduate', 'graduate'])
+        self.assertEqual(self.bot.respond("Which undergraduate courses are there?")[1],
+                         self.admissions['courses']['undergraduate'])
+    
+    def test_follow_up_keeps_sub_topic(self):
+        dialogue = DialogueState()
+        self.bot.respond("Do I need a transcript?", dialogue)
+        self.assertEqual(self.bot.respond("and for graduate?", dialogue)[1],
+                         self.admissions['documents']['transcripts'])
+        self.assertEqual(self.bot.respond("what is the weather like?", dialogue)[0], 'unknown')
+        self.assertEqual(dialogue.last_intent, 'documents')
+    
+    def test_without_state_follow_ups_are_unknown(self):
+        self.assertEqual(self.bot.respond("what about for graduate?")[0], 'unknown')
+        self.assertEqual(detect_level("any undergraduate majors"), 'undergraduate')
+        self.assertIsNone(detect_level("after graduation"))
+        self.assertEqual(DialogueState.from_list('garbage').key(), (None, None, None))
+
+class TestKeywordMatcher(unittest.TestCase):
+    def setUp(self):
+        self.matcher = KeywordMatcher({
+            'first': ['she', 'last date'],
+            'second': ['he', 'hers'],
+        })
+    
+    def test_declaration_order_wins(self):
+        self.assertEqual(self.matcher.match('ushers'), 'first')
+        self.assertEqual(self.matcher.match('the'), 'second')
+        self.assertIsNone(self.matcher.match('no match'))
+    
+    def test_find_all(self):
+        self.assertEqual(self.matcher.find_all('ushers'), ['first', 'second'])
+        self.assertEqual(self.matcher.find_all('what is the last date'), ['first', 'second'])
+
+class TestSpellingCorrector(unittest.TestCase):
+    def setUp(self):
+        self.corrector = SpellingCorrector.from_keywords({
+            'deadline': ['deadline', 'last date'],
+            'eligibility': ['eligible', 'eligibility'],
+            'fees': ['cost', 'scholarship']
+        })
+    
+    def test_corrects_within_distance(self):
+        self.assertEqual(self.corrector.correct('deadlin'), 'deadline')
+        self.assertEqual(self.corrector.correct('elligible'), 'eligible')
+        self.assertEqual(self.corrector.correct('scholarhsip'), 'scholarship')
+        self.assertIsNone(self.corrector.correct('deodlan'))
+        self.assertEqual(edit_distance('scholarhsip', 'scholarship', 2), 1)
+    
+    def test_short_words_are_left_alone(self):
+        self.assertIsNone(self.corrector.correct('most'))
+        self.assertIsNone(self.corrector.correct_text('what is the most popular major'))
+    
+    def test_bot_retries_with_corrected_text(self):
+        bot = UniversityAdmissionsBot(cache_size=0)
+        self.assertEqual(bot.find_intent("Am I elligible?"), 'eligibility')
+        intent, response = bot.respond("any scholarshp?")
+        self.assertEqual(intent, 'fees')
+        self.assertEqual(response, bot.data['admissions']['fees']['financial_aid'])
+        self.assertEqual(UniversityAdmissionsBot(spelling=False).find_intent("deadlin"), 'unknown')
+
+class TestAnswerIndex(unittest.TestCase):
+    def setUp(self):
+        self.bot = UniversityAdmissionsBot('admissions_data.json', retrieval=True)
+    
+    def test_ranked_hits(self):
+        hits = self.bot.retrieve("What are the graduate programs?", top_k=2)
+        self.assertEqual(hits[0]['path'], 'courses.graduate')
+        self.assertEqual(hits[0]['intent'], 'courses')
+        self.assertGreaterEqual(hits[0]['score'], hits[1]['score'])
+    
+    def test_low_confidence_falls_back_to_keywords(self):
+        self.assertEqual(self.bot.retrieve("hello"), [])
+        intent, response = self.bot.respond("hello")
+        self.assertEqual(intent, 'greetings')
+        intent, response = self.bot.respond("Is there an application fee waiver?")
+        self.assertEqual(response, self.bot.data['admissions']['fees']['application'])
+    
+    def test_section_hits_keep_the_remembered_intent(self):
+        dialogue = DialogueState()
+        self.bot.respond("How much is tuition?", dialogue)
+        self.assertEqual(self.bot.respond("what are the general admission requirements", dialogue)[0], 'general')
+        self.assertEqual(dialogue.last_intent, 'fees')
+        intent, _ = self.bot.respond("what about for graduate?", dialogue)
+        self.assertEqual(intent, 'fees')
+
+class TestResponseCache(unittest.TestCase):
+    def test_lru_eviction(self):
+        cache = ResponseCache(max_size=2)
+        cache.put('a', 1)
+        cache.put('b', 2)
+        cache.get('a')
+        cache.put('c', 3)
+        self.assertIsNone(cache.get('b'))
+        self.assertEqual(cache.get('a'), 1)
+        self.assertEqual(cache.stats()['evictions'], 1)
+    
+    def test_bot_memoizes_normalized_input(self):
+        bot = UniversityAdmissionsBot('admissions_data.json')
+        first = bot.respond("How do I apply?")
+        second = bot.respond("  how do i APPLY ")
+        self.assertEqual(first, second)
+        self.assertEqual(bot.response_cache.stats()['hits'], 1)
+        
+        bot.load_knowledge_base('admissions_data.json')
+        self.assertEqual(len(bot.response_cache), 0)
+
+class TestKnowledgeBaseReload(unittest.TestCase):
+    def setUp(self):
+        with open('admissions_data.json') as file:
+            self.data = json.load(file)
+        handle, self.path = tempfile.mkstemp(suffix='.json')
+        os.close(handle)
+        self.write_data()
+    
+    def tearDown(self):
+        os.remove(self.path)
+    
+    def write_data(self):
+        with open(self.path, 'w') as file:
+            json.dump(self.data, file)
+    
+    def test_reload_swaps_version(self):
+        bot = UniversityAdmissionsBot(self.path)
+        old = bot.knowledge.current
+        self.assertFalse(bot.knowledge.reload())
+        self.assertEqual(bot.respond("deadline")[1], self.data['admissions']['general']['deadlines'])
+        
+        self.data['admissions']['general']['deadlines'] = "Applications close on March 1."
+        self.write_data()
+        self.assertTrue(bot.knowledge.reload(force=True))
+        
+        self.assertEqual(bot.knowledge.version, old.version + 1)
+        self.assertEqual(bot.respond("deadline")[1], "Applications close on March 1.")
+        self.assertNotEqual(old.data['admissions']['general']['deadlines'], "Applications close on March 1.")
+    
+    def test_invalid_file_keeps_current_version(self):
+        manager = KnowledgeBaseManager(self.path)
+        with open(self.path, 'w') as file:
+            file.write('{"admissions": ')
+        self.assertFalse(manager.reload(force=True))
+        self.assertEqual(manager.version, 1)
+    
+    def test_snapshot_round_trip(self):
+        snapshot = self.path.replace('.json', '.snapshot')
+        KnowledgeBase(self.data).save_snapshot(snapshot)
+        try:
+            bot = UniversityAdmissionsBot(snapshot)
+        finally:
+            os.remove(snapshot)
+        self.assertEqual(bot.respond("How much is tuition?"), ('fees', self.data['admissions']['fees']['tuition']))
+        self.assertIn('Computer Science', bot.eligibility_checker.engine.split('undergraduate', 3.5, 'sat', 1300)[0])
+    
+    def test_snapshot_built_by_cli_loads_in_another_process(self):
+        snapshot = self.path.replace('.json', '.snapshot')
+        try:
+            subprocess.run([sys.executable, 'knowledge_base.py', self.path, '-o', snapshot],
+                           check=True, capture_output=True)
+            loaded = subprocess.run(
+                [sys.executable, '-c', 'import sys; from bot_core import AdmissionsBot; '
+                 'print(AdmissionsBot(sys.argv[1], strict=True).respond("How much is tuition?")[0])', snapshot],
+                check=True, capture_output=True, text=True)
+        finally:
+            if os.path.exists(snapshot):
+                os.remove(snapshot)
+        self.assertEqual(loaded.stdout.strip(), 'fees')
+    
+    def test_mapped_image_answers_like_json(self):
+        image = self.path.replace('.json', '.kbimg')
+        write_image(KnowledgeBase(self.data), image)
+        try:
+            mapped = UniversityAdmissionsBot(image, cache_size=0)
+            parsed = UniversityAdmissionsBot(self.path, cache_size=0)
+            for message in ("How much is tuition?", "Are there scholarships?", "graduate courses",
+                            "Do I need a transcript?", "hello", "what is the weather like"):
+                self.assertEqual(mapped.respond(message), parsed.respond(message))
+            self.assertEqual(mapped.data, parsed.data)
+            self.assertEqual(build_bundle(mapped.knowledge.current), build_bundle(parsed.knowledge.current))
+            self.assertEqual(mapped.eligibility_checker.engine.split('graduate', 3.1, 'gre', 312),
+                             parsed.eligibility_checker.engine.split('graduate', 3.1, 'gre', 312))
+            
+            # A rebuilt image is swapped in, not rewritten under the mapping
+            self.data['admissions']['general']['deadlines'] = "Applications close on March 1."
+            write_image(KnowledgeBase(self.data), image)
+            self.assertTrue(mapped.knowledge.reload())
+            self.assertEqual(mapped.respond("deadline")[1], "Applications close on March 1.")
+        finally:
+            os.remove(image)
+    
+    def test_malformed_image_is_reported_once_and_kept_out(self):
+        image = self.path.replace('.json', '.kbimg')
+        write_image(KnowledgeBase(self.data), image)
+        try:
+            manager = KnowledgeBaseManager(image)
+            header = json.dumps({'format': IMAGE_FORMAT}).encode('utf-8')
+            with open(image + '.tmp', 'wb') as file:
+                file.write(MAGIC + struct.pack('<I', len(header)) + header)
+            os.replace(image + '.tmp', image)
+            with self.assertRaisesRegex(ValueError, 'malformed'):
+                MappedKnowledgeBase(image)
+            
+            output = io.StringIO()
+            with contextlib.redirect_stdout(output):
+                self.assertFalse(manager.reload())
+                self.assertFalse(manager.reload())
+            self.assertEqual(output.getvalue().count('Could not reload'), 1)
+            self.assertEqual(manager.version, 1)
+            
+            write_image(KnowledgeBase(self.data), image)
+            self.assertTrue(manager.reload())
+        finally:
+            os.remove(image)
+
+class TestKnowledgeBaseBuild(unittest.TestCase):
+    def setUp(self):
+        with open('admissions_data.json') as file:
+            self.data = json.load(file)
+        self.directory = tempfile.TemporaryDirectory()
+        self.path = os.path.join(self.directory.name, 'admissions.json')
+    
+    def tearDown(self):
+        self.directory.cleanup()
+    
+    def write_data(self):
+        with open(self.path, 'w') as file:
+            json.dump(self.data, file)
+    
+    def test_shipped_and_default_data_are_valid(self):
+        self.assertEqual(validate(self.data), ([], []))
+        self.assertEqual(validate(default_data()), ([], []))
+    
+    def test_reports_every_problem(self):
+        del self.data['admissions']['fees']['tuition']
+        del self.data['admissions']['courses']['engineering']
+        self.data['keywords']['apply'].append('How to?')
+        self.data['keywords']['housing'] = ['dorm']
+        self.data['programs'] = {'undergraduate': {'Physics': {'gpa': 'high', 'lsat': 150}}}
+        errors, warnings = validate(self.data)
+        self.assertEqual(errors, [
+            "keywords.apply[5]: 'How to?' can never match; write it as 'how to'",
+            "keywords.housing: no response is defined for this intent",
+            "admissions.fees.tuition: missing answer for intent 'fees'",
+            "programs.undergraduate.Physics.gpa: expected a non-negative number",
+            "programs.undergraduate.Physics.lsat: unknown test; expected one of gpa, sat, act, gre, gmat"
+        ])
+        self.assertEqual(len(warnings), 1)
+        self.assertIn('admissions.courses.engineering', warnings[0])
+    
+    def test_strict_manager_refuses_bad_knowledge_base(self):
+        with self.assertRaises(FileNotFoundError):
+            KnowledgeBaseManager(self.path, strict=True)
+        self.write_data()
+        manager = KnowledgeBaseManager(self.path, strict=True)
+        
+        del self.data['admissions']['general']['apply']
+        self.write_data()
+        self.assertFalse(manager.reload(force=True))
+        self.assertEqual(manager.version, 1)
+        with self.assertRaises(InvalidKnowledgeBase):
+            KnowledgeBaseManager(self.path, strict=True)
+    
+    def test_build_writes_only_valid_images(self):
+        image = os.path.join(self.directory.name, 'admissions.kbimg')
+        self.write_data()
+        self.assertEqual(knowledge_base.main([self.path, '-o', image]), 0)
+        self.assertEqual(MappedKnowledgeBase(image).build['source'], 'admissions.json')
+        
+        self.data['keywords']['fees'] = []
+        self.write_data()
+        os.remove(image)
+        self.assertEqual(knowledge_base.main([self.path, '-o', image]), 1)
+        self.assertFalse(os.path.exists(image))
+    
+    def test_corrupt_image_is_refused(self):
+        image = os.path.join(self.directory.name, 'admissions.kbimg')
+        write_image(KnowledgeBase(self.data), image)
+        with open(image, 'r+b') as file:
+            file.seek(-20, os.SEEK_END)
+            file.write(b'x')
+        with self.assertRaisesRegex(ValueError, 'checksum'):
+            MappedKnowledgeBase(image)
+        with open(image, 'r+b') as file:
+            file.truncate(os.path.getsize(image) // 2)
+        with self.assertRaisesRegex(ValueError, 'truncated'):
+            KnowledgeBaseManager(image, strict=True)
+    
+    def test_strict_manager_checks_snapshot_layout(self):
+        snapshot = os.path.join(self.directory.name, 'admissions.snapshot')
+        KnowledgeBase(self.data).save_snapshot(snapshot)
+        self.assertEqual(KnowledgeBaseManager(snapshot, strict=True).current.data, self.data)
+        
+        with open(snapshot, 'rb') as file:
+            payload = pickle.load(file)
+        del payload['knowledge_base'].answer_index
+        with open(snapshot, 'wb') as file:
+            pickle.dump(payload, file)
+        with self.assertRaisesRegex(ValueError, 'answer_index'):
+            KnowledgeBaseManager(snapshot, strict=True)
+        
+        payload['format'] = 'admissions-knowledge-base/1'
+        with open(snapshot, 'wb') as file:
+            pickle.dump(payload, file)
+        with self.assertRaisesRegex(ValueError, 'rebuild'):
+            KnowledgeBaseManager(snapshot)
+
+class TestTenantRegistry(unittest.TestCase):
+    def setUp(self):
+        with open('admissions_data.json') as file:
+            data = json.load(file)
+        self.directory = tempfile.TemporaryDirectory()
+        for tenant, deadline in (('north', "North closes on March 1."), ('south', "South closes on May 1.")):
+            data['admissions']['general']['deadlines'] = deadline
+            with open(os.path.join(self.directory.name, tenant + '.json'), 'w') as file:
+                json.dump(data, file)
+        write_image(KnowledgeBase(data), os.path.join(self.directory.name, 'east.kbimg'))
+    
+    def tearDown(self):
+        self.directory.cleanup()
+    
+    def registry(self, **options):
+        return TenantRegistry(self.directory.name, UniversityAdmissionsBot, **options)
+    
+    def test_loads_each_tenant_once(self):
+        tenants = self.registry()
+        self.assertEqual(tenants.loaded(), [])
+        north = tenants.get('north')
+        self.assertIs(tenants.get('north'), north)
+        self.assertEqual(north.respond("deadline")[1], "North closes on March 1.")
+        self.assertEqual(tenants.get('south').respond("deadline")[1], "South closes on May 1.")
+        self.assertEqual(tenants.stats()['loads'], 2)
+    
+    def test_concurrent_requests_share_one_load(self):
+        tenants = self.registry()
+        with ThreadPoolExecutor(8) as pool:
+            bots = list(pool.map(tenants.get, ['north'] * 32))
+        self.assertTrue(all(bot is bots[0] for bot in bots))
+        self.assertEqual(tenants.stats()['loads'], 1)
+        self.assertEqual(tenants._loading, {})
+        
+        failing = TenantRegistry(self.directory.name, lambda path: 1 / 0)
+        with self.assertRaises(ZeroDivisionError):
+            failing.get('north')
+        self.assertEqual((failing._loading, failing.loaded()), ({}, []))
+    
+    def test_unknown_tenants(self):
+        tenants = self.registry()
+        for name in ('west', '../north', 'North', ''):
+            with self.assertRaises(UnknownTenant):
+                tenants.get(name)
+        self.assertEqual(tenants.loaded(), [])
+    
+    def test_evicts_least_recently_used(self):
+        tenants = self.registry(memory_budget=250, size_of=lambda bot: 100)
+        tenants.get('north')
+        tenants.get('south')
+        tenants.get('north')
+        tenants.get('east')
+        self.assertEqual(tenants.loaded(), ['north', 'east'])
+        self.assertEqual(tenants.stats()['evictions'], 1)
+        
+        tenants = self.registry(max_tenants=1)
+        tenants.get('north')
+        tenants.get('south')
+        self.assertEqual(tenants.loaded(), ['south'])
+    
+    def test_mapped_tenant_is_mostly_shared(self):
+        tenants = self.registry()
+        parsed = deep_sizeof(tenants.get('north').knowledge.current)
+        mapped = deep_sizeof(tenants.get('east').knowledge.current)
+        self.assertLess(mapped, parsed)
+    
+    def test_tenant_from_request(self):
+        self.assertEqual(tenant_from_request('header', header=' North '), ('north', ''))
+        base = 'admissions.example.com'
+        self.assertEqual(tenant_from_request('host', host='North.admissions.example.com:8000', base_host=base),
+                         ('north', ''))
+        for host in ('admissions.example.com', 'www.admissions.example.com', 'www.example.com', 'a.b.admissions.example.com',
+                     '10.0.0.1:8000', 'localhost:5000'):
+            self.assertEqual(tenant_from_request('host', host=host, base_host=base), (None, ''))
+        self.assertEqual(tenant_from_request('host', host='north.admissions.example.com'), (None, ''))
+        self.assertEqual(tenant_from_request('path', path='/north/chat'), ('north', '/chat'))
+        self.assertEqual(tenant_from_request('path', path='/chat/stream', reserved=('chat',)),
+                         (None, '/chat/stream'))
+
+class TestConversationStore(unittest.TestCase):
+    def check_store(self, store):
+        for turn in range(5):
+            store.append('abc', {'user': f'question {turn}', 'timestamp': None})
+        history = store.history('abc')
+        self.assertEqual([entry['user'] for entry in history], ['question 2', 'question 3', 'question 4'])
+        
+        store.idle_timeout = -1
+        self.assertEqual(store.history('abc'), [])
+        self.assertEqual(store.purge_expired(), 1)
+        self.assertEqual(store.stats()['sessions'], 0)
+    
+    def test_memory_store(self):
+        self.check_store(MemoryConversationStore(max_messages=3))
+    
+    def test_sqlite_store(self):
+        with tempfile.TemporaryDirectory() as directory:
+            self.check_store(SQLiteConversationStore(os.path.join(directory, 'sessions.db'), max_messages=3))
+
+class TestEligibility(unittest.TestCase):
+    def setUp(self):
+        self.checker = EligibilityChecker()
+    
+    def test_single_applicant(self):
+        result = self.checker.check_eligibility_api({'level': 'ug', 'gpa': '3.0', 'test_type': 'sat', 'test_score': '1200'})
+        self.assertEqual(result['eligible'], ['Computer Science', 'Business Administration', 'Psychology', 'Biology', 'Economics'])
+        self.assertEqual(result['not_eligible'], ['Engineering'])
+    
+    def test_not_eligible_suggestions(self):
+        result = self.checker.check_eligibility_api({'level': 'g', 'gpa': '2.5', 'test_type': 'gre', 'test_score': '290'})
+        self.assertEqual(result['eligible'], [])
+        self.assertIn('improve your GPA', result['message'])
+        self.assertIn('retake the GRE exam', result['message'])
+    
+    def test_batch_matrix(self):
+        engine = EligibilityEngine({
+            'undergraduate': {'A': {'gpa': 3.0, 'sat': 1200, 'act': 30}, 'B': {'gpa': 2.0, 'sat': 1400, 'act': 20}},
+            'graduate': {'C': {'gpa': 3.0, 'gre': 300}}
+        })
+        matrix = engine.evaluate_batch(
+            ['ug', 'ug', 'g', 'g'],
+            [3.5, 3.5, 3.5, 3.5],
+            ['sat', 'act', 'gre', 'sat'],
+            [1300, 25, 310, 1300]
+        )
+        self.assertEqual(matrix.tolist(), [
+            [True, False, False],
+            [False, True, False],
+            [False, False, True],
+            [False, False, False]
+        ])
+    
+    def test_index_agrees_with_vectorized_table(self):
+        engine = self.checker.engine
+        for level in ['undergraduate', 'graduate']:
+            for test_type, scores in [('sat', range(900, 1400, 50)), ('act', range(18, 30)),
+                                      ('gre', range(295, 325, 5)), ('gmat', range(550, 700, 50))]:
+                for gpa in [2.6, 2.7, 2.95, 3.0, 3.15, 3.2, 4.0]:
+                    for score in scores:
+                        row = engine.evaluate(level, gpa, test_type, score)
+                        expected = [engine.table.names[i] for i in engine.table.programs_for(level) if row[i]]
+                        self.assertEqual(engine.split(level, gpa, test_type, score)[0], expected)
+    
+    def test_non_finite_gpa_is_rejected(self):
+        bot = UniversityAdmissionsBot('admissions_data.json')
+        for gpa in ('nan', 'inf', '-inf'):
+            data = {'level': 'ug', 'gpa': gpa, 'test_type': 'sat', 'test_score': '1600'}
+            self.assertIn('error', self.checker.check_eligibility_api(data))
+            self.assertEqual(bot.check_eligibility_api(data)['status'], 'error')
+            self.assertIn('GPA', parse_row(data))
+    
+    def test_oversized_numbers_are_row_errors(self):
+        rows = [
+            {'level': 'ug', 'gpa': 3.5, 'test_type': 'sat', 'test_score': 1e400},
+            {'level': 'ug', 'gpa': 3.5, 'test_type': 'sat', 'test_score': 10 ** 400},
+            {'level': 'ug', 'gpa': 10 ** 400, 'test_type': 'sat', 'test_score': 1300},
+            {'level': 'ug', 'gpa': 3.5, 'test_type': 'sat', 'test_score': 1300}
+        ]
+        results = list(screen_rows(self.checker.engine, rows, chunk_size=2))
+        self.assertEqual([result['status'] for result in results], ['error', 'error', 'error', 'success'])
+        self.assertEqual(results[1]['message'], 'Test score must be between 0 and 10000')
+
+class TestRateLimiting(unittest.TestCase):
+    def test_token_bucket_refills(self):
+        limiter = RateLimiter(rate=2, burst=3)
+        self.assertEqual([limiter.acquire('a', now=0) for _ in range(3)], [0, 0, 0])
+        self.assertAlmostEqual(limiter.acquire('a', now=0), 0.5)
+        self.assertEqual(limiter.acquire('b', now=0), 0)
+        self.assertEqual(limiter.acquire('a', now=0.5), 0)
+    
+    def test_client_table_is_bounded(self):
+        limiter = RateLimiter(rate=1, burst=1, max_clients=2)
+        for client in ('a', 'b', 'c'):
+            limiter.acquire(client, now=0)
+        self.assertEqual(len(limiter), 2)
+        self.assertEqual(limiter.acquire('a', now=0), 0)
+    
+    def test_sheds_past_max_in_flight(self):
+        admission = AdmissionController(parse_limits('chat=1:1'), max_in_flight=1)
+        self.assertIsNone(admission.admit('check_eligibility', 'a'))
+        self.assertEqual(admission.admit('check_eligibility', 'b'), (503, 1))
+        admission.release()
+        self.assertIsNone(admission.admit('chat', 'a'))
+        admission.release()
+        self.assertEqual(admission.admit('chat', 'a'), (429, 1))
+
+class TestReplay(unittest.TestCase):
+    CORPUS = [
+        '{"message": "How much is tuition?", "intent": "fees"}',
+        '{"message": "How do I apply?", "intent": "documents"}',
+        '"Do I need a transcrpt?"',
+        '"what is the weather like"',
+        'not json'
+    ]
+    
+    def test_accuracy_and_confusion(self):
+        results = replay.replay(self.CORPUS, [('admissions_data.json', 'keywords')], workers=0)
+        self.assertEqual((results['messages'], results['skipped']), (4, 1))
+        variant = results['variants'][0]
+        self.assertEqual(variant['accuracy'], 0.5)
+        self.assertEqual(variant['confusion'], {'documents': {'apply': 1}, 'fees': {'fees': 1}})
+        self.assertEqual(variant['unknown_rate'], 0.25)
+    
+    def test_non_string_intent_is_unlabelled(self):
+        corpus = ['{"message": "How much is tuition?", "intent": ["fees"]}',
+                  '{"message": "How do I apply?", "intent": {"name": "apply"}}']
+        self.assertEqual(replay.parse_line(corpus[0]), ("How much is tuition?", None))
+        results = replay.replay(corpus, [('admissions_data.json', 'keywords')], workers=1)
+        self.assertEqual((results['messages'], results['variants'][0]['labelled']), (2, 0))
+    
+    def test_diff_between_engines_in_worker_processes(self):
+        variants = [replay.parse_variant('admissions_data.json'), replay.parse_variant('admissions_data.json:exact')]
+        results = replay.replay(self.CORPUS * 3, variants, workers=2, chunk_size=2)
+        self.assertEqual(results['messages'], 12)
+        self.assertEqual(results['diff']['intent_changed'], 3)
+        self.assertEqual(results['diff']['transitions'], {'documents -> unknown': 3})
+
+class TestBenchmarkCompare(unittest.TestCase):
+    def test_flags_slower_latency_and_lower_throughput(self):
+        baseline = {'micro': {'10': {'find_intent_hit_us': 10.0}}, 'load': {'/chat': {'p99_ms': 5.0, 'rps': 1000.0}}}
+        current = {'micro': {'10': {'find_intent_hit_us': 10.5}}, 'load': {'/chat': {'p99_ms': 9.0, 'rps': 500.0}}}
+        regressions = benchmark.compare(baseline, current, threshold=0.2)
+        self.assertEqual(sorted(metric for metric, _, _, _ in regressions), ['load./chat.p99_ms', 'load./chat.rps'])
+
 if __name__ == '__main__':
     unittest.main()
\ No newline at end of file